@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Video Schedule Archive Job Script
+Moves old published rows from video_schedule into video_schedule_archive.
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from lib.supabase.client import supabase
+from lib.utils.log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+def archive_published_videos(older_than_days: int, batch_size: int, max_batches: int) -> int:
+    """
+    Archive published rows in batches until none are left or max_batches is hit.
+    
+    Args:
+        older_than_days: Only archive rows scheduled more than this many days ago
+        batch_size: Rows moved per call (each call is one transaction)
+        max_batches: Upper bound on calls per run
+        
+    Returns:
+        int: Total number of rows archived
+    """
+    total = 0
+    for _ in range(max_batches):
+        response = supabase.rpc("archive_published_videos", {
+            "older_than": f"{older_than_days} days",
+            "batch_size": batch_size
+        }).execute()
+        moved = response.data or 0
+        total += moved
+        logger.info("Archived %s rows", moved)
+        if moved < batch_size:
+            break
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=7,
+        help="Archive published rows scheduled more than this many days ago (default: 7)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="Rows moved per transaction (default: 5000)"
+    )
+    parser.add_argument(
+        "--max-batches",
+        type=int,
+        default=100,
+        help="Maximum number of batches per run (default: 100)"
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+
+    try:
+        total = archive_published_videos(args.older_than_days, args.batch_size, args.max_batches)
+        logger.info("Archived %s published rows", total)
+    except Exception as e:
+        logger.error("Archive job failed: %s", e)
+        sys.exit(1)
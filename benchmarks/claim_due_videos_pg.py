@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Check claim_due_videos against a real Postgres.
+
+Builds the schema in an empty scratch database and applies the claim
+migrations one step at a time, checking at each step:
+
+- 20250414 (the three-argument function of 20250412): the call publisher
+  workers fall back to (max_rows, worker, lease_seconds) claims rows, and a
+  call with tenant_weights/max_per_tenant finds no function
+  (undefined_function, which PostgREST answers with 404 PGRST202)
+- 20250415 and every later claim_due_videos: a single claim picks the rows
+  fair_order and cap_per_tenant pick, for several weights, caps and batch
+  sizes
+- the latest claim_due_videos: ``--clients`` concurrent claimers (pgbench)
+  get full batches while the backlog lasts, drain it without claiming any
+  row twice or losing a claim, with and without max_per_tenant, and the
+  three-argument call still works
+
+The 2025040x files were written against earlier states of the database and
+do not replay from empty, so the starting schema is create_tables.sql plus
+the files that gave video_schedule and transcript_files their current
+columns. Roles, auth.users, auth.uid() and auth.role() that Supabase
+provides are created when missing.
+
+Needs psql and pgbench (shipped with Postgres and in the supabase/postgres
+image) on PATH or in ``--bin-dir``. The script refuses to run against a
+database that already has a video_schedule table.
+
+    createdb claim_check
+    python benchmarks/claim_due_videos_pg.py postgresql://postgres@localhost/claim_check
+    python benchmarks/claim_due_videos_pg.py "$DSN" --rows 5000 --users 40 --clients 16
+"""
+
+import os
+import sys
+import uuid
+import random
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from lib.supabase.fetch_due_videos import cap_per_tenant, fair_order
+
+DB_DIR = Path(__file__).parent.parent / "db"
+
+SUPABASE_SHIM = """
+do $$
+begin
+    if not exists (select 1 from pg_roles where rolname = 'anon') then
+        create role anon nologin;
+    end if;
+    if not exists (select 1 from pg_roles where rolname = 'authenticated') then
+        create role authenticated nologin;
+    end if;
+    if not exists (select 1 from pg_roles where rolname = 'service_role') then
+        create role service_role nologin bypassrls;
+    end if;
+end;
+$$;
+create schema if not exists auth;
+create table if not exists auth.users (id uuid primary key default gen_random_uuid());
+create or replace function auth.uid() returns uuid
+language sql stable
+as $$ select nullif(current_setting('request.jwt.claim.sub', true), '')::uuid $$;
+create or replace function auth.role() returns text
+language sql stable
+as $$ select nullif(current_setting('request.jwt.claim.role', true), '')::text $$;
+"""
+
+BASE_SCHEMA = [
+    "migrations/20250406_create_transcript_files.sql",
+    "create_tables.sql",
+    "migrations/20250404_add_manifest_columns.sql",
+    "migrations/20250406_update_video_schedule.sql",
+    "migrations/20250408_add_platform_status.sql",
+]
+
+# The three-argument call fetch_due_videos falls back to, as PostgREST sends it
+THREE_ARG_CLAIM = "select id from claim_due_videos(max_rows => {rows}, worker => 'check', lease_seconds => 900)"
+
+FIVE_ARG_CLAIM = (
+    "select id from claim_due_videos(max_rows => {rows}, worker => '{worker}', lease_seconds => 900, "
+    "tenant_weights => '{weights}'::jsonb, max_per_tenant => {cap})"
+)
+
+# Claims by each pgbench client are logged, so double claims show up as
+# duplicate ids and short batches as calls returning fewer rows than asked
+PGBENCH_SCRIPT = """\\set batch random({min_batch}, {max_batch})
+with claimed as (
+    insert into claim_check_log (id, worker)
+    select id, 'worker-' || :client_id
+    from claim_due_videos(:batch, 'worker-' || :client_id, 900, '{weights}'::jsonb, {cap})
+    returning id
+)
+insert into claim_check_calls (requested, returned)
+select :batch, count(*) from claimed;
+"""
+
+class CheckFailed(Exception):
+    """A check did not hold."""
+
+class Database:
+    """psql and pgbench against one database."""
+
+    def __init__(self, dsn, bin_dir=None):
+        self.dsn = dsn
+        self.bin_dir = bin_dir
+        # Migrations drop objects "if exists"; keep their notices quiet
+        self.env = {**os.environ, "PGOPTIONS": "-c client_min_messages=warning"}
+
+    def tool(self, name):
+        return str(Path(self.bin_dir) / name) if self.bin_dir else name
+
+    def run(self, sql=None, path=None, single_transaction=False):
+        """Run SQL (or a file) and return psql's unaligned output."""
+        command = [
+            self.tool("psql"), "-X", "-q", "-A", "-t",
+            "-v", "ON_ERROR_STOP=1", "-v", "VERBOSITY=verbose", "-d", self.dsn
+        ]
+        if single_transaction:
+            command.append("-1")
+        if path:
+            command += ["-f", str(path)]
+        result = subprocess.run(command, input=sql, capture_output=True, text=True, env=self.env)
+        if result.returncode:
+            raise CheckFailed(result.stderr.strip())
+        return result.stdout.strip()
+
+    def rows(self, sql):
+        return [line for line in self.run(sql).splitlines() if line]
+
+    def apply(self, name):
+        self.run(path=DB_DIR / name, single_transaction=True)
+        print(f"applied {name}")
+
+    def claim_and_roll_back(self, sql):
+        """Ids a claim returns, without keeping the claim."""
+        return self.rows(f"begin;\n{sql};\nrollback;")
+
+    def pgbench(self, script, clients, transactions):
+        with tempfile.NamedTemporaryFile("w", suffix=".sql", delete=False) as f:
+            f.write(script)
+        try:
+            command = [
+                self.tool("pgbench"), "-n", "-c", str(clients), "-j", str(clients),
+                "-t", str(transactions), "-f", f.name, self.dsn
+            ]
+            result = subprocess.run(command, capture_output=True, text=True, env=self.env)
+            if result.returncode:
+                raise CheckFailed(result.stderr.strip())
+        finally:
+            os.unlink(f.name)
+
+def check(condition, message):
+    if not condition:
+        raise CheckFailed(message)
+    print(f"ok  {message}")
+
+def seed(db, rows, users, skew, rng):
+    """
+    Insert ``rows`` due schedule rows over ``users`` users (Zipf skew) plus
+    a few rows without an owner, at minute resolution so scheduled_at ties.
+
+    Returns:
+        list: The rows as fair_order takes them
+    """
+    user_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(users)]
+    shares = [1 / (k + 1) ** skew for k in range(users)]
+    start = datetime(2025, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+    seeded = []
+    for i in range(rows):
+        user_id = None if i % 97 == 0 else rng.choices(user_ids, shares)[0]
+        seeded.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "video_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "user_id": user_id,
+            "scheduled_at": start + timedelta(minutes=rng.randrange(60))
+        })
+
+    def literal(value):
+        return "null" if value is None else f"'{value}'"
+
+    db.run(
+        "insert into auth.users (id) values "
+        + ", ".join(f"('{user_id}')" for user_id in user_ids) + ";\n"
+        + "insert into transcript_files (id, user_id, file_path, file_name, file_type, bucket) values "
+        + ", ".join(
+            f"('{row['video_id']}', {literal(row['user_id'])}, 'check/{i}.mp4', '{i}.mp4', 'video/mp4', 'videos')"
+            for i, row in enumerate(seeded)
+        ) + ";\n"
+        + "insert into video_schedule (id, video_id, user_id, platform, title, scheduled_at) values "
+        + ", ".join(
+            f"('{row['id']}', '{row['video_id']}', {literal(row['user_id'])}, 'youtube', 'check', "
+            f"'{row['scheduled_at'].isoformat()}')"
+            for row in seeded
+        ) + ";\nanalyze video_schedule;"
+    )
+    return seeded
+
+def check_three_argument_function(db):
+    claimed = db.claim_and_roll_back(THREE_ARG_CLAIM.format(rows=5))
+    check(len(claimed) == 5, "20250414: three-argument call claims rows")
+    try:
+        db.claim_and_roll_back(FIVE_ARG_CLAIM.format(rows=5, worker="check", weights="{}", cap="null"))
+    except CheckFailed as e:
+        check("42883" in str(e), "20250414: call with tenant parameters is undefined_function (PostgREST 404)")
+    else:
+        raise CheckFailed("20250414: call with tenant parameters should not find a function")
+
+def check_fair_order(db, seeded, label):
+    """Single claims pick what fair_order/cap_per_tenant pick."""
+    users = sorted({row["user_id"] for row in seeded if row["user_id"]})
+    cases = [
+        (50, {}, None),
+        (len(seeded), {}, None),
+        (20, {users[0]: 2, users[1]: 0.5}, None),
+        (50, {users[0]: 0.5}, 3),
+        (10, {}, 1),
+    ]
+    picked = {}
+    for max_rows, weights, cap in cases:
+        weights_json = "{" + ", ".join(f'"{user}": {weight}' for user, weight in weights.items()) + "}"
+        claimed = db.claim_and_roll_back(FIVE_ARG_CLAIM.format(
+            rows=max_rows, worker="check", weights=weights_json, cap="null" if cap is None else cap
+        ))
+        expected = [row["id"] for row in cap_per_tenant(fair_order(seeded, weights), cap)[:max_rows]]
+        check(
+            claimed == expected,
+            f"{label}: max_rows={max_rows} weights={len(weights)} cap={cap} picks fair_order's {len(expected)} rows"
+        )
+        picked[(max_rows, weights_json, cap)] = claimed
+    return picked
+
+def reset_claims(db):
+    db.run(
+        "update video_schedule set claimed_at = null, claimed_by = null;\n"
+        "create table if not exists claim_check_log (id uuid, worker text);\n"
+        "create table if not exists claim_check_calls (requested integer, returned integer);\n"
+        "truncate claim_check_log, claim_check_calls;"
+    )
+
+def check_full_batches(db, seeded, clients, batch=10, transactions=10):
+    """Concurrent claimers each get a full batch while the backlog lasts."""
+    if len(seeded) < clients * batch * transactions:
+        print(f"skipped full batch check: needs --rows of at least {clients * batch * transactions}")
+        return
+    reset_claims(db)
+    db.pgbench(
+        PGBENCH_SCRIPT.format(min_batch=batch, max_batch=batch, weights="{}", cap="null"),
+        clients, transactions
+    )
+    calls, short, returned = db.run(
+        "select count(*), count(*) filter (where returned < requested), coalesce(avg(returned), 0)::numeric(6, 2) "
+        "from claim_check_calls"
+    ).split("|")
+    check(
+        int(short) == 0,
+        f"{clients} concurrent claimers: {calls} calls for {batch} rows returned {returned} on average, none short"
+    )
+
+def drain(db, clients, max_batch, weights, cap, rounds=20):
+    """Run concurrent claimers until a round claims nothing new."""
+    script = PGBENCH_SCRIPT.format(
+        min_batch=1, max_batch=max_batch, weights=weights, cap="null" if cap is None else cap
+    )
+    claimed = 0
+    for _ in range(rounds):
+        db.pgbench(script, clients, transactions=10)
+        now_claimed = int(db.run("select count(*) from claim_check_log"))
+        if now_claimed == claimed:
+            break
+        claimed = now_claimed
+    return claimed
+
+def check_concurrent_claims(db, seeded, clients, cap):
+    label = f"{clients} concurrent claimers, max_per_tenant={cap}"
+    reset_claims(db)
+    claimed = drain(db, clients, max_batch=10, weights="{}", cap=cap)
+
+    duplicates = int(db.run("select count(*) - count(distinct id) from claim_check_log"))
+    check(duplicates == 0, f"{label}: {claimed} claims, no row claimed twice")
+    lost = int(db.run(
+        "select count(*) from video_schedule v where v.claimed_at is not null "
+        "and not exists (select 1 from claim_check_log l where l.id = v.id)"
+    ))
+    mismatched = int(db.run(
+        "select count(*) from claim_check_log l join video_schedule v on v.id = l.id "
+        "where v.claimed_by is distinct from l.worker"
+    ))
+    check(lost == 0 and mismatched == 0, f"{label}: every claimed row was returned to the worker holding it")
+
+    if cap is None:
+        check(claimed == len(seeded), f"{label}: backlog of {len(seeded)} rows drained")
+        return
+
+    per_user = {}
+    for row in seeded:
+        per_user[row["user_id"]] = per_user.get(row["user_id"], 0) + 1
+    counts = dict(
+        (None if user_id == "" else user_id, int(count))
+        for user_id, count in (
+            line.split("|") for line in db.rows(
+                "select v.user_id, count(*) from claim_check_log l "
+                "join video_schedule v on v.id = l.id group by v.user_id"
+            )
+        )
+    )
+    short = [user for user, total in per_user.items() if counts.get(user, 0) < min(total, cap)]
+    check(not short, f"{label}: every user got min(due rows, cap) rows claimed")
+    # Claims committed while another claim runs are not visible to it, so
+    # the cap can be exceeded by up to one batch per concurrent claimer
+    over = max(count - cap for count in counts.values())
+    check(
+        over <= cap * (clients - 1),
+        f"{label}: most rows in flight for one user over the cap: {max(over, 0)} (bound {cap * (clients - 1)})"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Check claim_due_videos against a real Postgres")
+    parser.add_argument("dsn", help="Connection string of an empty scratch database")
+    parser.add_argument("--bin-dir", help="Directory holding psql and pgbench")
+    parser.add_argument("--rows", type=int, default=2000, help="Due rows to seed")
+    parser.add_argument("--users", type=int, default=25, help="Users the rows belong to")
+    parser.add_argument("--user-skew", type=float, default=1.1, help="Zipf skew of rows over users")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent claimers")
+    parser.add_argument("--cap", type=int, default=3, help="max_per_tenant for the capped run")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    db = Database(args.dsn, args.bin_dir)
+    try:
+        if db.run("select to_regclass('public.video_schedule') is not null") == "t":
+            raise CheckFailed("video_schedule already exists; use an empty scratch database")
+        print(db.run("select version()"))
+
+        db.run(SUPABASE_SHIM)
+        for name in BASE_SCHEMA:
+            db.apply(name)
+        migrations = sorted(p.name for p in (DB_DIR / "migrations").glob("*.sql") if p.name >= "20250410")
+        for name in migrations:
+            if name >= "20250415":
+                break
+            db.apply(f"migrations/{name}")
+
+        seeded = seed(db, args.rows, args.users, args.user_skew, random.Random(args.seed))
+        print(f"seeded {len(seeded)} due rows over {args.users} users")
+        check_three_argument_function(db)
+
+        picked = None
+        for name in migrations:
+            if name < "20250415":
+                continue
+            db.apply(f"migrations/{name}")
+            if "function claim_due_videos(" not in (DB_DIR / "migrations" / name).read_text():
+                continue
+            version = name.split("_")[0]
+            if picked is None:
+                picked = check_fair_order(db, seeded, version)
+            else:
+                check(
+                    check_fair_order(db, seeded, version) == picked,
+                    f"{version} picks the same rows as 20250415 in every case"
+                )
+
+        claimed = db.claim_and_roll_back(THREE_ARG_CLAIM.format(rows=5))
+        check(len(claimed) == 5, "latest: three-argument call still claims rows")
+
+        check_full_batches(db, seeded, args.clients)
+        check_concurrent_claims(db, seeded, args.clients, None)
+        check_concurrent_claims(db, seeded, args.clients, args.cap)
+    except CheckFailed as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    print("all checks passed")
+
+if __name__ == "__main__":
+    main()
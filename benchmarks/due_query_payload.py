@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark the due-video query with select=* versus the publisher's column list.
+
+Runs the same PostgREST query both ways against the configured project and
+reports response size and latency percentiles for each.
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from lib.supabase.client import supabase
+from lib.supabase.fetch_due_videos import DUE_VIDEO_COLUMNS
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[index]
+
+def run_query(select, runs):
+    """Run the due query `runs` times and return (response bytes, latencies in ms)."""
+    params = {
+        "select": select,
+        "published": "eq.false",
+        "scheduled_at": f"lte.{datetime.now(timezone.utc).isoformat()}"
+    }
+    sizes, latencies = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = supabase.request("GET", "/rest/v1/video_schedule", "get:video_schedule", params=params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(response.content))
+    return sizes, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare due query payloads")
+    parser.add_argument("--runs", type=int, default=20, help="Requests per variant")
+    args = parser.parse_args()
+
+    # Warm up the pooled connection so the first variant is not penalised
+    run_query("id", 1)
+
+    print(f"{'select':<12} {'bytes':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, select in (("*", "*"), ("columns", DUE_VIDEO_COLUMNS)):
+        sizes, latencies = run_query(select, args.runs)
+        print(
+            f"{label:<12} {int(statistics.mean(sizes)):>10} "
+            f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
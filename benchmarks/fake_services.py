@@ -0,0 +1,811 @@
+"""
+In-process stand-ins for the services the publisher talks to.
+
+- ``FakeSupabase``: PostgREST tables and RPCs plus Storage, as used by
+  ``lib/supabase/client.py`` (and so ``video_storage.py``)
+- ``FakeGraphAPI``: the Graph API upload and publish endpoints used by
+  ``meta_client.py``
+- ``FakeYouTube``: the OAuth token endpoint and the resumable
+  ``videos.insert`` upload used by ``youtube_client.py``
+
+Each server listens on 127.0.0.1 in a background thread and applies a
+``FaultProfile`` to every request: fixed latency plus jitter, a
+per-connection bandwidth cap on request and response bodies, and injected
+error responses or dropped connections. ``env()`` returns the settings that
+point the publisher at a server::
+
+    with FakeSupabase() as db, FakeGraphAPI() as graph, FakeYouTube() as youtube:
+        os.environ.update({**db.env(), **graph.env(), **youtube.env()})
+        ...
+"""
+
+import json
+import time
+import uuid
+import random
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, timedelta
+from functools import cmp_to_key
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# Bodies are read and written in chunks of this size so the bandwidth cap
+# applies while a transfer is in progress
+CHUNK_SIZE = 64 * 1024
+
+@dataclass
+class FaultProfile:
+    """Latency, bandwidth and failures applied to every request of a fake server."""
+    latency: float = 0.0
+    jitter: float = 0.0
+    bandwidth: Optional[float] = None
+    error_rate: float = 0.0
+    error_status: int = 503
+    drop_rate: float = 0.0
+
+@dataclass
+class FakeRequest:
+    """A request as seen by a fake server's routes."""
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Any
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+@dataclass
+class FakeResponse:
+    """A response returned by a fake server's routes."""
+    status: int = 200
+    body: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+
+def json_response(status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> FakeResponse:
+    return FakeResponse(status, json.dumps(data).encode(), {"Content-Type": "application/json", **(headers or {})})
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so client connection pools behave as they do in production
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self):
+        self.server.fake.handle(self)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+class FakeServer:
+    """
+    Base class for the fake services.
+
+    Subclasses implement ``route`` (and optionally ``error_response`` to
+    shape injected errors like the real service's). ``stats`` counts
+    requests, injected errors, dropped connections and body bytes.
+    """
+
+    def __init__(self, faults: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        self.faults = faults or FaultProfile()
+        self.stats: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle
+
+    def start(self) -> 'FakeServer':
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Environment settings that point the publisher at this server."""
+        raise NotImplementedError
+
+    # Routing
+
+    def route(self, request: FakeRequest) -> FakeResponse:
+        raise NotImplementedError
+
+    def error_response(self, status: int) -> FakeResponse:
+        return json_response(status, {"message": "Injected fault"})
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.faults.latency
+            if self.faults.jitter:
+                delay += self._rng.uniform(0, self.faults.jitter)
+            drop = self._rng.random() < self.faults.drop_rate
+            fail = not drop and self._rng.random() < self.faults.error_rate
+        if delay:
+            time.sleep(delay)
+
+        body = self._read_body(handler)
+        if drop:
+            # Close without a response; clients see a protocol/connection error
+            self.count("dropped")
+            handler.close_connection = True
+            return
+
+        parts = urlsplit(handler.path)
+        request = FakeRequest(
+            handler.command,
+            unquote(parts.path),
+            dict(parse_qsl(parts.query, keep_blank_values=True)),
+            handler.headers,
+            body
+        )
+        if fail:
+            self.count("injected_errors")
+            response = self.error_response(self.faults.error_status)
+        else:
+            try:
+                response = self.route(request)
+            except Exception as e:
+                response = json_response(500, {"message": f"Fake server error: {str(e)}"})
+        self._send(handler, response)
+
+    # Transfer
+
+    def _throttle(self, started: float, transferred: int) -> None:
+        if self.faults.bandwidth:
+            delay = transferred / self.faults.bandwidth - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    def _read_body(self, handler: BaseHTTPRequestHandler) -> bytes:
+        started = time.monotonic()
+        chunks = []
+        received = 0
+        if handler.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(handler.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    handler.rfile.readline()
+                    break
+                chunks.append(handler.rfile.read(size))
+                handler.rfile.readline()
+                received += size
+                self._throttle(started, received)
+        else:
+            remaining = int(handler.headers.get("Content-Length") or 0)
+            while remaining:
+                chunk = handler.rfile.read(min(remaining, CHUNK_SIZE))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                received += len(chunk)
+                remaining -= len(chunk)
+                self._throttle(started, received)
+        self.count("bytes_received", received)
+        return b"".join(chunks)
+
+    def _send(self, handler: BaseHTTPRequestHandler, response: FakeResponse) -> None:
+        try:
+            handler.send_response(response.status)
+            for name, value in response.headers.items():
+                handler.send_header(name, value)
+            handler.send_header("Content-Length", str(len(response.body)))
+            handler.end_headers()
+            if handler.command == "HEAD":
+                return
+            started = time.monotonic()
+            for offset in range(0, len(response.body), CHUNK_SIZE):
+                handler.wfile.write(response.body[offset:offset + CHUNK_SIZE])
+                self._throttle(started, min(offset + CHUNK_SIZE, len(response.body)))
+            self.count("bytes_sent", len(response.body))
+        except ConnectionError:
+            handler.close_connection = True
+
+# PostgREST filter evaluation
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas that are not inside parentheses or quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+def _comparable(value: Any) -> Any:
+    """Timestamps compare as datetimes, everything else as itself."""
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return value
+
+def _compare(actual: Any, text: str) -> int:
+    if isinstance(actual, bool):
+        expected: Any = text == "true"
+    elif isinstance(actual, (int, float)):
+        expected = float(text)
+    else:
+        actual, expected = _comparable(actual), _comparable(text)
+        if type(actual) is not type(expected):
+            actual, expected = str(actual), str(expected)
+    return (actual > expected) - (actual < expected)
+
+def _text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+def _condition(row: Dict[str, Any], column: str, expression: str) -> bool:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[len("not."):]
+    operator, _, value = expression.partition(".")
+    actual = row.get(column)
+
+    if operator == "is":
+        result = actual is None if value == "null" else _text(actual) == value
+    elif operator == "in":
+        values = [v.strip('"') for v in _split_top_level(value.strip("()"))]
+        result = actual is not None and _text(actual) in values
+    elif operator in ("eq", "neq", "lt", "lte", "gt", "gte"):
+        if actual is None:
+            return False
+        order = _compare(actual, value)
+        result = {
+            "eq": order == 0, "neq": order != 0,
+            "lt": order < 0, "lte": order <= 0,
+            "gt": order > 0, "gte": order >= 0
+        }[operator]
+    else:
+        raise ValueError(f"Unsupported filter operator: {operator}")
+    return result != negate
+
+def _matches(row: Dict[str, Any], filters: List[Tuple[str, str]]) -> bool:
+    for column, expression in filters:
+        if column == "or":
+            alternatives = _split_top_level(expression.strip("()"))
+            if not any(_condition(row, *alternative.split(".", 1)) for alternative in alternatives):
+                return False
+        elif not _condition(row, column, expression):
+            return False
+    return True
+
+def _order_rows(rows: List[Dict[str, Any]], order: str) -> List[Dict[str, Any]]:
+    terms = []
+    for term in order.split(","):
+        column, *modifiers = term.split(".")
+        descending = "desc" in modifiers
+        # Postgres puts nulls last ascending and first descending
+        nulls_first = "nullsfirst" in modifiers or (descending and "nullslast" not in modifiers)
+        terms.append((column, descending, nulls_first))
+
+    def compare(a, b):
+        for column, descending, nulls_first in terms:
+            x, y = a.get(column), b.get(column)
+            if x is None or y is None:
+                if x is None and y is None:
+                    continue
+                return (-1 if x is None else 1) * (1 if nulls_first else -1)
+            x, y = _comparable(x), _comparable(y)
+            if x != y:
+                return (-1 if x < y else 1) * (-1 if descending else 1)
+        return 0
+
+    return sorted(rows, key=cmp_to_key(compare))
+
+def _project(row: Dict[str, Any], select: str) -> Dict[str, Any]:
+    if select == "*":
+        return dict(row)
+    return {column: row.get(column) for column in select.split(",")}
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class FakeSupabase(FakeServer):
+    """
+    PostgREST and Storage for the tables, RPCs and buckets the publisher uses.
+
+    Tables are lists of dicts; the claim/release/bulk-update RPCs follow the
+    SQL functions in ``db/migrations``. For benchmarks the server also
+    records when each video_schedule row was claimed (``claim_times``) and
+    when its status was written (``status_times``), as ``time.monotonic()``.
+    """
+
+    # Unique keys enforced on insert (409, like the database)
+    UNIQUE_KEYS = {
+        "video_schedule": ("video_id", "platform", "scheduled_at")
+    }
+
+    TABLE_DEFAULTS = {
+        "video_schedule": {
+            "published": False,
+            "publish_url": None,
+            "publish_error": None,
+            "claimed_at": None,
+            "claimed_by": None
+        }
+    }
+
+    BULK_UPDATE_COLUMNS = (
+        "platform_video_id", "platform_status", "platform_status_detail",
+        "platform_checked_at", "manifest_path", "manifest_url"
+    )
+
+    def __init__(self, faults: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(faults, seed)
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.buckets: Dict[str, Dict[str, Any]] = {}
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.claim_times: Dict[str, float] = {}
+        self.status_times: Dict[str, float] = {}
+
+    def env(self) -> Dict[str, str]:
+        return {"SUPABASE_URL": self.url, "SUPABASE_SERVICE_ROLE_KEY": "fake-service-role-key"}
+
+    def error_response(self, status: int) -> FakeResponse:
+        return json_response(status, {"code": "FAKE", "message": "Injected fault", "statusCode": str(status)})
+
+    # Seeding and inspection
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows directly, applying the table's defaults."""
+        with self._lock:
+            created = [self._new_row(table, row) for row in rows]
+            self.tables.setdefault(table, []).extend(created)
+            return created
+
+    def add_bucket(self, bucket: str, public: bool = False) -> None:
+        """Create a bucket if it does not exist."""
+        with self._lock:
+            self.buckets.setdefault(bucket, {"id": bucket, "name": bucket, "public": public})
+
+    def put_object(self, bucket: str, path: str, content: bytes) -> None:
+        """Store an object (the bucket is created if missing). Content is kept by reference."""
+        self.add_bucket(bucket)
+        with self._lock:
+            self.objects[(bucket, path)] = content
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        """Copies of a table's rows."""
+        with self._lock:
+            return [dict(row) for row in self.tables.get(table, [])]
+
+    def _new_row(self, table: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        row = {"id": str(uuid.uuid4()), "created_at": _now().isoformat()}
+        row.update(self.TABLE_DEFAULTS.get(table, {}))
+        row.update(item)
+        return row
+
+    def _unique_key(self, table: str, row: Dict[str, Any]) -> Optional[tuple]:
+        columns = self.UNIQUE_KEYS.get(table)
+        return tuple(_comparable(row.get(c)) for c in columns) if columns else None
+
+    # Routes
+
+    def route(self, request: FakeRequest) -> FakeResponse:
+        if request.path.startswith("/rest/v1/rpc/"):
+            return self._rpc(request.path[len("/rest/v1/rpc/"):], request.json() or {})
+        if request.path.startswith("/rest/v1/"):
+            try:
+                return self._table(request, request.path[len("/rest/v1/"):])
+            except ValueError as e:
+                return json_response(400, {"code": "PGRST100", "message": str(e)})
+        if request.path.startswith("/storage/v1/"):
+            return self._storage(request, request.path[len("/storage/v1/"):])
+        return json_response(404, {"message": f"No route for {request.path}"})
+
+    def _table(self, request: FakeRequest, table: str) -> FakeResponse:
+        params = dict(request.query)
+        select = params.pop("select", "*")
+        order = params.pop("order", None)
+        limit = params.pop("limit", None)
+        offset = int(params.pop("offset", 0))
+        on_conflict = params.pop("on_conflict", None)
+        filters = list(params.items())
+        prefer = request.headers.get("Prefer", "")
+        conflict_columns = (on_conflict or "id").split(",") if "merge-duplicates" in prefer else None
+
+        with self._lock:
+            rows = self.tables.setdefault(table, [])
+            if request.method in ("GET", "HEAD"):
+                result = [row for row in rows if _matches(row, filters)]
+                if order:
+                    result = _order_rows(result, order)
+                result = result[offset:offset + int(limit) if limit else None]
+                return json_response(200, [_project(row, select) for row in result])
+
+            if request.method == "POST":
+                body = request.json()
+                items = body if isinstance(body, list) else [body]
+                result = self._write(table, rows, items, conflict_columns)
+                if isinstance(result, FakeResponse):
+                    return result
+                status = 201
+            elif request.method == "PATCH":
+                changes = request.json() or {}
+                result = [row for row in rows if _matches(row, filters)]
+                for row in result:
+                    row.update(changes)
+                    if table == "video_schedule" and "published" in changes:
+                        self.status_times[row["id"]] = time.monotonic()
+                status = 200
+            elif request.method == "DELETE":
+                result = [row for row in rows if _matches(row, filters)]
+                rows[:] = [row for row in rows if row not in result]
+                status = 200
+            else:
+                return json_response(405, {"message": f"Method {request.method} not allowed"})
+
+        if "return=representation" not in prefer:
+            return FakeResponse(204 if status == 200 else status)
+        return json_response(status, [_project(row, select) for row in result])
+
+    def _write(self, table, rows, items, conflict_columns):
+        """Insert items all-or-nothing, like one statement; upsert on conflict_columns if given."""
+        existing_keys = {self._unique_key(table, row) for row in rows}
+        pending = []
+        for item in items:
+            target = None
+            if conflict_columns:
+                wanted = tuple(_comparable(item.get(c)) for c in conflict_columns)
+                target = next(
+                    (row for row in rows if tuple(_comparable(row.get(c)) for c in conflict_columns) == wanted),
+                    None
+                )
+            if target is None:
+                key = self._unique_key(table, item)
+                if key is not None:
+                    if key in existing_keys:
+                        return json_response(409, {
+                            "code": "23505",
+                            "message": f"duplicate key value violates unique constraint on {table}"
+                        })
+                    existing_keys.add(key)
+            pending.append((target, item))
+
+        result = []
+        for target, item in pending:
+            if target is not None:
+                target.update(item)
+                result.append(target)
+            else:
+                row = self._new_row(table, item)
+                rows.append(row)
+                result.append(row)
+        return result
+
+    def _rpc(self, name: str, params: Dict[str, Any]) -> FakeResponse:
+        function: Optional[Callable] = getattr(self, f"_rpc_{name}", None)
+        if function is None:
+            return json_response(404, {
+                "code": "PGRST202",
+                "message": f"Could not find the function public.{name} in the schema cache"
+            })
+        with self._lock:
+            return json_response(200, function(**params))
+
+    def _rpc_claim_due_videos(
+        self,
+        max_rows: int = 50,
+        worker: Optional[str] = None,
+        lease_seconds: int = 900,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        max_per_tenant: Optional[int] = None
+    ):
+        now = _now()
+        expired = now - timedelta(seconds=lease_seconds)
+        rows = self.tables.get("video_schedule", [])
+        in_flight = Counter(
+            row["user_id"] for row in rows
+            if not row["published"] and row["claimed_at"] is not None and _comparable(row["claimed_at"]) >= expired
+        )
+        due = [
+            row for row in rows
+            if not row["published"]
+            and _comparable(row["scheduled_at"]) <= now
+            and (row["claimed_at"] is None or _comparable(row["claimed_at"]) < expired)
+        ]
+        # Weighted round-robin across user_id, as in the SQL function
+        ranks: Counter = Counter()
+        picked = []
+        for row in _order_rows(due, "scheduled_at,id"):
+            user_id = row["user_id"]
+            ranks[user_id] += 1
+            if max_per_tenant is not None and ranks[user_id] + in_flight[user_id] > max_per_tenant:
+                continue
+            weight = max(float((tenant_weights or {}).get(str(user_id), 1)), 0.001)
+            picked.append((ranks[user_id] / weight, _comparable(row["scheduled_at"]), row["id"], row))
+        picked.sort(key=lambda item: item[:3])
+        due = [item[3] for item in picked[:max_rows]]
+        transcripts = {row["id"]: row for row in self.tables.get("transcript_files", [])}
+
+        claimed = []
+        for row in due:
+            row["claimed_at"] = now.isoformat()
+            row["claimed_by"] = worker
+            self.claim_times[row["id"]] = time.monotonic()
+            transcript = transcripts.get(row["video_id"])
+            claimed.append({
+                **{c: row.get(c) for c in (
+                    "id", "video_id", "user_id", "platform", "video_type",
+                    "title", "description", "tags", "scheduled_at"
+                )},
+                "bucket": transcript and transcript.get("bucket"),
+                "object_path": transcript and transcript.get("file_path"),
+                "file_name": transcript and transcript.get("file_name"),
+                "storage_path": transcript and f"{transcript.get('bucket')}/{transcript.get('file_path')}"
+            })
+        return claimed
+
+    def _rpc_release_video_claims(self, ids: List[str]):
+        released = 0
+        wanted = set(ids)
+        for row in self.tables.get("video_schedule", []):
+            if row["id"] in wanted and not row["published"] and row["claimed_at"] is not None:
+                row["claimed_at"] = None
+                row["claimed_by"] = None
+                released += 1
+        return released
+
+    def _rpc_bulk_update_video_schedule(self, updates: List[Dict[str, Any]]):
+        rows = {row["id"]: row for row in self.tables.get("video_schedule", [])}
+        updated = 0
+        for update in updates:
+            row = rows.get(update.get("id"))
+            if row is not None:
+                row.update({k: v for k, v in update.items() if k in self.BULK_UPDATE_COLUMNS})
+                updated += 1
+        return updated
+
+    def _storage(self, request: FakeRequest, path: str) -> FakeResponse:
+        def not_found(message: str) -> FakeResponse:
+            # Storage reports missing buckets and objects as 400 with statusCode 404
+            return json_response(400, {"statusCode": "404", "error": "not_found", "message": message})
+
+        with self._lock:
+            if path == "bucket":
+                if request.method == "GET":
+                    return json_response(200, list(self.buckets.values()))
+                body = request.json()
+                if body["id"] in self.buckets:
+                    return json_response(400, {"statusCode": "409", "error": "Duplicate", "message": "The resource already exists"})
+                self.buckets[body["id"]] = body
+                return json_response(200, {"name": body["id"]})
+
+            if path.startswith("bucket/"):
+                bucket = self.buckets.get(path[len("bucket/"):])
+                return json_response(200, bucket) if bucket else not_found("Bucket not found")
+
+            if path.startswith("object/list/"):
+                return json_response(200, self._list_objects(path[len("object/list/"):], request.json() or {}))
+
+            if not path.startswith("object/"):
+                return json_response(404, {"message": f"No route for {request.path}"})
+
+            object_path = path[len("object/"):]
+            for prefix in ("public/", "authenticated/"):
+                if object_path.startswith(prefix):
+                    object_path = object_path[len(prefix):]
+            bucket, _, name = object_path.partition("/")
+
+            if request.method == "DELETE" and not name:
+                removed = []
+                for prefix in (request.json() or {}).get("prefixes", []):
+                    if self.objects.pop((bucket, prefix), None) is not None:
+                        removed.append({"name": prefix})
+                return json_response(200, removed)
+
+            if bucket not in self.buckets:
+                return not_found("Bucket not found")
+
+            if request.method in ("GET", "HEAD"):
+                content = self.objects.get((bucket, name))
+                if content is None:
+                    return not_found("Object not found")
+                self.stats["object_bytes_sent"] += len(content)
+                return FakeResponse(200, content, {"Content-Type": "application/octet-stream"})
+
+            if request.method in ("POST", "PUT"):
+                upsert = request.headers.get("x-upsert", "false") == "true"
+                if request.method == "POST" and not upsert and (bucket, name) in self.objects:
+                    return json_response(400, {"statusCode": "409", "error": "Duplicate", "message": "The resource already exists"})
+                self.objects[(bucket, name)] = request.body
+                return json_response(200, {"Key": f"{bucket}/{name}"})
+
+        return json_response(405, {"message": f"Method {request.method} not allowed"})
+
+    def _list_objects(self, bucket: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        prefix = options.get("prefix", "").strip("/")
+        prefix = f"{prefix}/" if prefix else ""
+        entries: Dict[str, Dict[str, Any]] = {}
+        for (object_bucket, name), content in self.objects.items():
+            if object_bucket != bucket or not name.startswith(prefix):
+                continue
+            relative = name[len(prefix):]
+            if "/" in relative:
+                # One level at a time; deeper objects show up as a folder
+                folder = relative.split("/", 1)[0]
+                entries.setdefault(folder, {"name": folder, "id": None, "metadata": None})
+            else:
+                entries[relative] = {"name": relative, "id": str(uuid.uuid5(uuid.NAMESPACE_URL, name)), "metadata": {"size": len(content)}}
+        offset = options.get("offset", 0)
+        return [entries[name] for name in sorted(entries)][offset:offset + options.get("limit", 100)]
+
+class FakeGraphAPI(FakeServer):
+    """
+    Graph API endpoints used by meta_client.py: Facebook page video upload
+    and the Instagram Reel container upload and publish.
+    """
+
+    def __init__(self, faults: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(faults, seed)
+        self.containers: Dict[str, str] = {}
+        self.published: List[Dict[str, str]] = []
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "META_GRAPH_URL": self.url,
+            "META_GRAPH_VIDEO_URL": self.url,
+            "META_ACCESS_TOKEN": "fake-meta-token",
+            "FACEBOOK_PAGE_ID": "1000000001",
+            "INSTAGRAM_USER_ID": "1000000002"
+        }
+
+    def error_response(self, status: int) -> FakeResponse:
+        return json_response(status, {"error": {
+            "message": "Injected fault",
+            "type": "OAuthException",
+            "code": 2,
+            "is_transient": True
+        }})
+
+    def route(self, request: FakeRequest) -> FakeResponse:
+        parts = request.path.strip("/").split("/")
+        if request.method != "POST" or len(parts) != 3:
+            return json_response(400, {"error": {"message": f"Unsupported request {request.method} {request.path}", "code": 100}})
+        _, node, edge = parts
+
+        with self._lock:
+            object_id = str(self._rng.randint(10 ** 15, 10 ** 16))
+            if edge == "videos":
+                self.published.append({"platform": "facebook", "node": node, "id": object_id})
+                return json_response(200, {"id": object_id})
+            if edge == "media":
+                self.containers[object_id] = node
+                return json_response(200, {"id": object_id})
+            if edge == "media_publish":
+                creation_id = dict(parse_qsl(request.body.decode())).get("creation_id")
+                if self.containers.pop(creation_id, None) != node:
+                    return json_response(400, {"error": {"message": "Invalid creation_id", "code": 100}})
+                self.published.append({"platform": "instagram", "node": node, "id": object_id})
+                return json_response(200, {"id": object_id})
+        return json_response(400, {"error": {"message": f"Unknown edge: {edge}", "code": 100}})
+
+class FakeYouTube(FakeServer):
+    """
+    OAuth token endpoint and resumable ``videos.insert`` upload of the
+    YouTube Data API, as driven by googleapiclient's MediaFileUpload.
+    """
+
+    UPLOAD_PATH = "/upload/youtube/v3/videos"
+
+    def __init__(self, faults: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(faults, seed)
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.videos: Dict[str, Dict[str, Any]] = {}
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "YOUTUBE_API_URL": self.url,
+            "YOUTUBE_TOKEN_URI": f"{self.url}/token",
+            "YOUTUBE_CLIENT_ID": "fake-client-id",
+            "YOUTUBE_CLIENT_SECRET": "fake-client-secret",
+            "YOUTUBE_REFRESH_TOKEN": "fake-refresh-token"
+        }
+
+    def error_response(self, status: int) -> FakeResponse:
+        return json_response(status, {"error": {
+            "code": status,
+            "message": "Injected fault",
+            "errors": [{"reason": "backendError", "message": "Injected fault"}]
+        }})
+
+    def route(self, request: FakeRequest) -> FakeResponse:
+        if request.path == "/token" and request.method == "POST":
+            self.count("token_refreshes")
+            return json_response(200, {
+                "access_token": f"fake-access-{uuid.uuid4().hex}",
+                "expires_in": 3600,
+                "token_type": "Bearer"
+            })
+
+        if request.path != self.UPLOAD_PATH:
+            return json_response(404, {"error": {"code": 404, "message": f"No route for {request.path}"}})
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return json_response(401, {"error": {"code": 401, "message": "Login Required"}})
+
+        with self._lock:
+            if request.method == "POST" and request.query.get("uploadType") == "resumable":
+                upload_id = uuid.uuid4().hex
+                total = request.headers.get("X-Upload-Content-Length")
+                self.sessions[upload_id] = {
+                    "metadata": request.json() or {},
+                    "size": int(total) if total else None,
+                    "received": 0
+                }
+                location = f"{self.url}{self.UPLOAD_PATH}?uploadType=resumable&upload_id={upload_id}"
+                return FakeResponse(200, headers={"Location": location})
+
+            session = self.sessions.get(request.query.get("upload_id", ""))
+            if request.method != "PUT" or session is None:
+                return json_response(404, {"error": {"code": 404, "message": "Upload session not found"}})
+
+            # "bytes <first>-<last>/<total>", or "bytes */<total>" to query progress
+            content_range = request.headers.get("Content-Range")
+            if content_range:
+                span, _, total = content_range[len("bytes "):].partition("/")
+                if total != "*":
+                    session["size"] = int(total)
+                if span != "*":
+                    first = int(span.split("-")[0])
+                    if first != session["received"]:
+                        return json_response(400, {"error": {"code": 400, "message": "Chunk out of order"}})
+                    session["received"] += len(request.body)
+            else:
+                session["received"] += len(request.body)
+                session["size"] = session["received"]
+
+            if session["size"] is not None and session["received"] >= session["size"]:
+                video_id = uuid.uuid4().hex[:11]
+                self.videos[video_id] = session["metadata"]
+                del self.sessions[request.query["upload_id"]]
+                return json_response(200, {"kind": "youtube#video", "id": video_id, **session["metadata"]})
+
+            headers = {"Range": f"bytes=0-{session['received'] - 1}"} if session["received"] else {}
+            return FakeResponse(308, headers=headers)
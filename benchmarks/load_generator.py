@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Synthetic schedule load for scaling the due-video query, claims and status writes.
+
+Seeds N transcript_files and video_schedule rows (plus their storage
+objects) and replays them through ``run_video_publisher``, launching
+``--workers`` publisher processes every ``--interval`` seconds the way cron
+would, until every row has been attempted once. Platform uploads always go
+to FakeGraphAPI/FakeYouTube. The rows go to an in-process FakeSupabase
+(``--target fake``, the default) or to the Supabase project in
+SUPABASE_URL/SUPABASE_SERVICE_ROLE_KEY (``--target env``, e.g. a local
+``supabase start`` stack). There, transcript_files.user_id must reference
+existing auth users, given with ``--user-ids``.
+
+When rows come due (``--distribution``):
+
+- ``due``: all already due, spread over the last ``--window`` seconds
+- ``steady``: evenly over the next ``--window`` seconds
+- ``bursts``: at ``--bursts`` instants over the next ``--window`` seconds,
+  every row of a burst at the same second (one user scheduling 500 shorts
+  for 09:00)
+- ``backlog``: ``--backlog-fraction`` of the rows piled up during an outage
+  of ``--outage`` seconds that just ended, the rest steady
+
+Rows are spread over ``--users`` users with Zipf skew ``--user-skew`` (0 is
+uniform) and over platforms by ``--platforms`` weights. ``--missing-file-rate``
+and ``--missing-blob-rate`` seed rows that fail before upload (no storage
+path, or an object that does not exist). ``--fault`` injects platform and
+Supabase errors as in publish_throughput.py.
+
+Lag is the time from a row's scheduled_at (or the start of the replay, if
+later) to the end of the worker round that published it, reported overall
+and for the busiest and the worst-served users.
+
+    python benchmarks/load_generator.py --videos 2000 --users 50 --user-skew 1.2 \\
+        --distribution bursts --bursts 3 --window 60 --workers 4
+    python benchmarks/load_generator.py --target env --user-ids "$USER_A,$USER_B" --seed-only
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import subprocess
+from dataclasses import asdict
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fake_services import FaultProfile, FakeSupabase, FakeGraphAPI, FakeYouTube
+from benchmarks.publish_throughput import SERVICES, WORKER_CODE, PROJECT_ROOT, parse_size, parse_faults, percentile, worker_env
+from lib.supabase.client import SupabaseClient, get_supabase_config
+
+DISTRIBUTIONS = ("due", "steady", "bursts", "backlog")
+
+BUCKET = "videos"
+
+INSERT_BATCH = 500
+
+PAGE_SIZE = 1000
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """Parse 'youtube=3,facebook=1' (a bare name weighs 1)."""
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight) if weight else 1.0
+    return weights
+
+def parse_size_range(text: str) -> Tuple[int, int]:
+    """Parse '1MB' or a range '256KB-4MB'."""
+    low, _, high = text.partition("-")
+    return parse_size(low), parse_size(high or low)
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    """Weight of the user at each rank: 1 / rank ** skew."""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+def schedule_offsets(args, count: int, rng: random.Random) -> List[float]:
+    """Seconds from now at which each row comes due (negative: already due)."""
+    window = args.window
+    if args.distribution == "due":
+        offsets = [-rng.uniform(0, window) for _ in range(count)]
+    elif args.distribution == "steady":
+        offsets = [rng.uniform(0, window) for _ in range(count)]
+    elif args.distribution == "bursts":
+        instants = [window * (n + 1) / args.bursts for n in range(args.bursts)] if args.bursts > 1 else [0.0]
+        offsets = [float(math.floor(rng.choice(instants))) for _ in range(count)]
+    else:
+        offsets = [
+            -rng.uniform(0, args.outage) if rng.random() < args.backlog_fraction else rng.uniform(0, window)
+            for _ in range(count)
+        ]
+    return offsets
+
+def generate(args, rng: random.Random, users: List[str], tag: str, now: datetime) -> Dict[str, Any]:
+    """Build the rows and blobs to seed (nothing is written yet)."""
+    platforms = parse_weights(args.platforms)
+    user_weights = zipf_weights(len(users), args.user_skew)
+    low, high = parse_size_range(args.blob_size)
+    blobs = {
+        f"loadgen/{tag}/blob-{n}.mp4": rng.randbytes(rng.randint(low, high))
+        for n in range(args.distinct_blobs)
+    }
+    blob_paths = list(blobs)
+
+    transcripts, schedules = [], []
+    offsets = schedule_offsets(args, args.videos, rng)
+    for i in range(args.videos):
+        video_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        user_id = rng.choices(users, user_weights)[0]
+        draw = rng.random()
+        if draw < args.missing_file_rate:
+            file_path = ""
+        elif draw < args.missing_file_rate + args.missing_blob_rate:
+            file_path = f"loadgen/{tag}/missing-{i}.mp4"
+        else:
+            file_path = rng.choice(blob_paths)
+        transcripts.append({
+            "id": video_id,
+            "user_id": user_id,
+            "bucket": BUCKET,
+            "file_path": file_path,
+            "file_name": f"{video_id}.mp4",
+            "file_type": "video/mp4"
+        })
+        schedules.append({
+            "video_id": video_id,
+            "user_id": user_id,
+            "platform": rng.choices(list(platforms), list(platforms.values()))[0],
+            "video_type": "shortform",
+            "title": f"Load test video {i}",
+            # Marks the rows of this run so they can be found (and cleaned up) later
+            "description": f"loadgen:{tag}",
+            "tags": ["loadgen"],
+            "scheduled_at": (now + timedelta(seconds=offsets[i])).isoformat()
+        })
+    return {"blobs": blobs, "transcripts": transcripts, "schedules": schedules}
+
+def seed(client: SupabaseClient, data: Dict[str, Any]) -> float:
+    """Write the generated objects and rows; returns the seconds taken."""
+    started = time.monotonic()
+    for bucket in (BUCKET, os.getenv("MANIFEST_BUCKET", "documents")):
+        if client.storage.get_bucket(bucket) is None:
+            client.storage.create_bucket(bucket, public=bucket != BUCKET)
+    for path, content in data["blobs"].items():
+        client.storage.from_(BUCKET).upload(path, content, "video/mp4", upsert=True)
+    for table, rows in (("transcript_files", data["transcripts"]), ("video_schedule", data["schedules"])):
+        for start in range(0, len(rows), INSERT_BATCH):
+            client.table(table).insert(rows[start:start + INSERT_BATCH], returning=False).execute()
+    return time.monotonic() - started
+
+def fetch_rows(client: SupabaseClient, tag: str) -> List[Dict[str, Any]]:
+    """The schedule rows of this run, paged."""
+    rows = []
+    while True:
+        page = client.table("video_schedule") \
+            .select("id,user_id,platform,scheduled_at,published,publish_error") \
+            .eq("description", f"loadgen:{tag}") \
+            .order("id") \
+            .limit(PAGE_SIZE) \
+            .offset(len(rows)) \
+            .execute().data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+def replay(args, client: SupabaseClient, env: Dict[str, str], tag: str, workdir: Path) -> Dict[str, Any]:
+    """Run worker rounds until every row was attempted; returns per-row completion times."""
+    started = time.time()
+    done_at: Dict[str, float] = {}
+    rounds = 0
+    failed_runs = 0
+    query_seconds = []
+    rows: List[Dict[str, Any]] = []
+    while rounds < args.max_rounds:
+        round_started = time.monotonic()
+        logs = [open(workdir / f"round-{rounds}-worker-{n}.log", "wb") for n in range(args.workers)]
+        workers = [
+            subprocess.Popen([sys.executable, "-c", WORKER_CODE], cwd=PROJECT_ROOT, env=env, stdout=log, stderr=log)
+            for log in logs
+        ]
+        failed_runs += sum(1 for worker in workers if worker.wait() != 0)
+        for log in logs:
+            log.close()
+        rounds += 1
+
+        query_started = time.monotonic()
+        rows = fetch_rows(client, tag)
+        query_seconds.append(time.monotonic() - query_started)
+        now = time.time()
+        for row in rows:
+            if row["id"] not in done_at and (row["published"] or row["publish_error"]):
+                done_at[row["id"]] = now
+        print(f"round {rounds}: {len(done_at)}/{len(rows)} attempted", file=sys.stderr)
+        if len(done_at) == len(rows):
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - round_started)))
+    return {
+        "started": started,
+        "wall_seconds": time.time() - started,
+        "rounds": rounds,
+        "failed_worker_runs": failed_runs,
+        "status_query_seconds": percentile(sorted(query_seconds), 50),
+        "rows": rows,
+        "done_at": done_at
+    }
+
+def summarize(replayed: Dict[str, Any]) -> Dict[str, Any]:
+    """Outcome counts and lag percentiles, overall and per user."""
+    rows, done_at, started = replayed["rows"], replayed["done_at"], replayed["started"]
+    lags: List[float] = []
+    user_lags: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    published = 0
+    for row in rows:
+        if row["published"]:
+            published += 1
+        elif row["publish_error"]:
+            errors[row["publish_error"][:80]] += 1
+        if row["id"] not in done_at:
+            continue
+        due = max(datetime.fromisoformat(row["scheduled_at"]).timestamp(), started)
+        lag = max(0.0, done_at[row["id"]] - due)
+        lags.append(lag)
+        user_lags[row["user_id"]].append(lag)
+    lags.sort()
+
+    users = []
+    for user_id, values in user_lags.items():
+        values.sort()
+        users.append({
+            "user_id": user_id,
+            "videos": len(values),
+            "p50": percentile(values, 50),
+            "p99": percentile(values, 99),
+            "max": values[-1]
+        })
+    return {
+        "rows": len(rows),
+        "published": published,
+        "failed": sum(errors.values()),
+        "unattempted": len(rows) - len(done_at),
+        "errors": dict(errors.most_common(10)),
+        "rounds": replayed["rounds"],
+        "wall_seconds": replayed["wall_seconds"],
+        "videos_per_minute": published / replayed["wall_seconds"] * 60 if replayed["wall_seconds"] else 0.0,
+        "status_query_seconds_p50": replayed["status_query_seconds"],
+        "lag_seconds": {
+            "p50": percentile(lags, 50),
+            "p95": percentile(lags, 95),
+            "p99": percentile(lags, 99),
+            "max": lags[-1] if lags else 0.0
+        },
+        "busiest_users": sorted(users, key=lambda u: u["videos"], reverse=True)[:5],
+        "worst_served_users": sorted(users, key=lambda u: u["p99"], reverse=True)[:5]
+    }
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    lag = summary["lag_seconds"]
+    print(f"{summary['published']}/{summary['rows']} published, {summary['failed']} failed, "
+          f"{summary['unattempted']} not attempted in {summary['rounds']} rounds, "
+          f"{summary['wall_seconds']:.1f}s ({summary['videos_per_minute']:.1f} videos/min)")
+    print(f"lag s: p50 {lag['p50']:.1f}  p95 {lag['p95']:.1f}  p99 {lag['p99']:.1f}  max {lag['max']:.1f}")
+    for error, count in summary["errors"].items():
+        print(f"  {count:>6}  {error}")
+    for title, key in (("busiest users", "busiest_users"), ("worst-served users", "worst_served_users")):
+        print(f"{title}:")
+        print(f"  {'videos':>6} {'p50 s':>7} {'p99 s':>7} {'max s':>7}  user_id")
+        for user in summary[key]:
+            print(f"  {user['videos']:>6} {user['p50']:>7.1f} {user['p99']:>7.1f} {user['max']:>7.1f}  {user['user_id']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic video schedules and replay them through the publisher")
+    parser.add_argument("--target", choices=["fake", "env"], default="fake",
+                        help="Seed an in-process FakeSupabase or the project in SUPABASE_URL")
+    parser.add_argument("--videos", type=int, default=500, help="Schedule rows to seed")
+    parser.add_argument("--platforms", default="youtube=1,facebook=1,instagram=1,website=1",
+                        help="Platform weights, e.g. youtube=3,instagram=1")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="due", help="When rows come due")
+    parser.add_argument("--window", type=float, default=60, help="Seconds the rows are spread over")
+    parser.add_argument("--bursts", type=int, default=3, help="Burst instants (bursts distribution)")
+    parser.add_argument("--outage", type=float, default=3600, help="Outage length in seconds (backlog distribution)")
+    parser.add_argument("--backlog-fraction", type=float, default=0.8, help="Share of rows in the backlog")
+    parser.add_argument("--users", type=int, default=20, help="Synthetic users (fake target)")
+    parser.add_argument("--user-ids", help="Comma-separated existing auth user IDs to use instead (needed for --target env)")
+    parser.add_argument("--user-skew", type=float, default=1.0, help="Zipf exponent of videos per user; 0 is uniform")
+    parser.add_argument("--blob-size", default="256KB", help="Video size or range, e.g. 1MB or 256KB-4MB")
+    parser.add_argument("--distinct-blobs", type=int, default=8, help="Storage objects shared by the rows")
+    parser.add_argument("--missing-file-rate", type=float, default=0.0, help="Rows whose transcript has no storage path")
+    parser.add_argument("--missing-blob-rate", type=float, default=0.0, help="Rows whose storage object does not exist")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every fake response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, up to this many seconds")
+    parser.add_argument("--bandwidth", help="Per-connection transfer rate per second (e.g. 10MB)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake requests answered with an error")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of fake connections closed without a response")
+    parser.add_argument("--fault", action="append", default=[], metavar="SERVICE:FIELD=VALUE",
+                        help="Per-service fault override, e.g. graph:error_rate=0.1 (repeatable)")
+    parser.add_argument("--workers", type=int, default=2, help="Publisher processes per round")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between the starts of rounds")
+    parser.add_argument("--claim-batch", type=int, default=50, help="CLAIM_BATCH_SIZE of each worker")
+    parser.add_argument("--max-rounds", type=int, default=1000, help="Stop replaying after this many rounds")
+    parser.add_argument("--seed-only", action="store_true", help="Seed and exit without replaying")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for data and fault injection")
+    parser.add_argument("--output", help="Also write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    faults = parse_faults(args)
+    tag = uuid.UUID(int=rng.getrandbits(128), version=4).hex[:12]
+    if args.user_ids:
+        users = [u.strip() for u in args.user_ids.split(",") if u.strip()]
+    elif args.target == "env":
+        raise SystemExit("--target env needs --user-ids: transcript_files.user_id references auth.users")
+    else:
+        users = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(args.users)]
+
+    with ExitStack() as stack:
+        if args.target == "fake":
+            db = stack.enter_context(FakeSupabase(faults["supabase"], args.seed))
+            supabase_env = db.env()
+            # Seed without injected faults; they are meant for the publisher
+            db.faults = FaultProfile()
+        else:
+            url, key = get_supabase_config()
+            supabase_env = {"SUPABASE_URL": url, "SUPABASE_SERVICE_ROLE_KEY": key}
+        client = SupabaseClient(supabase_env["SUPABASE_URL"], supabase_env["SUPABASE_SERVICE_ROLE_KEY"])
+
+        data = generate(args, rng, users, tag, datetime.now(timezone.utc))
+        seconds = seed(client, data)
+        blob_bytes = sum(len(blob) for blob in data["blobs"].values())
+        print(f"Seeded {args.videos} rows for {len(users)} users ({len(data['blobs'])} objects, "
+              f"{blob_bytes / 1024 ** 2:.1f} MB) in {seconds:.1f}s, tag loadgen:{tag}")
+        if args.seed_only:
+            return
+        if args.target == "fake":
+            db.faults = faults["supabase"]
+
+        graph = stack.enter_context(FakeGraphAPI(faults["graph"], args.seed))
+        youtube = stack.enter_context(FakeYouTube(faults["youtube"], args.seed))
+        workdir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="load-generator-")))
+        env = worker_env([graph, youtube], workdir, args.claim_batch)
+        env.update(supabase_env)
+
+        summary = summarize(replay(args, client, env, tag, workdir))
+        summary["tag"] = f"loadgen:{tag}"
+        summary["faults"] = {name: asdict(faults[name]) for name in SERVICES}
+        print_summary(summary)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
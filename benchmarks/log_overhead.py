@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Logging overhead per publish.
+
+Replays the log calls the publisher makes for one video (processing,
+manifest saved, status write with the updated row, done) many times and
+reports the time and bytes spent on logging per publish, under:
+
+- ``legacy``: the old setup, ``logging.basicConfig`` text output, f-strings
+  formatted eagerly and the full status-write response (including the
+  manifest) logged at INFO
+- ``json`` / ``text``: ``lib.utils.log.configure_logging()`` with lazy
+  arguments, per-video ``log_context()`` and the response logged through
+  ``log_payload()`` (DEBUG, so skipped at INFO)
+- ``json-debug``: as ``json`` at DEBUG, so payloads are logged, truncated
+- ``legacy-quiet`` / ``json-quiet``: level WARNING, i.e. the cost of log
+  calls that emit nothing
+
+Output goes to a sink that only counts bytes, so the numbers are the
+formatting cost, not the terminal's.
+
+    python benchmarks/log_overhead.py --publishes 20000 --manifest-size 16KB
+"""
+
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.publish_throughput import parse_size
+from lib.utils.log import configure_logging, log_context, log_payload, new_correlation_id
+
+MODES = ("legacy", "legacy-quiet", "json", "json-quiet", "json-debug", "text")
+
+logger = logging.getLogger("run_publisher")
+manifest_logger = logging.getLogger("lib.utils.manifest")
+
+class CountingSink:
+    """Write-only stream that keeps a byte count and nothing else."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, text: str) -> int:
+        self.bytes += len(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+def make_row(manifest_size: int) -> Dict[str, Any]:
+    """A video_schedule row as returned by the status write."""
+    video_id = str(uuid.uuid4())
+    return {
+        "id": str(uuid.uuid4()),
+        "video_id": video_id,
+        "user_id": str(uuid.uuid4()),
+        "platform": "youtube",
+        "scheduled_at": "2025-04-10T09:00:00+00:00",
+        "published": True,
+        "publish_url": f"https://www.youtube.com/watch?v={video_id[:11]}",
+        "manifest": {"video_id": video_id, "notes": "x" * manifest_size}
+    }
+
+def publish_legacy(row: Dict[str, Any]) -> None:
+    video_id, platform = row["video_id"], row["platform"]
+    logger.info(f"Processing video {video_id} to {platform} at {row['scheduled_at']}")
+    manifest_logger.info(f"Saved manifest to manifests/{video_id}.json")
+    logger.info(f"Update response: {[row]}")
+    logger.info(f"Updated video status: {video_id} (success={True})")
+
+def publish_structured(row: Dict[str, Any]) -> None:
+    video_id, platform = row["video_id"], row["platform"]
+    with log_context(correlation_id=new_correlation_id(), video_id=video_id, schedule_id=row["id"], platform=platform):
+        logger.info("Processing video %s to %s at %s", video_id, platform, row["scheduled_at"])
+        manifest_logger.info("Saved manifest to manifests/%s.json", video_id)
+        log_payload(logger, "Update response", [row])
+        logger.info("Updated video status: %s (success=%s)", video_id, True)
+
+def setup(mode: str, sink: CountingSink) -> Callable[[Dict[str, Any]], None]:
+    """Configure the root logger for a mode and return its per-publish function."""
+    if mode.startswith("legacy"):
+        logging.basicConfig(level=logging.WARNING if mode == "legacy-quiet" else logging.INFO, stream=sink, force=True)
+        return publish_legacy
+    level = {"json-quiet": "WARNING", "json-debug": "DEBUG"}.get(mode, "INFO")
+    configure_logging(level=level, log_format="text" if mode == "text" else "json", stream=sink, force=True)
+    return publish_structured
+
+def measure(mode: str, publishes: int, manifest_size: int) -> Dict[str, Any]:
+    sink = CountingSink()
+    publish = setup(mode, sink)
+    rows = [make_row(manifest_size) for _ in range(min(publishes, 100))]
+    with log_context(run_id=new_correlation_id()):
+        started = time.perf_counter()
+        for i in range(publishes):
+            publish(rows[i % len(rows)])
+        elapsed = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "publishes": publishes,
+        "us_per_publish": elapsed / publishes * 1e6,
+        "bytes_per_publish": sink.bytes / publishes,
+        "max_publishes_per_second": publishes / elapsed if elapsed else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure logging overhead per publish")
+    parser.add_argument("--publishes", type=int, default=20000, help="Publishes to simulate per mode")
+    parser.add_argument("--manifest-size", default="8KB", help="Size of the manifest in the logged status row")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes ({', '.join(MODES)})")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    manifest_size = parse_size(args.manifest_size)
+    results = []
+    print(f"{args.publishes} publishes, {args.manifest_size} manifest")
+    print(f"{'mode':<13} {'us/publish':>10} {'bytes/publish':>13} {'publishes/s':>12}")
+    for mode in args.modes.split(","):
+        if mode not in MODES:
+            raise SystemExit(f"Unknown mode {mode!r}; expected one of {MODES}")
+        result = measure(mode, args.publishes, manifest_size)
+        results.append(result)
+        print(f"{mode:<13} {result['us_per_publish']:>10.1f} {result['bytes_per_publish']:>13.0f} "
+              f"{result['max_publishes_per_second']:>12.0f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of per-manifest rendering cost.
+
+Compares building the JSON and Markdown manifests separately from the video
+dict (the old two-generator path) with building one PublishManifest and
+rendering both formats from it, singly and through render_manifests.
+"""
+
+import sys
+import json
+import timeit
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from lib.utils.manifest_builder import PublishManifest, render_manifests
+
+VIDEO = {
+    'id': '7f9c2d1e-0000-4000-8000-000000000001',
+    'video_id': '3b1f8a52-0000-4000-8000-000000000002',
+    'platform': 'youtube',
+    'scheduled_at': '2025-04-10T09:00:00+00:00',
+    'storage_path': 'videos/user/3b1f8a52.mp4'
+}
+PUBLISH_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+EMBED_CODE = '<iframe src="https://www.youtube.com/embed/dQw4w9WgXcQ"></iframe>'
+
+def two_pass():
+    """Both manifests built independently, as before the unified model."""
+    manifest = {
+        "video_id": VIDEO.get("video_id"),
+        "platform": VIDEO["platform"],
+        "status": "success",
+        "publish_url": PUBLISH_URL,
+        "published_at": datetime.now(timezone.utc).isoformat(),
+        "storage_path": VIDEO.get("storage_path", ""),
+        "embed_code": EMBED_CODE
+    }
+    json_content = json.dumps(manifest, indent=2)
+    video = {**VIDEO, 'transcript_id': VIDEO['video_id']}
+    markdown = f"""# Video Publishing Manifest
+
+## Video Details
+- Transcript ID: {video['transcript_id']}
+- Platform: {video['platform']}
+- Scheduled At: {video['scheduled_at']}
+- Published At: {datetime.now(timezone.utc).isoformat()}
+
+## Publishing Details
+- Status: Success
+- Public URL: {PUBLISH_URL}
+
+## Storage Details
+- Storage Path: {video.get('storage_path', 'N/A')}
+"""
+    markdown += f"\n## Embed Code\n```html\n{EMBED_CODE}\n```"
+    return json_content, markdown
+
+def single_pass():
+    return PublishManifest.from_video(VIDEO, PUBLISH_URL, EMBED_CODE).render()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark manifest rendering")
+    parser.add_argument("--number", type=int, default=20000, help="Manifests per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per variant (best is reported)")
+    args = parser.parse_args()
+
+    manifests = [PublishManifest.from_video(VIDEO, PUBLISH_URL, EMBED_CODE) for _ in range(args.number)]
+    variants = {
+        "two-pass": lambda: [two_pass() for _ in range(args.number)],
+        "single-pass": lambda: [single_pass() for _ in range(args.number)],
+        "render_manifests": lambda: render_manifests(manifests)
+    }
+
+    for name, run in variants.items():
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{name:<18} {best / args.number * 1e6:8.2f} us/manifest")
+
+if __name__ == "__main__":
+    main()
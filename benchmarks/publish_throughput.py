@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+End-to-end publish throughput benchmark against in-process fake services.
+
+For each concurrency setting, seeds N due videos into a fresh FakeSupabase,
+starts FakeGraphAPI and FakeYouTube (see benchmarks/fake_services.py) and
+runs that many publisher workers: separate ``run_publisher`` processes that
+claim from the same queue and share one state directory, as cron workers on
+one node would. Reports videos/min, bytes/s moved (storage downloads plus
+platform uploads) and the tail of per-video latency, measured from the
+row's claim to its status write.
+
+Faults apply to every service unless overridden per service with
+``--fault SERVICE:FIELD=VALUE`` (services: supabase, graph, youtube; fields
+of FaultProfile).
+
+    python benchmarks/publish_throughput.py --videos 60 --concurrency 1,2,4,8
+    python benchmarks/publish_throughput.py --blob-size 20MB --bandwidth 10MB \\
+        --fault youtube:latency=0.2 --fault graph:error_rate=0.05
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import subprocess
+from dataclasses import asdict, fields, replace
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fake_services import FaultProfile, FakeSupabase, FakeGraphAPI, FakeYouTube
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+SERVICES = ("supabase", "graph", "youtube")
+
+WORKER_CODE = "import sys, run_publisher; sys.exit(0 if run_publisher.run_video_publisher() else 1)"
+
+SIZE_UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "B": 1}
+
+def parse_size(text: str) -> int:
+    """Parse '512KB', '20MB' (binary units) or a plain byte count."""
+    text = text.strip().upper()
+    for suffix, factor in SIZE_UNITS.items():
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(float(text))
+
+def parse_faults(args) -> Dict[str, FaultProfile]:
+    """Build the fault profile of each service from the CLI options."""
+    base = FaultProfile(
+        latency=args.latency,
+        jitter=args.jitter,
+        bandwidth=parse_size(args.bandwidth) if args.bandwidth else None,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate
+    )
+    types = {f.name: f.type for f in fields(FaultProfile)}
+    faults = {service: base for service in SERVICES}
+    for spec in args.fault:
+        service, _, assignment = spec.partition(":")
+        name, _, value = assignment.partition("=")
+        if service not in SERVICES or name not in types:
+            raise SystemExit(f"Invalid --fault {spec!r}: expected SERVICE:FIELD=VALUE with SERVICE in {SERVICES}")
+        if name == "bandwidth":
+            parsed: Any = parse_size(value)
+        elif name == "error_status":
+            parsed = int(value)
+        else:
+            parsed = float(value)
+        faults[service] = replace(faults[service], **{name: parsed})
+    return faults
+
+def seed_videos(db: FakeSupabase, count: int, platforms: List[str], blob_size: int, rng: random.Random) -> None:
+    """Seed due video_schedule rows with their transcript_files rows and storage objects."""
+    db.add_bucket(os.getenv("MANIFEST_BUCKET", "documents"), public=True)
+    # One shared blob; the fake stores objects by reference
+    blob = rng.randbytes(blob_size)
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        video_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        object_path = f"{user_id}/{video_id}.mp4"
+        db.put_object("videos", object_path, blob)
+        db.insert("transcript_files", [{
+            "id": video_id,
+            "user_id": user_id,
+            "bucket": "videos",
+            "file_path": object_path,
+            "file_name": f"{video_id}.mp4"
+        }])
+        db.insert("video_schedule", [{
+            "video_id": video_id,
+            "user_id": user_id,
+            "platform": platforms[i % len(platforms)],
+            "video_type": "shortform",
+            "title": f"Benchmark video {i}",
+            "description": "Published by benchmarks/publish_throughput.py",
+            "tags": ["benchmark"],
+            "scheduled_at": (now - timedelta(seconds=count - i)).isoformat()
+        }])
+
+def worker_env(services: List[Any], workdir: Path, claim_batch: int) -> Dict[str, str]:
+    """Environment for a publisher worker pointed at the fake services."""
+    env = {
+        k: v for k, v in os.environ.items()
+        if not k.startswith(("SUPABASE_", "META_", "YOUTUBE_", "FACEBOOK_", "INSTAGRAM_", "METRICS_"))
+    }
+    for service in services:
+        env.update(service.env())
+    env.update({
+        "PUBLISHER_STATE_DIR": str(workdir / "state"),
+        "WEBSITE_OUTPUT_DIR": str(workdir / "site"),
+        "MANIFEST_LOG_DIR": str(workdir / "manifests"),
+        "CLAIM_BATCH_SIZE": str(claim_batch)
+    })
+    # Measure the publisher, not the platform rate limits
+    for platform in ("YOUTUBE", "INSTAGRAM", "FACEBOOK"):
+        env[f"RATE_LIMIT_{platform}_PER_MINUTE"] = "1000000"
+        env[f"RATE_LIMIT_{platform}_BURST"] = "1000000"
+        env[f"QUOTA_{platform}_DAILY"] = "0"
+    return env
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+def run_level(args, concurrency: int, faults: Dict[str, FaultProfile]) -> Dict[str, Any]:
+    """Publish args.videos videos with the given number of workers."""
+    rng = random.Random(args.seed)
+    platforms = args.platforms.split(",")
+    with FakeSupabase(faults["supabase"], args.seed) as db, \
+            FakeGraphAPI(faults["graph"], args.seed) as graph, \
+            FakeYouTube(faults["youtube"], args.seed) as youtube, \
+            tempfile.TemporaryDirectory(prefix="publish-throughput-") as tmp:
+        workdir = Path(tmp)
+        seed_videos(db, args.videos, platforms, parse_size(args.blob_size), rng)
+        env = worker_env([db, graph, youtube], workdir, math.ceil(args.videos / concurrency))
+
+        started = time.monotonic()
+        logs = [open(workdir / f"worker-{n}.log", "wb") for n in range(concurrency)]
+        workers = [
+            subprocess.Popen([sys.executable, "-c", WORKER_CODE], cwd=PROJECT_ROOT, env=env, stdout=log, stderr=log)
+            for log in logs
+        ]
+        exit_codes = [worker.wait() for worker in workers]
+        wall = time.monotonic() - started
+        for log in logs:
+            log.close()
+        for n, code in enumerate(exit_codes):
+            if code != 0:
+                tail = (workdir / f"worker-{n}.log").read_bytes()[-2000:].decode(errors="replace")
+                print(f"worker {n} exited with {code}:\n{tail}", file=sys.stderr)
+
+        rows = db.rows("video_schedule")
+        published = sum(1 for row in rows if row["published"])
+        failed = sum(1 for row in rows if not row["published"] and row.get("publish_error"))
+        latencies = sorted(
+            db.status_times[row_id] - db.claim_times[row_id]
+            for row_id in db.status_times
+            if row_id in db.claim_times
+        )
+        bytes_moved = (
+            db.stats["object_bytes_sent"]
+            + graph.stats["bytes_received"]
+            + youtube.stats["bytes_received"]
+        )
+        return {
+            "concurrency": concurrency,
+            "videos": args.videos,
+            "published": published,
+            "failed": failed,
+            "wall_seconds": wall,
+            "videos_per_minute": published / wall * 60 if wall else 0.0,
+            "bytes_per_second": bytes_moved / wall if wall else 0.0,
+            "latency_seconds": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1] if latencies else 0.0
+            },
+            "faults_injected": {
+                name: {"errors": service.stats["injected_errors"], "dropped": service.stats["dropped"]}
+                for name, service in zip(SERVICES, (db, graph, youtube))
+            }
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure publish throughput against fake Supabase, Graph API and YouTube servers")
+    parser.add_argument("--videos", type=int, default=60, help="Due videos to publish per run")
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated worker counts to compare")
+    parser.add_argument("--platforms", default="youtube,facebook,instagram", help="Platforms assigned round-robin")
+    parser.add_argument("--blob-size", default="1MB", help="Size of each video file (e.g. 512KB, 20MB)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, up to this many seconds")
+    parser.add_argument("--bandwidth", help="Per-connection transfer rate per second (e.g. 10MB); unlimited if unset")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of connections closed without a response")
+    parser.add_argument("--fault", action="append", default=[], metavar="SERVICE:FIELD=VALUE",
+                        help="Per-service fault override, e.g. youtube:error_rate=0.1 (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for data and fault injection")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    faults = parse_faults(args)
+    results = []
+    print(f"{args.videos} videos of {args.blob_size} to {args.platforms}")
+    print(f"{'workers':>7} {'published':>9} {'failed':>6} {'wall s':>7} {'videos/min':>10} "
+          f"{'MB/s':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'max s':>7}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        result = run_level(args, concurrency, faults)
+        results.append(result)
+        latency = result["latency_seconds"]
+        print(f"{concurrency:>7} {result['published']:>9} {result['failed']:>6} {result['wall_seconds']:>7.2f} "
+              f"{result['videos_per_minute']:>10.1f} {result['bytes_per_second'] / 1024 ** 2:>7.2f} "
+              f"{latency['p50']:>7.3f} {latency['p95']:>7.3f} {latency['p99']:>7.3f} {latency['max']:>7.3f}")
+
+    injected = {
+        name: [r["faults_injected"][name] for r in results]
+        for name in SERVICES
+    }
+    if any(f["errors"] or f["dropped"] for counts in injected.values() for f in counts):
+        for name, counts in injected.items():
+            print(f"{name}: injected errors {[f['errors'] for f in counts]}, dropped {[f['dropped'] for f in counts]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"faults": {k: asdict(v) for k, v in faults.items()}, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+-- EXPLAIN benchmark: video_schedule RLS with a per-row transcript_files
+-- lookup versus a denormalized, indexed user_id column.
+--
+-- Runs against any local Postgres (no Supabase auth schema needed) inside a
+-- transaction that is rolled back, so nothing is left behind:
+--
+--     psql postgresql://postgres@localhost/postgres -f benchmarks/rls_user_id_explain.sql
+--     psql ... -v users=5000 -v transcripts_per_user=20 -v schedules_per_transcript=4 -f ...
+--
+-- Needs a role that can create roles (the seeded data is read as a non-owner
+-- role so RLS applies).
+
+\set ON_ERROR_STOP on
+\if :{?users}
+\else
+    \set users 2000
+\endif
+\if :{?transcripts_per_user}
+\else
+    \set transcripts_per_user 10
+\endif
+\if :{?schedules_per_transcript}
+\else
+    \set schedules_per_transcript 4
+\endif
+
+begin;
+
+create schema rls_bench;
+
+-- Same lookup auth.uid() does on Supabase
+create function rls_bench.uid() returns uuid
+language sql stable
+as $$ select nullif(current_setting('request.jwt.claim.sub', true), '')::uuid $$;
+
+create table rls_bench.transcript_files (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid not null
+);
+
+create table rls_bench.video_schedule (
+    id uuid primary key default gen_random_uuid(),
+    video_id uuid references rls_bench.transcript_files(id),
+    user_id uuid,
+    platform text,
+    scheduled_at timestamp with time zone,
+    published boolean default false
+);
+
+create index on rls_bench.video_schedule(video_id);
+
+-- Seed
+insert into rls_bench.transcript_files (user_id)
+select u.id
+from (select gen_random_uuid() as id from generate_series(1, :users)) u,
+     generate_series(1, :transcripts_per_user);
+
+insert into rls_bench.video_schedule (video_id, user_id, platform, scheduled_at, published)
+select
+    t.id,
+    t.user_id,
+    (array['youtube', 'instagram', 'facebook', 'website'])[1 + (random() * 3)::int],
+    now() + (random() * interval '30 days'),
+    random() < 0.5
+from rls_bench.transcript_files t, generate_series(1, :schedules_per_transcript);
+
+analyze rls_bench.transcript_files;
+analyze rls_bench.video_schedule;
+
+select count(*) as schedule_rows from rls_bench.video_schedule;
+
+create role rls_bench_reader;
+grant usage on schema rls_bench to rls_bench_reader;
+grant select on all tables in schema rls_bench to rls_bench_reader;
+grant execute on function rls_bench.uid() to rls_bench_reader;
+
+select user_id as bench_user from rls_bench.transcript_files limit 1 \gset
+select set_config('request.jwt.claim.sub', :'bench_user', true);
+
+alter table rls_bench.video_schedule enable row level security;
+
+-- Before: policy looks up the owning transcript for every row
+\echo
+\echo '=== Correlated transcript_files lookup ==='
+create policy bench_owner on rls_bench.video_schedule
+    for select
+    using (
+        rls_bench.uid() = (
+            select user_id
+            from rls_bench.transcript_files
+            where transcript_files.id = video_schedule.video_id
+        )
+    );
+
+set local role rls_bench_reader;
+explain (analyze, buffers)
+select id, platform, scheduled_at
+from rls_bench.video_schedule
+where not published
+order by scheduled_at
+limit 50;
+reset role;
+
+-- After: local column, indexed, uid() evaluated once per statement
+\echo
+\echo '=== Denormalized user_id ==='
+drop policy bench_owner on rls_bench.video_schedule;
+create index on rls_bench.video_schedule(user_id, scheduled_at);
+analyze rls_bench.video_schedule;
+create policy bench_owner on rls_bench.video_schedule
+    for select
+    using (user_id = (select rls_bench.uid()));
+
+set local role rls_bench_reader;
+explain (analyze, buffers)
+select id, platform, scheduled_at
+from rls_bench.video_schedule
+where not published
+order by scheduled_at
+limit 50;
+reset role;
+
+rollback;
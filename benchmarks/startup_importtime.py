@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the publisher entry points.
+
+Imports a module in fresh interpreters with ``python -X importtime`` and
+reports the cumulative import time, the slowest imports, and which heavy
+third-party packages were loaded. An idle cron run pays this cost on every
+invocation, so nothing here should pull in a platform SDK or build a client.
+
+    python benchmarks/startup_importtime.py
+    python benchmarks/startup_importtime.py --module reconcile_youtube --top 20
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Packages that should only load when a row for their platform is due
+HEAVY_PACKAGES = ["httpx", "dotenv", "supabase", "postgrest", "googleapiclient", "google.auth", "requests"]
+
+def import_once(module: str) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        Tuple[Dict[str, Tuple[int, int]], List[str]]: module -> (self us,
+            cumulative us) from -X importtime, and the heavy packages loaded
+    """
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(p for p in {HEAVY_PACKAGES!r} if p in sys.modules))"
+    )
+    # No credentials: importing must not need them
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("SUPABASE_", "META_", "YOUTUBE_"))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    loaded = [p for p in result.stdout.strip().split(",") if p]
+    return timings, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import-time cost of a publisher entry point")
+    parser.add_argument("--module", default="run_publisher", help="Module to import (default: run_publisher)")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    totals = []
+    timings: Dict[str, Tuple[int, int]] = {}
+    loaded: List[str] = []
+    for _ in range(args.runs):
+        timings, loaded = import_once(args.module)
+        totals.append(timings[args.module][1] / 1000)
+
+    print(f"import {args.module}: median {statistics.median(totals):.1f} ms, "
+          f"min {min(totals):.1f} ms over {args.runs} runs")
+    print(f"heavy packages loaded: {', '.join(loaded) or 'none'}")
+    print("\nslowest imports (last run, self time):")
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {self_us / 1000:7.2f} ms self {cumulative_us / 1000:8.2f} ms cumulative  {name}")
+
+if __name__ == "__main__":
+    main()
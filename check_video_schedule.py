@@ -5,41 +5,72 @@ Script to check the video_schedule table directly.
 
 import os
 import sys
+import argparse
 import logging
 from pathlib import Path
 from datetime import datetime, timezone
 
 sys.path.append(str(Path(__file__).parent))
-from lib.supabase.supabase_client import supabase
+from lib.supabase.client import supabase
+from lib.utils.log import configure_logging, log_payload
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def check_video_schedule():
-    """Check the video_schedule table directly."""
+SCHEDULE_COLUMNS = "id,video_id,user_id,platform,scheduled_at,published,publish_url,publish_error"
+
+def check_video_schedule(show: int = 10):
+    """
+    Check the video_schedule table directly.
+
+    Logs row counts and the first few due rows; the full rows are only
+    logged (truncated) at DEBUG.
+
+    Args:
+        show: Number of due rows to list
+    """
     try:
-        # Get all videos from the table
-        response = supabase.table("video_schedule").select("*").execute()
+        # Count all videos, including published rows moved to the archive
+        response = supabase.table("video_schedule_history") \
+            .select("id,published") \
+            .execute()
         
-        logger.info(f"Total videos in table: {len(response.data)}")
-        logger.info(f"All videos: {response.data}")
+        published = sum(1 for row in response.data if row["published"])
+        logger.info("Total videos (live and archived): %s, published: %s", len(response.data), published)
         
         # Get unpublished videos
         now = datetime.now(timezone.utc).isoformat()
         response = supabase.table("video_schedule") \
-            .select("*") \
+            .select(SCHEDULE_COLUMNS) \
             .eq("published", False) \
             .lte("scheduled_at", now) \
+            .order("scheduled_at") \
             .execute()
             
-        logger.info(f"Unpublished videos due before {now}: {len(response.data)}")
-        logger.info(f"Due videos: {response.data}")
+        logger.info("Unpublished videos due before %s: %s", now, len(response.data))
+        for row in response.data[:show]:
+            logger.info(
+                "Due: %s %s to %s at %s%s",
+                row["id"], row["video_id"], row["platform"], row["scheduled_at"],
+                f" (last error: {row['publish_error']})" if row.get("publish_error") else ""
+            )
+        if len(response.data) > show:
+            logger.info("... and %s more", len(response.data) - show)
+        log_payload(logger, "Due videos", response.data)
         
         return True
     except Exception as e:
-        logger.error(f"Error checking video_schedule: {str(e)}")
+        logger.error("Error checking video_schedule: %s", e)
         return False
 
 if __name__ == "__main__":
-    check_video_schedule()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--show",
+        type=int,
+        default=10,
+        help="Number of due rows to list (default: 10)"
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    check_video_schedule(args.show)
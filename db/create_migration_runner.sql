@@ -0,0 +1,68 @@
+-- Migration ledger: one row per applied schema file, with the checksum of
+-- the file as it was applied
+create table if not exists schema_migrations (
+    version text primary key,
+    checksum text not null,
+    applied_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+alter table schema_migrations enable row level security;
+grant all on schema_migrations to service_role;
+
+-- Apply a batch of migrations in one transaction.
+-- migrations: [{"version": ..., "checksum": ..., "sql": ...}, ...] in order.
+-- Entries already in the ledger are skipped; an applied entry whose checksum
+-- changed aborts the whole batch. With record_only the ledger is filled
+-- without running the SQL (baselining an existing database).
+-- Returns one row per version that was applied.
+create or replace function apply_migrations(migrations jsonb, record_only boolean default false)
+returns table (applied_version text)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    migration jsonb;
+    applied_checksum text;
+    applied_count integer := 0;
+begin
+    -- Serialize concurrent runners; released at commit
+    perform pg_advisory_xact_lock(hashtext('apply_migrations'));
+
+    for migration in select elem from jsonb_array_elements(migrations) as elem loop
+        select checksum into applied_checksum
+        from schema_migrations
+        where version = migration->>'version';
+
+        if found then
+            if applied_checksum <> migration->>'checksum' then
+                raise exception 'Migration % has changed since it was applied (checksum %, now %)',
+                    migration->>'version', applied_checksum, migration->>'checksum';
+            end if;
+            continue;
+        end if;
+
+        if not record_only then
+            execute migration->>'sql';
+        end if;
+
+        insert into schema_migrations (version, checksum)
+        values (migration->>'version', migration->>'checksum');
+        applied_count := applied_count + 1;
+        applied_version := migration->>'version';
+        return next;
+    end loop;
+
+    if applied_count > 0 then
+        -- Let PostgREST pick up new tables and functions
+        notify pgrst, 'reload schema';
+    end if;
+
+    return;
+end;
+$$;
+
+revoke execute on function apply_migrations(jsonb, boolean) from public, anon, authenticated;
+grant execute on function apply_migrations(jsonb, boolean) to service_role;
+
+notify pgrst, 'reload schema';
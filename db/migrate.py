@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tracked migration runner for the Video Publishing Agent.
+
+Applied schema files are recorded in the ``schema_migrations`` ledger with a
+checksum, so each run only sends files that have not been applied yet. All
+pending files go to the database in a single ``apply_migrations`` RPC call
+and are applied in one transaction: either every pending migration lands or
+none does.
+
+Usage:
+    python db/migrate.py              # apply pending migrations
+    python db/migrate.py --dry-run    # show the plan without applying
+    python db/migrate.py --baseline   # mark every file applied without running it
+"""
+
+import sys
+import time
+import hashlib
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from lib.supabase.client import supabase
+
+DB_DIR = Path(__file__).parent
+
+# PostgREST error codes meaning the ledger table or RPC is not there (yet)
+MISSING_OBJECT_CODES = {"42P01", "42883", "PGRST202", "PGRST205"}
+
+@dataclass
+class Migration:
+    """One schema file."""
+    version: str
+    path: Path
+    sql: str
+    checksum: str
+
+def load_migration(path: Path) -> Migration:
+    """
+    Read a schema file and compute its checksum.
+
+    Args:
+        path: SQL file
+
+    Returns:
+        Migration: The file's version (name without extension), SQL and checksum
+    """
+    sql = path.read_text(encoding="utf-8").replace("\r\n", "\n")
+    return Migration(
+        version=path.stem,
+        path=path,
+        sql=sql,
+        checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest()
+    )
+
+def load_migrations(db_dir: Path = DB_DIR) -> List[Migration]:
+    """Get every schema file in apply order: create_tables.sql, then migrations/ by name."""
+    paths = [db_dir / "create_tables.sql"] + sorted((db_dir / "migrations").glob("*.sql"))
+    return [load_migration(path) for path in paths if path.exists()]
+
+def _is_missing_object(error: Exception) -> bool:
+    return getattr(error, "code", None) in MISSING_OBJECT_CODES
+
+def fetch_applied() -> Optional[Dict[str, str]]:
+    """
+    Get the ledger contents.
+
+    Returns:
+        Optional[Dict[str, str]]: Applied version -> checksum, or None if the
+            ledger has not been created yet
+    """
+    try:
+        response = supabase.table("schema_migrations").select("version,checksum").execute()
+    except Exception as e:
+        if _is_missing_object(e):
+            return None
+        raise
+    return {row["version"]: row["checksum"] for row in response.data}
+
+def bootstrap() -> None:
+    """Create the ledger and apply_migrations RPC through exec_sql."""
+    sql = (DB_DIR / "create_migration_runner.sql").read_text(encoding="utf-8")
+    supabase.rpc("exec_sql", {"query": sql}).execute()
+
+def plan(migrations: List[Migration], applied: Dict[str, str]) -> List[Tuple[str, Migration]]:
+    """
+    Compare schema files against the ledger.
+
+    Args:
+        migrations: Schema files in apply order
+        applied: Ledger contents from fetch_applied()
+
+    Returns:
+        List[Tuple[str, Migration]]: ("applied" | "pending" | "changed", migration) per file
+    """
+    steps = []
+    for migration in migrations:
+        if migration.version not in applied:
+            steps.append(("pending", migration))
+        elif applied[migration.version] != migration.checksum:
+            steps.append(("changed", migration))
+        else:
+            steps.append(("applied", migration))
+    return steps
+
+def apply(pending: List[Migration], record_only: bool = False, wait: float = 10.0) -> List[str]:
+    """
+    Apply migrations in one transactional RPC call.
+
+    Args:
+        pending: Migrations to apply, in order
+        record_only: Only record them in the ledger (baseline)
+        wait: Seconds to keep retrying while PostgREST has not yet picked up
+            a freshly bootstrapped apply_migrations function
+
+    Returns:
+        List[str]: Versions that were applied
+    """
+    payload = {
+        "migrations": [
+            {"version": m.version, "checksum": m.checksum, "sql": m.sql}
+            for m in pending
+        ],
+        "record_only": record_only
+    }
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            response = supabase.rpc("apply_migrations", payload).execute()
+            return [row["applied_version"] for row in response.data]
+        except Exception as e:
+            if not _is_missing_object(e) or time.monotonic() > deadline:
+                raise
+            time.sleep(1)
+
+def migrate(dry_run: bool = False, baseline: bool = False) -> List[str]:
+    """
+    Apply every pending schema file.
+
+    Args:
+        dry_run: Print the plan without changing the database
+        baseline: Record pending files as applied without running them, for
+            databases set up before the ledger existed
+
+    Returns:
+        List[str]: Versions applied (or that would be applied on a dry run)
+    """
+    migrations = load_migrations()
+    applied = fetch_applied()
+    if applied is None:
+        print("Migration ledger not found" + ("" if dry_run else ", creating it..."))
+        if not dry_run:
+            bootstrap()
+        applied = {}
+
+    steps = plan(migrations, applied)
+    for status, migration in steps:
+        print(f"{status:<8} {migration.version}")
+
+    changed = [m.version for status, m in steps if status == "changed"]
+    if changed:
+        raise Exception(f"Applied migrations were modified: {', '.join(changed)}")
+
+    pending = [m for status, m in steps if status == "pending"]
+    if not pending:
+        print("Database is up to date")
+        return []
+
+    action = "Would record" if baseline else "Would apply"
+    if dry_run:
+        print(f"{action} {len(pending)} migrations")
+        return [m.version for m in pending]
+
+    versions = apply(pending, record_only=baseline)
+    print(f"{'Recorded' if baseline else 'Applied'} {len(versions)} migrations in one transaction")
+    return versions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending database migrations")
+    parser.add_argument("--dry-run", action="store_true", help="Show the plan without applying it")
+    parser.add_argument(
+        "--baseline",
+        action="store_true",
+        help="Record pending migrations as applied without running them"
+    )
+    args = parser.parse_args()
+
+    try:
+        migrate(dry_run=args.dry_run, baseline=args.baseline)
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        sys.exit(1)
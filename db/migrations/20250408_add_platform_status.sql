@@ -0,0 +1,52 @@
+-- Track what the target platform reports about a published video
+alter table video_schedule
+    add column if not exists platform_video_id text,
+    add column if not exists platform_status text,
+    add column if not exists platform_status_detail text,
+    add column if not exists platform_checked_at timestamp with time zone;
+
+comment on column video_schedule.platform_video_id is 'ID of the video on the target platform (e.g. YouTube video ID)';
+comment on column video_schedule.platform_status is 'Last status reported by the platform: processing, scheduled, live, private, failed, rejected, deleted or missing';
+comment on column video_schedule.platform_status_detail is 'Failure or rejection reason reported by the platform';
+comment on column video_schedule.platform_checked_at is 'When platform_status was last reconciled against the platform';
+
+-- Reconciliation only looks at published rows that have not reached a final state
+create index if not exists idx_video_schedule_reconcile
+    on video_schedule(platform, platform_checked_at)
+    where published and (platform_status is null or platform_status in ('processing', 'scheduled'));
+
+-- Apply many per-row updates in one round trip.
+-- updates: [{"id": "<schedule id>", "<column>": <value>, ...}, ...]
+-- Only keys present in an element are written; other columns keep their value.
+create or replace function bulk_update_video_schedule(updates jsonb)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    updated_count integer;
+begin
+    update video_schedule v
+    set
+        platform_video_id = case when u.doc ? 'platform_video_id'
+            then u.doc->>'platform_video_id' else v.platform_video_id end,
+        platform_status = case when u.doc ? 'platform_status'
+            then u.doc->>'platform_status' else v.platform_status end,
+        platform_status_detail = case when u.doc ? 'platform_status_detail'
+            then u.doc->>'platform_status_detail' else v.platform_status_detail end,
+        platform_checked_at = case when u.doc ? 'platform_checked_at'
+            then (u.doc->>'platform_checked_at')::timestamptz else v.platform_checked_at end
+    from (
+        select (elem->>'id')::uuid as id, elem as doc
+        from jsonb_array_elements(updates) as elem
+    ) u
+    where v.id = u.id;
+
+    get diagnostics updated_count = row_count;
+    return updated_count;
+end;
+$$;
+
+revoke execute on function bulk_update_video_schedule(jsonb) from public, anon, authenticated;
+grant execute on function bulk_update_video_schedule(jsonb) to service_role;
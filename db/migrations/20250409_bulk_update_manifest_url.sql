@@ -0,0 +1,38 @@
+-- Let bulk_update_video_schedule patch manifest locations written by the
+-- background manifest uploader
+create or replace function bulk_update_video_schedule(updates jsonb)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    updated_count integer;
+begin
+    update video_schedule v
+    set
+        platform_video_id = case when u.doc ? 'platform_video_id'
+            then u.doc->>'platform_video_id' else v.platform_video_id end,
+        platform_status = case when u.doc ? 'platform_status'
+            then u.doc->>'platform_status' else v.platform_status end,
+        platform_status_detail = case when u.doc ? 'platform_status_detail'
+            then u.doc->>'platform_status_detail' else v.platform_status_detail end,
+        platform_checked_at = case when u.doc ? 'platform_checked_at'
+            then (u.doc->>'platform_checked_at')::timestamptz else v.platform_checked_at end,
+        manifest_path = case when u.doc ? 'manifest_path'
+            then u.doc->>'manifest_path' else v.manifest_path end,
+        manifest_url = case when u.doc ? 'manifest_url'
+            then u.doc->>'manifest_url' else v.manifest_url end
+    from (
+        select (elem->>'id')::uuid as id, elem as doc
+        from jsonb_array_elements(updates) as elem
+    ) u
+    where v.id = u.id;
+
+    get diagnostics updated_count = row_count;
+    return updated_count;
+end;
+$$;
+
+revoke execute on function bulk_update_video_schedule(jsonb) from public, anon, authenticated;
+grant execute on function bulk_update_video_schedule(jsonb) to service_role;
@@ -0,0 +1,76 @@
+-- Keep full manifest bodies out of the hot video_schedule row.
+-- video_schedule keeps a reference and content hash; the body lives here.
+create table if not exists publish_manifests (
+    id uuid primary key default gen_random_uuid(),
+    schedule_id uuid not null,
+    format text not null default 'json' check (format in ('json', 'markdown')),
+    content text not null,
+    content_hash text not null,
+    created_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+-- No foreign key on schedule_id: manifests outlive schedule rows that are
+-- archived out of video_schedule
+create index if not exists idx_publish_manifests_schedule_id
+    on publish_manifests(schedule_id);
+
+comment on table publish_manifests is 'Full publishing manifest bodies, referenced from video_schedule.manifest_ref';
+comment on column publish_manifests.content_hash is 'SHA-256 (hex) of content';
+
+alter table video_schedule
+    add column if not exists manifest_ref uuid references publish_manifests(id) on delete set null,
+    add column if not exists manifest_hash text;
+
+comment on column video_schedule.manifest_ref is 'Latest manifest for this row in publish_manifests';
+comment on column video_schedule.manifest_hash is 'SHA-256 (hex) of the referenced manifest content';
+
+-- Move existing manifest bodies out of video_schedule
+do $$
+begin
+    if exists (
+        select 1
+        from information_schema.columns
+        where table_name = 'video_schedule'
+        and column_name = 'publish_manifest'
+    ) then
+        insert into publish_manifests (schedule_id, format, content, content_hash)
+        select id, 'json', publish_manifest, encode(sha256(convert_to(publish_manifest, 'UTF8')), 'hex')
+        from video_schedule
+        where publish_manifest is not null;
+
+        update video_schedule v
+        set manifest_ref = m.id,
+            manifest_hash = m.content_hash
+        from publish_manifests m
+        where m.schedule_id = v.id;
+
+        alter table video_schedule drop column publish_manifest;
+    end if;
+end $$;
+
+-- RLS: service role manages manifests, users can read manifests of their own schedules
+alter table publish_manifests enable row level security;
+
+drop policy if exists "Service role can manage publish manifests" on publish_manifests;
+create policy "Service role can manage publish manifests"
+    on publish_manifests
+    for all
+    to service_role
+    using (true)
+    with check (true);
+
+drop policy if exists "Users can view their own publish manifests" on publish_manifests;
+create policy "Users can view their own publish manifests"
+    on publish_manifests
+    for select
+    to authenticated
+    using (
+        exists (
+            select 1
+            from video_schedule
+            where video_schedule.id = publish_manifests.schedule_id
+            and video_schedule.user_id = auth.uid()
+        )
+    );
+
+grant all on publish_manifests to service_role;
@@ -0,0 +1,123 @@
+-- Store the owning user on video_schedule so RLS compares a local column
+-- instead of running a transcript_files lookup for every row read.
+
+alter table video_schedule
+    add column if not exists user_id uuid references auth.users(id);
+
+comment on column video_schedule.user_id is 'Owner of the schedule, copied from transcript_files.user_id by trigger';
+
+-- Backfill from the transcript that owns each schedule
+update video_schedule v
+set user_id = t.user_id
+from transcript_files t
+where t.id = v.video_id
+and t.user_id is not null
+and v.user_id is distinct from t.user_id;
+
+-- Keep user_id in step with the transcript on insert and when video_id changes.
+-- Rows whose transcript has no owner keep the user_id they were written with.
+create or replace function video_schedule_set_user_id()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    owner_id uuid;
+begin
+    if new.video_id is not null then
+        select user_id into owner_id from transcript_files where id = new.video_id;
+        if owner_id is not null then
+            new.user_id := owner_id;
+        end if;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists video_schedule_set_user_id on video_schedule;
+create trigger video_schedule_set_user_id
+    before insert or update of video_id, user_id on video_schedule
+    for each row
+    execute function video_schedule_set_user_id();
+
+-- Propagate ownership changes on transcripts to their schedules
+create or replace function transcript_files_sync_user_id()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update video_schedule
+    set user_id = new.user_id
+    where video_id = new.id
+    and user_id is distinct from new.user_id;
+    return new;
+end;
+$$;
+
+drop trigger if exists transcript_files_sync_user_id on transcript_files;
+create trigger transcript_files_sync_user_id
+    after update of user_id on transcript_files
+    for each row
+    when (new.user_id is not null and new.user_id is distinct from old.user_id)
+    execute function transcript_files_sync_user_id();
+
+revoke execute on function video_schedule_set_user_id() from public, anon, authenticated;
+revoke execute on function transcript_files_sync_user_id() from public, anon, authenticated;
+
+-- Serves the per-user policies and per-user listings ordered by time
+create index if not exists idx_video_schedule_user_id
+    on video_schedule(user_id, scheduled_at);
+
+-- Replace every user-facing policy that looked up transcript_files per row
+-- (or allowed all reads) with policies on the local column. auth.uid() is
+-- wrapped in a sub-select so it is evaluated once per statement.
+drop policy if exists "Users can manage their own video schedules" on video_schedule;
+drop policy if exists "Service role can access all videos" on video_schedule;
+drop policy if exists "Allow service role to read unpublished scheduled videos" on video_schedule;
+drop policy if exists "Users can view their own video schedules" on video_schedule;
+drop policy if exists "Users can create their own video schedules" on video_schedule;
+drop policy if exists "Users can update their own video schedules" on video_schedule;
+drop policy if exists "Users can delete their own video schedules" on video_schedule;
+
+create policy "Users can view their own video schedules"
+    on video_schedule
+    for select
+    to authenticated
+    using (user_id = (select auth.uid()));
+
+create policy "Users can create their own video schedules"
+    on video_schedule
+    for insert
+    to authenticated
+    with check (user_id = (select auth.uid()));
+
+create policy "Users can update their own video schedules"
+    on video_schedule
+    for update
+    to authenticated
+    using (user_id = (select auth.uid()))
+    with check (user_id = (select auth.uid()));
+
+create policy "Users can delete their own video schedules"
+    on video_schedule
+    for delete
+    to authenticated
+    using (user_id = (select auth.uid()));
+
+-- publish_manifests read access goes through the same column
+drop policy if exists "Users can view their own publish manifests" on publish_manifests;
+create policy "Users can view their own publish manifests"
+    on publish_manifests
+    for select
+    to authenticated
+    using (
+        exists (
+            select 1
+            from video_schedule
+            where video_schedule.id = publish_manifests.schedule_id
+            and video_schedule.user_id = (select auth.uid())
+        )
+    );
@@ -0,0 +1,108 @@
+-- Claim due work in one round trip: lock due rows, mark them in progress and
+-- return them with the transcript's storage location (bucket, object_path =
+-- transcript_files.file_path, and storage_path = "bucket/object_path").
+
+alter table video_schedule
+    add column if not exists claimed_at timestamp with time zone,
+    add column if not exists claimed_by text;
+
+comment on column video_schedule.claimed_at is 'When a publisher worker claimed this row; cleared when the claim is released';
+comment on column video_schedule.claimed_by is 'Publisher worker holding the claim';
+
+-- Returns up to max_rows unpublished rows that are due, oldest scheduled_at
+-- first. Rows locked by a concurrent claim are skipped rather than waited
+-- on, and a claim older than lease_seconds (a crashed worker) is taken over.
+-- The scan uses idx_video_schedule_scheduled (scheduled_at where not published).
+create or replace function claim_due_videos(
+    max_rows integer default 50,
+    worker text default null,
+    lease_seconds integer default 900
+)
+returns table (
+    id uuid,
+    video_id uuid,
+    user_id uuid,
+    platform text,
+    video_type text,
+    title text,
+    description text,
+    tags text[],
+    scheduled_at timestamp with time zone,
+    bucket text,
+    object_path text,
+    file_name text,
+    storage_path text
+)
+language plpgsql
+security definer
+set search_path = public
+as $$
+#variable_conflict use_column
+begin
+    return query
+    with due as (
+        select v.id
+        from video_schedule v
+        where not v.published
+        and v.scheduled_at <= now()
+        and (v.claimed_at is null or v.claimed_at < now() - make_interval(secs => lease_seconds))
+        order by v.scheduled_at
+        limit max_rows
+        for update skip locked
+    ),
+    claimed as (
+        update video_schedule v
+        set claimed_at = now(),
+            claimed_by = worker
+        from due
+        where v.id = due.id
+        returning v.id, v.video_id, v.user_id, v.platform, v.video_type,
+            v.title, v.description, v.tags, v.scheduled_at
+    )
+    select
+        c.id,
+        c.video_id,
+        c.user_id,
+        c.platform,
+        c.video_type,
+        c.title,
+        c.description,
+        c.tags,
+        c.scheduled_at,
+        t.bucket,
+        t.file_path,
+        t.file_name,
+        case when t.id is not null then t.bucket || '/' || t.file_path end
+    from claimed c
+    left join transcript_files t on t.id = c.video_id
+    order by c.scheduled_at;
+end;
+$$;
+
+-- Give claimed rows that were not published (deferred or failed) back to
+-- the queue so the next run picks them up
+create or replace function release_video_claims(ids uuid[])
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    released_count integer;
+begin
+    update video_schedule
+    set claimed_at = null,
+        claimed_by = null
+    where id = any(ids)
+    and not published
+    and claimed_at is not null;
+
+    get diagnostics released_count = row_count;
+    return released_count;
+end;
+$$;
+
+revoke execute on function claim_due_videos(integer, text, integer) from public, anon, authenticated;
+grant execute on function claim_due_videos(integer, text, integer) to service_role;
+revoke execute on function release_video_claims(uuid[]) from public, anon, authenticated;
+grant execute on function release_video_claims(uuid[]) to service_role;
@@ -0,0 +1,230 @@
+-- Move published history out of video_schedule so the hot table only holds
+-- the pending backlog (plus recently published rows).
+--
+-- video_schedule_archive is range-partitioned by month of scheduled_at.
+-- archive_published_videos() moves old published rows across in batches and
+-- video_schedule_history reads both tables for anything that needs history.
+
+create table if not exists video_schedule_archive (
+    like video_schedule including defaults,
+    archived_at timestamp with time zone default timezone('utc'::text, now()) not null,
+    primary key (id, scheduled_at)
+) partition by range (scheduled_at);
+
+comment on table video_schedule_archive is 'Published video_schedule rows, partitioned by month of scheduled_at';
+
+-- Catches anything outside the monthly partitions; normally stays empty
+create table if not exists video_schedule_archive_default
+    partition of video_schedule_archive default;
+
+create index if not exists idx_video_schedule_archive_user_id
+    on video_schedule_archive(user_id, scheduled_at);
+create index if not exists idx_video_schedule_archive_video_id
+    on video_schedule_archive(video_id);
+
+-- Create the partition for the month containing month_start (UTC)
+create or replace function ensure_video_schedule_archive_partition(month_start timestamp)
+returns text
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    lower_bound timestamp := date_trunc('month', month_start);
+    partition_name text := 'video_schedule_archive_' || to_char(lower_bound, 'YYYY_MM');
+begin
+    if to_regclass(partition_name) is null then
+        execute format(
+            'create table %I partition of video_schedule_archive for values from (%L) to (%L)',
+            partition_name,
+            lower_bound at time zone 'UTC',
+            (lower_bound + interval '1 month') at time zone 'UTC'
+        );
+        -- Partitions are reachable directly through PostgREST; with RLS on
+        -- and no policies only the service role can read them that way
+        execute format('alter table %I enable row level security', partition_name);
+    end if;
+    return partition_name;
+end;
+$$;
+
+-- Move up to batch_size published rows scheduled before now() - older_than
+-- into the archive. YouTube rows whose processing status is not final yet
+-- stay for up to 30 days so reconcile_youtube.py can still update them.
+-- Returns the number of rows moved; call repeatedly until it returns 0.
+-- Each call is its own transaction, so batches keep lock times short.
+create or replace function archive_published_videos(
+    older_than interval default '7 days',
+    batch_size integer default 5000
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    cutoff timestamp with time zone := now() - older_than;
+    missing_columns text;
+    column_list text;
+    month_start timestamp;
+    moved_count integer;
+begin
+    -- One archiver at a time; released at commit
+    perform pg_advisory_xact_lock(hashtext('archive_published_videos'));
+
+    -- Copy by column name, and refuse to run if video_schedule has gained a
+    -- column the archive does not have rather than silently dropping it
+    select string_agg(c.column_name::text, ', ')
+    into missing_columns
+    from information_schema.columns c
+    where c.table_schema = 'public'
+    and c.table_name = 'video_schedule'
+    and not exists (
+        select 1
+        from information_schema.columns a
+        where a.table_schema = 'public'
+        and a.table_name = 'video_schedule_archive'
+        and a.column_name = c.column_name
+    );
+    if missing_columns is not null then
+        raise exception 'video_schedule_archive is missing columns: %', missing_columns;
+    end if;
+
+    select string_agg(quote_ident(column_name), ', ' order by ordinal_position)
+    into column_list
+    from information_schema.columns
+    where table_schema = 'public'
+    and table_name = 'video_schedule';
+
+    for month_start in
+        select distinct date_trunc('month', scheduled_at at time zone 'UTC')
+        from video_schedule
+        where published
+        and scheduled_at < cutoff
+        and not (
+            platform = 'youtube'
+            and coalesce(platform_status, 'processing') in ('processing', 'scheduled')
+            and scheduled_at >= now() - interval '30 days'
+        )
+    loop
+        perform ensure_video_schedule_archive_partition(month_start);
+    end loop;
+
+    execute format($sql$
+        with batch as (
+            select id
+            from video_schedule
+            where published
+            and scheduled_at < $1
+            and not (
+                platform = 'youtube'
+                and coalesce(platform_status, 'processing') in ('processing', 'scheduled')
+                and scheduled_at >= now() - interval '30 days'
+            )
+            order by scheduled_at
+            limit $2
+            for update skip locked
+        ),
+        moved as (
+            delete from video_schedule v
+            using batch
+            where v.id = batch.id
+            returning v.*
+        )
+        insert into video_schedule_archive (%1$s)
+        select %1$s from moved
+    $sql$, column_list)
+    using cutoff, batch_size;
+
+    get diagnostics moved_count = row_count;
+    return moved_count;
+end;
+$$;
+
+revoke execute on function ensure_video_schedule_archive_partition(timestamp) from public, anon, authenticated;
+revoke execute on function archive_published_videos(interval, integer) from public, anon, authenticated;
+grant execute on function archive_published_videos(interval, integer) to service_role;
+
+-- RLS: same ownership rule as video_schedule
+alter table video_schedule_archive enable row level security;
+alter table video_schedule_archive_default enable row level security;
+
+drop policy if exists "Service role can manage archived video schedules" on video_schedule_archive;
+create policy "Service role can manage archived video schedules"
+    on video_schedule_archive
+    for all
+    to service_role
+    using (true)
+    with check (true);
+
+drop policy if exists "Users can view their own archived video schedules" on video_schedule_archive;
+create policy "Users can view their own archived video schedules"
+    on video_schedule_archive
+    for select
+    to authenticated
+    using (user_id = (select auth.uid()));
+
+grant all on video_schedule_archive to service_role;
+
+-- Full history: live rows plus archived rows. security_invoker makes the
+-- view apply the caller's RLS policies on both tables.
+create or replace view video_schedule_history
+with (security_invoker = true)
+as
+select
+    id, video_id, user_id, video_type, platform, title, description, tags,
+    scheduled_at, published, publish_url, publish_error,
+    manifest_path, manifest_url, manifest_ref, manifest_hash,
+    platform_video_id, platform_status, platform_status_detail, platform_checked_at,
+    created_at, null::timestamp with time zone as archived_at
+from video_schedule
+union all
+select
+    id, video_id, user_id, video_type, platform, title, description, tags,
+    scheduled_at, published, publish_url, publish_error,
+    manifest_path, manifest_url, manifest_ref, manifest_hash,
+    platform_video_id, platform_status, platform_status_detail, platform_checked_at,
+    created_at, archived_at
+from video_schedule_archive;
+
+comment on view video_schedule_history is 'video_schedule plus video_schedule_archive; archived_at is null for live rows';
+
+grant select on video_schedule_history to authenticated, service_role;
+
+-- Users keep read access to manifests of their archived rows
+drop policy if exists "Users can view their own publish manifests" on publish_manifests;
+create policy "Users can view their own publish manifests"
+    on publish_manifests
+    for select
+    to authenticated
+    using (
+        exists (
+            select 1
+            from video_schedule
+            where video_schedule.id = publish_manifests.schedule_id
+            and video_schedule.user_id = (select auth.uid())
+        )
+        or exists (
+            select 1
+            from video_schedule_archive
+            where video_schedule_archive.id = publish_manifests.schedule_id
+            and video_schedule_archive.user_id = (select auth.uid())
+        )
+    );
+
+-- Archive one batch every 10 minutes when pg_cron is available; otherwise
+-- schedule archive_video_schedule.py
+do $$
+begin
+    if exists (select 1 from pg_extension where extname = 'pg_cron') then
+        perform cron.unschedule(jobid)
+        from cron.job
+        where jobname = 'archive-published-videos';
+
+        perform cron.schedule(
+            'archive-published-videos',
+            '*/10 * * * *',
+            'select archive_published_videos()'
+        );
+    end if;
+end $$;
@@ -0,0 +1,11 @@
+-- A video can be scheduled once per platform and time rather than once per
+-- user, so the same transcript can go out to several platforms (and more than
+-- once to the same platform). The new key is also the conflict target that
+-- schedule_videos(..., upsert=True) uses for idempotent retries.
+
+alter table video_schedule drop constraint if exists video_schedule_video_id_user_id_key;
+
+alter table video_schedule drop constraint if exists video_schedule_video_id_platform_scheduled_at_key;
+alter table video_schedule
+    add constraint video_schedule_video_id_platform_scheduled_at_key
+    unique (video_id, platform, scheduled_at);
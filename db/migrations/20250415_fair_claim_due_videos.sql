@@ -0,0 +1,127 @@
+-- Share each claim batch fairly between users. claim_due_videos used to take
+-- the oldest due rows, so one user scheduling hundreds of videos at the same
+-- time filled every batch until their backlog was drained and delayed every
+-- other user's videos. Rows are now picked by weighted round-robin across
+-- user_id (each user's oldest row first), and a user's rows can be capped by
+-- how many of them are claimed at once across all workers.
+
+drop function if exists claim_due_videos(integer, text, integer);
+
+-- Returns up to max_rows unpublished rows that are due. Each user's due rows
+-- are ranked by scheduled_at; a row's turn is its rank divided by its user's
+-- weight (tenant_weights maps user_id to a weight, default 1), so a user with
+-- weight 2 gets two rows for every one of a user with weight 1. Ties go to
+-- the older row. With max_per_tenant set, a user's rows that are already
+-- claimed by a live lease count against the cap, so that many of their
+-- videos are in flight at most (claims made concurrently by another worker
+-- are not yet visible, so the cap can be exceeded briefly).
+-- Rows locked by a concurrent claim are skipped rather than waited on, and a
+-- claim older than lease_seconds (a crashed worker) is taken over.
+create or replace function claim_due_videos(
+    max_rows integer default 50,
+    worker text default null,
+    lease_seconds integer default 900,
+    tenant_weights jsonb default '{}'::jsonb,
+    max_per_tenant integer default null
+)
+returns table (
+    id uuid,
+    video_id uuid,
+    user_id uuid,
+    platform text,
+    video_type text,
+    title text,
+    description text,
+    tags text[],
+    scheduled_at timestamp with time zone,
+    bucket text,
+    object_path text,
+    file_name text,
+    storage_path text
+)
+language plpgsql
+security definer
+set search_path = public
+as $$
+#variable_conflict use_column
+begin
+    return query
+    with in_flight as (
+        select v.user_id, count(*) as claimed_count
+        from video_schedule v
+        where max_per_tenant is not null
+        and not v.published
+        and v.claimed_at >= now() - make_interval(secs => lease_seconds)
+        group by v.user_id
+    ),
+    ranked as (
+        select
+            v.id,
+            v.user_id,
+            v.scheduled_at,
+            row_number() over (partition by v.user_id order by v.scheduled_at, v.id) as tenant_rank
+        from video_schedule v
+        where not v.published
+        and v.scheduled_at <= now()
+        and (v.claimed_at is null or v.claimed_at < now() - make_interval(secs => lease_seconds))
+    ),
+    picked as (
+        select
+            r.id,
+            row_number() over (
+                order by r.tenant_rank / greatest(coalesce((tenant_weights ->> r.user_id::text)::numeric, 1), 0.001),
+                    r.scheduled_at, r.id
+            ) as pick_order
+        from ranked r
+        left join in_flight f on f.user_id is not distinct from r.user_id
+        -- No user can get more than max_rows of a batch
+        where r.tenant_rank <= max_rows
+        and (max_per_tenant is null or r.tenant_rank + coalesce(f.claimed_count, 0) <= max_per_tenant)
+        order by pick_order
+        limit max_rows
+    ),
+    due as (
+        select v.id, p.pick_order
+        from video_schedule v
+        join picked p on p.id = v.id
+        where not v.published
+        and v.scheduled_at <= now()
+        and (v.claimed_at is null or v.claimed_at < now() - make_interval(secs => lease_seconds))
+        for update of v skip locked
+    ),
+    claimed as (
+        update video_schedule v
+        set claimed_at = now(),
+            claimed_by = worker
+        from due
+        where v.id = due.id
+        returning v.id, v.video_id, v.user_id, v.platform, v.video_type,
+            v.title, v.description, v.tags, v.scheduled_at, due.pick_order
+    )
+    select
+        c.id,
+        c.video_id,
+        c.user_id,
+        c.platform,
+        c.video_type,
+        c.title,
+        c.description,
+        c.tags,
+        c.scheduled_at,
+        t.bucket,
+        t.file_path,
+        t.file_name,
+        case when t.id is not null then t.bucket || '/' || t.file_path end
+    from claimed c
+    left join transcript_files t on t.id = c.video_id
+    order by c.pick_order;
+end;
+$$;
+
+-- Counts a user's live claims for max_per_tenant
+create index if not exists idx_video_schedule_claimed
+    on video_schedule(user_id, claimed_at)
+    where not published and claimed_at is not null;
+
+revoke execute on function claim_due_videos(integer, text, integer, jsonb, integer) from public, anon, authenticated;
+grant execute on function claim_due_videos(integer, text, integer, jsonb, integer) to service_role;
@@ -0,0 +1,3 @@
+-- Reconciliation flags YouTube videos still private after their scheduled
+-- publishAt as publish_missed (final, like private, so they are not re-polled)
+comment on column video_schedule.platform_status is 'Last status reported by the platform: processing, scheduled, publish_missed, live, private, failed, rejected, deleted or missing';
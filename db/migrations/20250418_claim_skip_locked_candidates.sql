@@ -0,0 +1,166 @@
+-- Keep claim batches full when workers claim at the same time.
+-- claim_due_videos (20250415, 20250416) picked its rows before locking them,
+-- so workers polling together picked the same rows: the first one locked
+-- them and the others skipped every picked row and got a short or empty
+-- batch (8 concurrent claimers asking for 10 rows got 1.5 on average, and
+-- three calls in four got none). Each user's candidate rows are now locked
+-- as they are read, skipping rows a concurrent claim holds, so every claimer
+-- ranks a disjoint set of rows. Candidates that are not picked stay locked
+-- only until the claim's transaction ends.
+
+-- Same contract as 20250416: up to max_rows due rows picked by weighted
+-- round-robin across user_id (turn = rank within the user / weight, ties to
+-- the older row), with an optional cap on each user's live claims. When
+-- claims overlap, a user's rows locked by the other claim are passed over,
+-- so rows can be claimed a little out of scheduled_at order.
+create or replace function claim_due_videos(
+    max_rows integer default 50,
+    worker text default null,
+    lease_seconds integer default 900,
+    tenant_weights jsonb default '{}'::jsonb,
+    max_per_tenant integer default null
+)
+returns table (
+    id uuid,
+    video_id uuid,
+    user_id uuid,
+    platform text,
+    video_type text,
+    title text,
+    description text,
+    tags text[],
+    scheduled_at timestamp with time zone,
+    bucket text,
+    object_path text,
+    file_name text,
+    storage_path text
+)
+language plpgsql
+security definer
+set search_path = public
+as $$
+#variable_conflict use_column
+declare
+    per_tenant integer := least(max_rows, coalesce(max_per_tenant, max_rows));
+begin
+    return query
+    with recursive tenants as (
+        (
+            select v.user_id
+            from video_schedule v
+            where not v.published
+            and v.user_id is not null
+            order by v.user_id
+            limit 1
+        )
+        union all
+        select (
+            select v.user_id
+            from video_schedule v
+            where not v.published
+            and v.user_id > t.user_id
+            order by v.user_id
+            limit 1
+        )
+        from tenants t
+        where t.user_id is not null
+    ),
+    candidates as (
+        select c.id, c.user_id, c.scheduled_at
+        from tenants t
+        cross join lateral (
+            select v.id, v.user_id, v.scheduled_at
+            from video_schedule v
+            where v.user_id = t.user_id
+            and not v.published
+            and v.scheduled_at <= now()
+            and (v.claimed_at is null or v.claimed_at < now() - make_interval(secs => lease_seconds))
+            order by v.scheduled_at, v.id
+            limit per_tenant
+            for update of v skip locked
+        ) c
+        where t.user_id is not null
+        union all
+        -- Rows without an owner share one turn, as a single user
+        select n.id, n.user_id, n.scheduled_at
+        from (
+            select v.id, v.user_id, v.scheduled_at
+            from video_schedule v
+            where v.user_id is null
+            and not v.published
+            and v.scheduled_at <= now()
+            and (v.claimed_at is null or v.claimed_at < now() - make_interval(secs => lease_seconds))
+            order by v.scheduled_at, v.id
+            limit per_tenant
+            for update of v skip locked
+        ) n
+    ),
+    in_flight as (
+        select v.user_id, count(*) as claimed_count
+        from video_schedule v
+        where max_per_tenant is not null
+        and not v.published
+        and v.claimed_at >= now() - make_interval(secs => lease_seconds)
+        group by v.user_id
+    ),
+    ranked as (
+        select
+            c.id,
+            c.user_id,
+            c.scheduled_at,
+            row_number() over (partition by c.user_id order by c.scheduled_at, c.id) as tenant_rank
+        from candidates c
+    ),
+    picked as (
+        select
+            r.id,
+            row_number() over (
+                order by r.tenant_rank / greatest(coalesce((tenant_weights ->> r.user_id::text)::numeric, 1), 0.001),
+                    r.scheduled_at, r.id
+            ) as pick_order
+        from ranked r
+        left join in_flight f on f.user_id is not distinct from r.user_id
+        where max_per_tenant is null or r.tenant_rank + coalesce(f.claimed_count, 0) <= max_per_tenant
+        order by pick_order
+        limit max_rows
+    ),
+    due as (
+        select v.id, p.pick_order
+        from video_schedule v
+        join picked p on p.id = v.id
+        where not v.published
+        and v.scheduled_at <= now()
+        and (v.claimed_at is null or v.claimed_at < now() - make_interval(secs => lease_seconds))
+        for update of v skip locked
+    ),
+    claimed as (
+        update video_schedule v
+        set claimed_at = now(),
+            claimed_by = worker
+        from due
+        where v.id = due.id
+        returning v.id, v.video_id, v.user_id, v.platform, v.video_type,
+            v.title, v.description, v.tags, v.scheduled_at, due.pick_order
+    )
+    select
+        c.id,
+        c.video_id,
+        c.user_id,
+        c.platform,
+        c.video_type,
+        c.title,
+        c.description,
+        c.tags,
+        c.scheduled_at,
+        t.bucket,
+        t.file_path,
+        t.file_name,
+        case when t.id is not null then t.bucket || '/' || t.file_path end
+    from claimed c
+    left join transcript_files t on t.id = c.video_id
+    order by c.pick_order;
+end;
+$$;
+
+revoke execute on function claim_due_videos(integer, text, integer, jsonb, integer) from public, anon, authenticated;
+grant execute on function claim_due_videos(integer, text, integer, jsonb, integer) to service_role;
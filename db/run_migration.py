@@ -2,19 +2,29 @@
 
 import sys
 import os
+from pathlib import Path
 
 # Add parent directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from lib.supabase.supabase_client import supabase
+from db.migrate import apply, bootstrap, fetch_applied, load_migration
 
 def run_migration(migration_file):
-    """Run a SQL migration file against Supabase."""
-    with open(migration_file, 'r') as f:
-        sql = f.read()
-        
-    # Execute the SQL using the exec_sql RPC function
-    response = supabase.rpc("exec_sql", {"query": sql})
+    """Run a single SQL migration file against Supabase and record it in the ledger."""
+    migration = load_migration(Path(migration_file))
+    
+    applied = fetch_applied()
+    if applied is None:
+        bootstrap()
+        applied = {}
+    
+    if migration.version in applied:
+        if applied[migration.version] != migration.checksum:
+            raise Exception(f"Migration {migration.version} has changed since it was applied")
+        print(f"Migration {migration_file} already applied")
+        return
+    
+    apply([migration])
     print(f"Migration {migration_file} executed successfully")
 
 if len(sys.argv) < 2:
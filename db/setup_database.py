@@ -11,42 +11,20 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-from lib.supabase.supabase_client import supabase
+from db.migrate import migrate
 
-def run_sql_direct(sql: str) -> None:
+def setup_database(dry_run: bool = False) -> None:
     """
-    Run SQL directly using REST API.
+    Set up the database schema and initial data.
+    
+    Runs create_tables.sql and every file in migrations/ that is not yet in
+    the schema_migrations ledger, in one transaction.
     
     Args:
-        sql: SQL to execute
+        dry_run: Print the migration plan without applying it
     """
     try:
-        # Execute SQL directly using REST API
-        result = supabase.postgrest.schema('public').rpc('exec_sql', {'query': sql}).execute()
-        return True
-    except Exception as e:
-        raise
-
-def setup_database() -> None:
-    """Set up the database schema and initial data."""
-    try:
-        # Get the directory containing this script
-        db_dir = Path(__file__).parent
-        
-        # Run the main schema creation
-        print("Creating tables...")
-        with open(db_dir / "create_tables.sql", 'r') as f:
-            run_sql_direct(f.read())
-        
-        # Run all migrations in order
-        migrations_dir = db_dir / "migrations"
-        if migrations_dir.exists():
-            print("Running migrations...")
-            for migration_file in sorted(migrations_dir.glob("*.sql")):
-                print(f"Applying {migration_file.name}...")
-                with open(migration_file, 'r') as f:
-                    run_sql_direct(f.read())
-                
+        migrate(dry_run=dry_run)
         print("Database setup complete!")
         
     except Exception as e:
@@ -54,4 +32,4 @@ def setup_database() -> None:
         raise
 
 if __name__ == "__main__":
-    setup_database()
+    setup_database(dry_run="--dry-run" in sys.argv)
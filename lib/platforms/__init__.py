@@ -1,7 +1,54 @@
 """
 Platform handlers for video publishing.
+
+Handlers are imported on first use so a run only loads the SDK of platforms
+it actually publishes to (google-api-python-client for YouTube, requests for
+the Graph API).
 """
 
-from .website import handle_website_publishing
+import importlib
+from functools import partial
+from typing import Any, Callable, Dict
+
+# platform -> (module, handler); every handler takes the video dict and
+# returns {'success', 'publish_url', ...} or {'success': False, 'error'}
+PLATFORM_HANDLERS = {
+    'youtube': ('.youtube_client', 'upload_to_youtube'),
+    'facebook': ('.meta_client', 'upload_to_meta'),
+    'instagram': ('.meta_client', 'upload_to_meta'),
+    'website': ('.website', 'handle_website_publishing')
+}
+
+# Handlers that also take the platform name as their first argument
+_PLATFORM_ARGUMENT = {'upload_to_meta'}
+
+def get_platform_handler(platform: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Get the publishing handler for a platform, importing its module on first use.
+
+    Args:
+        platform: video_schedule.platform value
+
+    Returns:
+        Callable[[Dict[str, Any]], Dict[str, Any]]: Handler taking the video dict
+
+    Raises:
+        ValueError: If the platform is not supported
+    """
+    if platform not in PLATFORM_HANDLERS:
+        raise ValueError(f"Unsupported platform: {platform}")
+    module_name, handler_name = PLATFORM_HANDLERS[platform]
+    handler = getattr(importlib.import_module(module_name, __name__), handler_name)
+    if handler_name in _PLATFORM_ARGUMENT:
+        return partial(handler, platform)
+    return handler
+
+def __getattr__(name: str):
+    # Keep `from lib.platforms import handle_website_publishing` working
+    # without importing every platform module with the package
+    for module_name, handler_name in PLATFORM_HANDLERS.values():
+        if handler_name == name:
+            return getattr(importlib.import_module(module_name, __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ['handle_website_publishing']
+__all__ = ['get_platform_handler', 'handle_website_publishing']
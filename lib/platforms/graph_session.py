@@ -0,0 +1,217 @@
+"""
+Pooled HTTP transport for Meta Graph API requests.
+
+All Facebook/Instagram calls share one keep-alive ``requests.Session`` so
+uploads and publish steps reuse connections to graph.facebook.com and
+graph-video.facebook.com instead of opening a new one per request.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from lib.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing: one pool per Graph host, enough connections for concurrent workers
+POOL_CONNECTIONS = int(os.getenv("META_POOL_CONNECTIONS", "4"))
+POOL_MAXSIZE = int(os.getenv("META_POOL_MAXSIZE", "16"))
+
+# Timeouts in seconds; video uploads need a long read timeout
+CONNECT_TIMEOUT = float(os.getenv("META_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("META_READ_TIMEOUT", "300"))
+
+MAX_RETRIES = int(os.getenv("META_MAX_RETRIES", "3"))
+
+# Usage percentages (from X-App-Usage / X-Business-Use-Case-Usage) at which
+# we start spacing out requests, and at which we stop until usage recovers
+USAGE_SLOWDOWN_PCT = float(os.getenv("META_USAGE_SLOWDOWN_PCT", "75"))
+USAGE_PAUSE_PCT = float(os.getenv("META_USAGE_PAUSE_PCT", "95"))
+MAX_SLOWDOWN_DELAY = float(os.getenv("META_MAX_SLOWDOWN_DELAY", "30"))
+MAX_PAUSE = float(os.getenv("META_MAX_PAUSE", "300"))
+
+# Graph API error codes that mean "you are being throttled"
+THROTTLE_ERROR_CODES = {4, 17, 32, 613, 80001, 80002, 80004}
+
+
+class GraphUsageThrottle:
+    """
+    Tracks Graph API usage headers and delays requests before we hit the limit.
+
+    Meta reports usage as a percentage of the allowed budget. Below
+    ``USAGE_SLOWDOWN_PCT`` requests go out immediately; above it they are
+    spaced out proportionally; at ``USAGE_PAUSE_PCT`` (or when Meta reports
+    an ``estimated_time_to_regain_access``) requests wait for the budget to
+    recover.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._not_before = 0.0
+        self.last_usage_pct = 0.0
+
+    def wait(self) -> None:
+        """Block until the next request is allowed to go out."""
+        with self._lock:
+            delay = self._not_before - time.monotonic()
+        if delay > 0:
+            logger.info("Graph API usage high, delaying request by %.1fs", delay)
+            time.sleep(delay)
+
+    def observe(self, response: requests.Response) -> None:
+        """Update the throttle from a Graph API response."""
+        usage_pct, regain_seconds = parse_usage_headers(response.headers)
+        if is_throttle_error(response):
+            usage_pct = max(usage_pct, 100.0)
+            regain_seconds = max(regain_seconds, MAX_SLOWDOWN_DELAY)
+
+        delay = 0.0
+        if regain_seconds > 0 or usage_pct >= USAGE_PAUSE_PCT:
+            delay = min(max(regain_seconds, MAX_SLOWDOWN_DELAY), MAX_PAUSE)
+        elif usage_pct >= USAGE_SLOWDOWN_PCT:
+            span = max(USAGE_PAUSE_PCT - USAGE_SLOWDOWN_PCT, 1.0)
+            delay = MAX_SLOWDOWN_DELAY * (usage_pct - USAGE_SLOWDOWN_PCT) / span
+
+        with self._lock:
+            self.last_usage_pct = usage_pct
+            if delay > 0:
+                self._not_before = max(self._not_before, time.monotonic() + delay)
+
+
+def parse_usage_headers(headers) -> tuple[float, float]:
+    """
+    Extract the highest usage percentage and regain time from Graph headers.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        tuple: (max usage percentage, seconds until access is regained)
+    """
+    usage_pct = 0.0
+    regain_seconds = 0.0
+
+    app_usage = _load_header(headers, "X-App-Usage")
+    if isinstance(app_usage, dict):
+        usage_pct = max([usage_pct] + _usage_values(app_usage))
+
+    buc_usage = _load_header(headers, "X-Business-Use-Case-Usage")
+    if isinstance(buc_usage, dict):
+        for entries in buc_usage.values():
+            for entry in entries if isinstance(entries, list) else [entries]:
+                if not isinstance(entry, dict):
+                    continue
+                usage_pct = max([usage_pct] + _usage_values(entry))
+                minutes = entry.get("estimated_time_to_regain_access") or 0
+                regain_seconds = max(regain_seconds, float(minutes) * 60)
+
+    return usage_pct, regain_seconds
+
+
+def is_throttle_error(response: requests.Response) -> bool:
+    """Check whether a Graph API response is a rate-limit error."""
+    if response.status_code not in (400, 403, 429):
+        return False
+    try:
+        error = response.json().get("error", {})
+    except ValueError:
+        return response.status_code == 429
+    return isinstance(error, dict) and error.get("code") in THROTTLE_ERROR_CODES
+
+
+def _load_header(headers, name: str):
+    value = headers.get(name)
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        logger.warning("Could not parse %s header: %s", name, value)
+        return None
+
+
+def _usage_values(usage: dict) -> list:
+    return [
+        float(usage[key])
+        for key in ("call_count", "total_time", "total_cputime")
+        if isinstance(usage.get(key), (int, float))
+    ]
+
+
+class GraphAdapter(HTTPAdapter):
+    """HTTP adapter applying default timeouts and usage-based throttling, traced per request."""
+
+    def __init__(self, throttle: GraphUsageThrottle, **kwargs):
+        self.throttle = throttle
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        # Only the path: Graph URLs can carry the access token as a query parameter
+        with tracer.span(f"graph {request.method}", path=urlsplit(request.url).path) as span:
+            self.throttle.wait()
+            response = super().send(request, timeout=timeout, **kwargs)
+            self.throttle.observe(response)
+            span.set(
+                http_status=response.status_code,
+                bytes_sent=int(request.headers.get("Content-Length") or 0),
+                bytes_received=int(response.headers.get("Content-Length") or 0)
+            )
+        return response
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+throttle = GraphUsageThrottle()
+
+
+def create_graph_session() -> requests.Session:
+    """
+    Create a pooled session for Graph API calls.
+
+    Connection errors are retried for every method. Read errors and 5xx
+    responses are only retried for idempotent methods, so a video POST is
+    never sent twice after Meta may already have accepted it.
+    """
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=1.0,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS", "DELETE"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = GraphAdapter(
+        throttle,
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_graph_session() -> requests.Session:
+    """Get the shared Graph API session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_graph_session()
+    return _session
@@ -3,15 +3,25 @@ Meta Graph API client for publishing to Facebook and Instagram.
 """
 
 import os
-import requests
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from lib.utils.env import load_env
+from .graph_session import get_graph_session
 
-META_ACCESS_TOKEN = os.getenv("META_ACCESS_TOKEN")
-FB_PAGE_ID = os.getenv("FACEBOOK_PAGE_ID")
-IG_USER_ID = os.getenv("INSTAGRAM_USER_ID")
+def get_meta_config() -> dict:
+    """
+    Get the Graph API token, target page/account IDs and API hosts from the environment.
+
+    ``META_GRAPH_URL`` and ``META_GRAPH_VIDEO_URL`` override the Graph API
+    hosts, e.g. to point the client at a stand-in server in benchmarks.
+    """
+    load_env()
+    return {
+        "access_token": os.getenv("META_ACCESS_TOKEN"),
+        "page_id": os.getenv("FACEBOOK_PAGE_ID"),
+        "ig_user_id": os.getenv("INSTAGRAM_USER_ID"),
+        "graph_url": os.getenv("META_GRAPH_URL", "https://graph.facebook.com").rstrip("/"),
+        "graph_video_url": os.getenv("META_GRAPH_VIDEO_URL", "https://graph-video.facebook.com").rstrip("/")
+    }
 
 def upload_facebook_video(video_path, title, description):
     """
@@ -28,22 +38,23 @@ def upload_facebook_video(video_path, title, description):
     Raises:
         Exception: If upload fails
     """
+    config = get_meta_config()
     with open(video_path, "rb") as f:
         files = {"file": f}
         params = {
             "title": title,
             "description": description,
-            "access_token": META_ACCESS_TOKEN
+            "access_token": config["access_token"]
         }
-        response = requests.post(
-            f"https://graph-video.facebook.com/v18.0/{FB_PAGE_ID}/videos",
+        response = get_graph_session().post(
+            f"{config['graph_video_url']}/v18.0/{config['page_id']}/videos",
             files=files,
             data=params
         )
     result = response.json()
     if "id" not in result:
         raise Exception(result.get("error", "Unknown error"))
-    return f"https://www.facebook.com/{FB_PAGE_ID}/videos/{result['id']}"
+    return f"https://www.facebook.com/{config['page_id']}/videos/{result['id']}"
 
 def upload_instagram_reel(video_path, caption):
     """
@@ -59,27 +70,31 @@ def upload_instagram_reel(video_path, caption):
     Raises:
         Exception: If upload or publish fails
     """
+    config = get_meta_config()
+    session = get_graph_session()
+
     # Step 1: Upload media
-    files = {"video": open(video_path, "rb")}
-    params = {
-        "media_type": "VIDEO",
-        "caption": caption,
-        "access_token": META_ACCESS_TOKEN
-    }
-    response = requests.post(
-        f"https://graph-video.facebook.com/v18.0/{IG_USER_ID}/media",
-        files=files,
-        data=params
-    )
+    with open(video_path, "rb") as f:
+        files = {"video": f}
+        params = {
+            "media_type": "VIDEO",
+            "caption": caption,
+            "access_token": config["access_token"]
+        }
+        response = session.post(
+            f"{config['graph_video_url']}/v18.0/{config['ig_user_id']}/media",
+            files=files,
+            data=params
+        )
     result = response.json()
     if "id" not in result:
         raise Exception(result.get("error", "Upload step failed"))
     container_id = result["id"]
 
     # Step 2: Publish media
-    publish_response = requests.post(
-        f"https://graph.facebook.com/v18.0/{IG_USER_ID}/media_publish",
-        data={"creation_id": container_id, "access_token": META_ACCESS_TOKEN}
+    publish_response = session.post(
+        f"{config['graph_url']}/v18.0/{config['ig_user_id']}/media_publish",
+        data={"creation_id": container_id, "access_token": config["access_token"]}
     )
     publish_result = publish_response.json()
     if "id" not in publish_result:
@@ -96,7 +111,8 @@ def upload_to_meta(platform: str, video_data: dict) -> dict:
         video_data: Dictionary containing video metadata and file path
         
     Returns:
-        dict: Upload result with success status and video URL or error
+        dict: Upload result with success status and video URL (publish_url,
+            also returned as platform_url) or error
     """
     try:
         if platform == 'facebook':
@@ -116,6 +132,7 @@ def upload_to_meta(platform: str, video_data: dict) -> dict:
             
         return {
             'success': True,
+            'publish_url': video_url,
             'platform_url': video_url
         }
         
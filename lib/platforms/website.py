@@ -1,23 +1,281 @@
 """
 Website video publishing module.
+
+Publishes videos to a static site in ``WEBSITE_OUTPUT_DIR``:
+
+- ``videos/<video_id>/index.html``: one page per video
+- ``embed/<video_id>.html``: embeddable player snippet
+- ``page/<n>/index.html`` and ``index.html``: paginated video index
+- ``sitemap-<n>.xml`` and ``sitemap.xml``: paginated sitemap and sitemap index
+
+Builds are incremental. Each video keeps a stable sequence number, so
+publishing a video only re-renders its own pages, the index/sitemap page it
+lands on and (when a new page is opened) the page before it. Files whose
+content hash is unchanged are not rewritten.
 """
 
 import os
+import hashlib
 import logging
-from typing import Dict, Any
+from html import escape
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from lib.supabase.supabase_utils import (
+    get_public_video_url,
+    get_video_embed_code,
+    parse_storage_path
+)
+from lib.utils.local_state import locked_file, read_json, write_json_atomic
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def get_site_config() -> Dict[str, Any]:
+    """Get static site settings from the environment."""
+    return {
+        'output_dir': Path(os.getenv("WEBSITE_OUTPUT_DIR", "site")),
+        'base_url': os.getenv("WEBSITE_BASE_URL", "https://example.com").rstrip('/'),
+        'title': os.getenv("WEBSITE_TITLE", "Videos"),
+        'page_size': int(os.getenv("WEBSITE_PAGE_SIZE", "24")),
+        'sitemap_size': int(os.getenv("WEBSITE_SITEMAP_SIZE", "5000"))
+    }
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """
+    Write a file only if its content hash differs from what is on disk.
+
+    Args:
+        path: File to write
+        content: New file content
+
+    Returns:
+        bool: True if the file was written
+    """
+    data = content.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                return False
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def _layout(title: str, body: str) -> str:
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{escape(title)}</title>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+def render_video_page(entry: Dict[str, Any], embed_code: str, config: Dict[str, Any]) -> str:
+    """Render the standalone page for one video."""
+    tags = "".join(f"<li>{escape(tag)}</li>" for tag in entry.get('tags') or [])
+    body = f"""<main>
+<p><a href="{config['base_url']}/">{escape(config['title'])}</a></p>
+<h1>{escape(entry['title'])}</h1>
+{embed_code}
+<p>{escape(entry.get('description') or '')}</p>
+{f'<ul class="tags">{tags}</ul>' if tags else ''}
+<p><time datetime="{entry['published_at']}">{entry['published_at']}</time></p>
+</main>"""
+    return _layout(entry['title'], body)
+
+def render_index_page(
+    entries: List[Dict[str, Any]],
+    page: int,
+    page_count: int,
+    config: Dict[str, Any]
+) -> str:
+    """Render one page of the video index, newest first."""
+    items = "\n".join(
+        f'<li><a href="{entry["url"]}">{escape(entry["title"])}</a> '
+        f'<time datetime="{entry["published_at"]}">{entry["published_at"][:10]}</time></li>'
+        for entry in reversed(entries)
+    )
+    nav = []
+    if page < page_count:
+        nav.append(f'<a rel="prev" href="{config["base_url"]}/page/{page + 1}/">Newer</a>')
+    if page > 1:
+        nav.append(f'<a rel="next" href="{config["base_url"]}/page/{page - 1}/">Older</a>')
+    body = f"""<main>
+<h1>{escape(config['title'])}</h1>
+<ul class="videos">
+{items}
+</ul>
+<nav>{' '.join(nav)}</nav>
+</main>"""
+    return _layout(f"{config['title']} - page {page}", body)
+
+def render_sitemap(entries: List[Dict[str, Any]]) -> str:
+    """Render one sitemap file."""
+    urls = "\n".join(
+        f"<url><loc>{escape(entry['url'])}</loc><lastmod>{entry['published_at'][:10]}</lastmod></url>"
+        for entry in entries
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f"{urls}\n</urlset>\n"
+    )
+
+def render_sitemap_index(sitemap_count: int, config: Dict[str, Any]) -> str:
+    """Render the sitemap index pointing at every sitemap file."""
+    sitemaps = "\n".join(
+        f"<sitemap><loc>{config['base_url']}/sitemap-{n}.xml</loc></sitemap>"
+        for n in range(1, sitemap_count + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f"{sitemaps}\n</sitemapindex>\n"
+    )
+
+class StaticSite:
+    """
+    Incrementally built static site.
+
+    Site state lives next to the output in ``.site/``: ``meta.json`` holds
+    the video count, ``videos/<id>.json`` each video's sequence number and
+    ``chunks/<n>.json`` the index entries for a block of sequence numbers,
+    so a publish only reads and writes the state it touches.
+    """
+
+    # Entries are stored in chunks of this many sequence numbers; index and
+    # sitemap pages are assembled from the chunks they cover
+    CHUNK_SIZE = 500
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or get_site_config()
+        self.root = self.config['output_dir']
+        self.state_dir = self.root / ".site"
+        (self.state_dir / "videos").mkdir(parents=True, exist_ok=True)
+        (self.state_dir / "chunks").mkdir(parents=True, exist_ok=True)
+
+    def _chunk_path(self, chunk: int) -> Path:
+        return self.state_dir / "chunks" / f"{chunk}.json"
+
+    def _entries(self, first_seq: int, last_seq: int) -> List[Dict[str, Any]]:
+        """Load the index entries with sequence numbers in [first_seq, last_seq]."""
+        entries = []
+        for chunk in range(first_seq // self.CHUNK_SIZE, last_seq // self.CHUNK_SIZE + 1):
+            for entry in read_json(self._chunk_path(chunk), []):
+                if first_seq <= entry['seq'] <= last_seq:
+                    entries.append(entry)
+        return sorted(entries, key=lambda e: e['seq'])
+
+    def _save_entry(self, entry: Dict[str, Any]) -> None:
+        chunk_path = self._chunk_path(entry['seq'] // self.CHUNK_SIZE)
+        entries = [e for e in read_json(chunk_path, []) if e['seq'] != entry['seq']]
+        entries.append(entry)
+        write_json_atomic(chunk_path, entries)
+
+    def _render_index_page(self, page: int, page_count: int) -> int:
+        size = self.config['page_size']
+        entries = self._entries((page - 1) * size, page * size - 1)
+        content = render_index_page(entries, page, page_count, self.config)
+        written = write_if_changed(self.root / "page" / str(page) / "index.html", content)
+        if page == page_count:
+            written += write_if_changed(self.root / "index.html", content)
+        return written
+
+    def _render_sitemap(self, sitemap: int) -> int:
+        size = self.config['sitemap_size']
+        entries = self._entries((sitemap - 1) * size, sitemap * size - 1)
+        return write_if_changed(self.root / f"sitemap-{sitemap}.xml", render_sitemap(entries))
+
+    def publish(self, video: Dict[str, Any], video_url: str, embed_code: str) -> Dict[str, Any]:
+        """
+        Add or update a video and re-render the pages it touches.
+
+        Args:
+            video: Video data (video_id, title, description, tags)
+            video_url: Public URL of the video file
+            embed_code: HTML snippet embedding the video
+
+        Returns:
+            Dict[str, Any]: The video's index entry plus files_written count
+        """
+        video_id = video['video_id']
+        base_url = self.config['base_url']
+
+        with locked_file(self.state_dir / "meta.json"):
+            meta = read_json(self.state_dir / "meta.json", {'count': 0})
+            video_state_path = self.state_dir / "videos" / f"{video_id}.json"
+            video_state = read_json(video_state_path)
+
+            is_new = video_state is None
+            if is_new:
+                video_state = {
+                    'seq': meta['count'],
+                    'published_at': datetime.now(timezone.utc).isoformat()
+                }
+                meta['count'] += 1
+
+            entry = {
+                'seq': video_state['seq'],
+                'video_id': video_id,
+                'title': video.get('title') or video_id,
+                'url': f"{base_url}/videos/{video_id}/",
+                'published_at': video_state['published_at']
+            }
+            page_entry = {**entry, 'description': video.get('description'), 'tags': video.get('tags')}
+
+            written = 0
+            written += write_if_changed(
+                self.root / "videos" / video_id / "index.html",
+                render_video_page(page_entry, embed_code, self.config)
+            )
+            written += write_if_changed(self.root / "embed" / f"{video_id}.html", embed_code + "\n")
+
+            previous = next(iter(self._entries(entry['seq'], entry['seq'])), None)
+            if previous != entry:
+                self._save_entry(entry)
+
+                page_size = self.config['page_size']
+                page_count = max((meta['count'] - 1) // page_size + 1, 1)
+                page = entry['seq'] // page_size + 1
+                written += self._render_index_page(page, page_count)
+                # A new page changes the "Newer" link on the page before it
+                if is_new and page > 1 and entry['seq'] % page_size == 0:
+                    written += self._render_index_page(page - 1, page_count)
+
+                sitemap_size = self.config['sitemap_size']
+                sitemap = entry['seq'] // sitemap_size + 1
+                written += self._render_sitemap(sitemap)
+                if is_new and entry['seq'] % sitemap_size == 0:
+                    written += write_if_changed(
+                        self.root / "sitemap.xml",
+                        render_sitemap_index(sitemap, self.config)
+                    )
+
+            if is_new:
+                write_json_atomic(video_state_path, video_state)
+                write_json_atomic(self.state_dir / "meta.json", meta)
+
+        return {**entry, 'files_written': written}
+
 def handle_website_publishing(video: Dict[str, Any]) -> Dict[str, Any]:
     """
     Handle publishing a video to the website.
-    For now, this just returns a dummy URL and embed code.
-    
+    Renders the video's page and embed snippet into the static site and
+    updates the index and sitemap pages it appears on.
+
     Args:
         video: Dictionary containing video information
-        
+
     Returns:
         Dict[str, Any]: Result dictionary containing:
             - success: bool indicating if publishing succeeded
@@ -26,24 +284,28 @@ def handle_website_publishing(video: Dict[str, Any]) -> Dict[str, Any]:
             - error: Error message if success is False
     """
     try:
-        # For now, just return dummy values
-        # In a real implementation, this would:
-        # 1. Upload the video to a CDN
-        # 2. Create a page for the video
-        # 3. Return the real URL and embed code
-        
         video_id = video.get('video_id') or video.get('transcript_id')
         if not video_id:
             raise ValueError("No video_id or transcript_id found in video data")
-            
+
+        bucket, path = parse_storage_path(video.get('storage_path'))
+        if not bucket:
+            raise ValueError(f"Invalid storage path for video {video_id}: {video.get('storage_path')}")
+
+        video_url = get_public_video_url(bucket, path)
+        embed_code = get_video_embed_code(video_url)
+
+        entry = StaticSite().publish({**video, 'video_id': video_id}, video_url, embed_code)
+        logger.info("Published video %s to website (%s files written)", video_id, entry['files_written'])
+
         return {
             'success': True,
-            'publish_url': f"https://example.com/videos/{video_id}",
-            'embed_code': f'<iframe src="https://example.com/embed/{video_id}"></iframe>'
+            'publish_url': entry['url'],
+            'embed_code': embed_code
         }
-        
+
     except Exception as e:
-        logger.error(f"Error publishing to website: {str(e)}")
+        logger.error("Error publishing to website: %s", e)
         return {
             'success': False,
             'error': str(e)
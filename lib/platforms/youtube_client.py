@@ -4,31 +4,65 @@ Uses secure credential-based authentication with refresh token.
 """
 
 import os
+import json
 from typing import Dict, Any
 import logging
 from datetime import datetime
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from dotenv import load_dotenv
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import DEFAULT_CHUNK_SIZE, MediaFileUpload
 
-# Load environment variables
-load_dotenv()
+from lib.utils.env import load_env
+from lib.utils.tracing import tracer
+from .youtube_token_store import get_token_store
 
 logger = logging.getLogger(__name__)
 
+# Bytes sent per resumable upload request
+UPLOAD_CHUNK_SIZE = int(os.getenv("YOUTUBE_UPLOAD_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+
+class _StatusRecorder:
+    """Wraps the client's http object to remember the status of the last response."""
+
+    def __init__(self, http):
+        self.http = http
+        self.status = None
+
+    def request(self, *args, **kwargs):
+        resp, content = self.http.request(*args, **kwargs)
+        self.status = resp.status
+        return resp, content
+
 def get_youtube_credentials() -> Credentials:
     """
     Create YouTube API credentials using environment variables.
     Uses refresh token for secure, headless authentication.
+
+    The access token comes from the node-wide token store, so workers
+    share one cached token instead of each refreshing their own.
     """
-    return Credentials(
-        None,  # No access token needed, will be refreshed
-        refresh_token=os.getenv('YOUTUBE_REFRESH_TOKEN'),
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=os.getenv('YOUTUBE_CLIENT_ID'),
-        client_secret=os.getenv('YOUTUBE_CLIENT_SECRET')
-    )
+    load_env()
+    return get_token_store().get_credentials()
+
+def get_youtube_service():
+    """
+    Build a YouTube Data API v3 service with the shared credentials.
+
+    ``YOUTUBE_API_URL`` replaces the API root (including the upload
+    endpoint), e.g. to point the client at a stand-in server in benchmarks.
+    """
+    credentials = get_youtube_credentials()
+    api_url = os.getenv("YOUTUBE_API_URL")
+    if not api_url:
+        return build('youtube', 'v3', credentials=credentials, cache_discovery=False)
+
+    # Uploads are addressed from the discovery document's rootUrl rather
+    # than the client's api_endpoint, so rewrite the document itself
+    document = json.loads(get_static_doc('youtube', 'v3'))
+    document['rootUrl'] = api_url.rstrip('/') + '/'
+    document['baseUrl'] = document['rootUrl'] + document['servicePath']
+    return build_from_document(document, credentials=credentials)
 
 def upload_to_youtube(video_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -46,12 +80,13 @@ def upload_to_youtube(video_data: Dict[str, Any]) -> Dict[str, Any]:
         Dict[str, Any]: Upload result with:
             - success: bool
             - video_id: str (if successful)
+            - platform_video_id: str (if successful, same as video_id)
+            - publish_url: str (if successful)
             - error: str (if failed)
     """
     try:
         # Get credentials and build service
-        credentials = get_youtube_credentials()
-        youtube = build('youtube', 'v3', credentials=credentials)
+        youtube = get_youtube_service()
         
         # Prepare video metadata
         body = {
@@ -76,6 +111,7 @@ def upload_to_youtube(video_data: Dict[str, Any]) -> Dict[str, Any]:
         media = MediaFileUpload(
             video_data['file_path'],
             mimetype='video/*',
+            chunksize=UPLOAD_CHUNK_SIZE,
             resumable=True
         )
         
@@ -86,15 +122,30 @@ def upload_to_youtube(video_data: Dict[str, Any]) -> Dict[str, Any]:
             media_body=media
         )
         
-        response = request.execute()
+        # Send the file chunk by chunk (what execute() does) so each chunk is traced
+        http = _StatusRecorder(request.http)
+        response = None
+        while response is None:
+            offset = request.resumable_progress
+            with tracer.span("youtube chunk", offset=offset) as span:
+                try:
+                    _, response = request.next_chunk(http=http)
+                finally:
+                    sent = (media.size() if response is not None else request.resumable_progress) - offset
+                    span.set(http_status=http.status, bytes_sent=sent)
         
         return {
             'success': True,
-            'video_id': response['id']
+            'video_id': response['id'],
+            'platform_video_id': response['id'],
+            'publish_url': f"https://www.youtube.com/watch?v={response['id']}"
         }
         
     except Exception as e:
-        logger.error(f"YouTube upload failed: {str(e)}")
+        # A rejected token must not stay cached for the other workers
+        if getattr(getattr(e, 'resp', None), 'status', None) == 401:
+            get_token_store().invalidate()
+        logger.error("YouTube upload failed: %s", e)
         return {
             'success': False,
             'error': str(e)
@@ -0,0 +1,175 @@
+"""
+Post-publish reconciliation of YouTube uploads.
+
+Collects published YouTube rows from video_schedule whose platform status is
+not final yet, checks them with ``videos.list`` (up to 50 IDs per call, one
+quota unit each) and writes the reported status back in a single RPC call.
+"""
+
+import re
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from lib.supabase.client import supabase
+from lib.utils.rate_limiter import get_quota_limiter
+from .youtube_client import get_youtube_service
+
+logger = logging.getLogger(__name__)
+
+# videos.list accepts at most 50 IDs per request
+VIDEOS_LIST_BATCH = 50
+VIDEOS_LIST_COST = 1
+
+# Statuses that can still change and are re-checked on the next run
+PENDING_STATUSES = ('processing', 'scheduled')
+
+YOUTUBE_ID_PATTERN = re.compile(r"(?:v=|youtu\.be/|/shorts/)([A-Za-z0-9_-]{11})")
+
+def extract_youtube_id(row: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the YouTube video ID for a schedule row.
+
+    Args:
+        row: video_schedule row with platform_video_id and/or publish_url
+
+    Returns:
+        Optional[str]: YouTube video ID, or None if it cannot be determined
+    """
+    if row.get('platform_video_id'):
+        return row['platform_video_id']
+    match = YOUTUBE_ID_PATTERN.search(row.get('publish_url') or "")
+    return match.group(1) if match else None
+
+def classify_video(item: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> Dict[str, Optional[str]]:
+    """
+    Map a videos.list item to a platform status.
+
+    A private video whose ``publishAt`` is still ahead is ``scheduled``; one
+    still private after its ``publishAt`` did not go live when it should
+    have and is flagged ``publish_missed``.
+
+    Args:
+        item: Resource returned by videos.list, or None if YouTube did not return it
+        now: Current time (default: now, UTC)
+
+    Returns:
+        Dict[str, Optional[str]]: platform_status and platform_status_detail
+    """
+    if item is None:
+        return {'platform_status': 'missing', 'platform_status_detail': 'Video not returned by videos.list'}
+
+    status = item.get('status', {})
+    processing = item.get('processingDetails', {})
+    upload_status = status.get('uploadStatus')
+
+    if upload_status in ('failed', 'rejected', 'deleted'):
+        detail = status.get('failureReason') or status.get('rejectionReason')
+        return {'platform_status': upload_status, 'platform_status_detail': detail}
+    if processing.get('processingStatus') in ('failed', 'terminated'):
+        detail = processing.get('processingFailureReason')
+        return {'platform_status': 'failed', 'platform_status_detail': detail}
+    if upload_status == 'uploaded' or processing.get('processingStatus') == 'processing':
+        return {'platform_status': 'processing', 'platform_status_detail': None}
+
+    privacy = status.get('privacyStatus')
+    if privacy == 'private' and status.get('publishAt'):
+        publish_at = datetime.fromisoformat(status['publishAt'].replace('Z', '+00:00'))
+        if publish_at.tzinfo is None:
+            publish_at = publish_at.replace(tzinfo=timezone.utc)
+        if publish_at <= (now or datetime.now(timezone.utc)):
+            return {'platform_status': 'publish_missed', 'platform_status_detail': status['publishAt']}
+        return {'platform_status': 'scheduled', 'platform_status_detail': status['publishAt']}
+    if privacy in ('public', 'unlisted'):
+        return {'platform_status': 'live', 'platform_status_detail': None}
+    return {'platform_status': 'private', 'platform_status_detail': 'publishAt not set'}
+
+def fetch_pending_rows(limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    Fetch published YouTube rows whose platform status is not final.
+
+    Args:
+        limit: Maximum number of rows to reconcile in one run
+
+    Returns:
+        List[Dict[str, Any]]: Rows ordered by least recently checked first
+    """
+    pending = ",".join(f"platform_status.eq.{s}" for s in PENDING_STATUSES)
+    response = supabase.table("video_schedule") \
+        .select("id,video_id,publish_url,platform_video_id,platform_status") \
+        .eq("platform", "youtube") \
+        .eq("published", True) \
+        .or_(f"platform_status.is.null,{pending}") \
+        .order("platform_checked_at", "asc.nullsfirst") \
+        .limit(limit) \
+        .execute()
+    return response.data or []
+
+def reconcile_youtube_uploads(limit: int = 500) -> Dict[str, int]:
+    """
+    Reconcile published YouTube uploads against videos.list.
+
+    Args:
+        limit: Maximum number of rows to reconcile in one run
+
+    Returns:
+        Dict[str, int]: Number of rows per resulting platform status
+    """
+    rows = fetch_pending_rows(limit)
+    ids_by_row = {row['id']: extract_youtube_id(row) for row in rows}
+    youtube_ids = sorted({yt_id for yt_id in ids_by_row.values() if yt_id})
+    if not youtube_ids:
+        logger.info("No YouTube uploads to reconcile")
+        return {}
+
+    youtube = get_youtube_service()
+    quota_limiter = get_quota_limiter()
+    items: Dict[str, Dict[str, Any]] = {}
+    checked = set()
+
+    for start in range(0, len(youtube_ids), VIDEOS_LIST_BATCH):
+        batch = youtube_ids[start:start + VIDEOS_LIST_BATCH]
+        allowed, reason = quota_limiter.try_acquire('youtube', cost=VIDEOS_LIST_COST, use_token=False)
+        if not allowed:
+            logger.info("Stopping reconciliation early: %s", reason)
+            break
+
+        response = youtube.videos().list(
+            part="status,processingDetails",
+            id=",".join(batch),
+            maxResults=VIDEOS_LIST_BATCH
+        ).execute()
+        for item in response.get('items', []):
+            items[item['id']] = item
+        checked.update(batch)
+
+    checked_at = datetime.now(timezone.utc).isoformat()
+    updates = []
+    summary: Dict[str, int] = {}
+    for row_id, yt_id in ids_by_row.items():
+        if yt_id is None:
+            update = {'platform_status': 'missing', 'platform_status_detail': 'No YouTube video ID recorded'}
+        elif yt_id in checked:
+            update = classify_video(items.get(yt_id))
+        else:
+            continue
+
+        if update['platform_status'] in ('failed', 'rejected', 'deleted', 'missing'):
+            logger.warning(
+                "YouTube upload for schedule %s is %s: %s",
+                row_id, update['platform_status'], update['platform_status_detail']
+            )
+
+        updates.append({
+            'id': row_id,
+            'platform_video_id': yt_id,
+            'platform_checked_at': checked_at,
+            **update
+        })
+        summary[update['platform_status']] = summary.get(update['platform_status'], 0) + 1
+
+    if updates:
+        supabase.rpc("bulk_update_video_schedule", {"updates": updates}).execute()
+        logger.info("Reconciled %s YouTube uploads: %s", len(updates), summary)
+
+    return summary
@@ -0,0 +1,106 @@
+"""
+Node-wide cache for YouTube OAuth access tokens.
+
+Access tokens are cached in a file under the publisher state directory.
+Worker processes read the cached token; only when it is about to expire
+does one process take the exclusive lock and refresh it, so a node makes
+roughly one refresh per hour no matter how many workers it runs.
+"""
+
+import os
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+
+from lib.utils.local_state import state_dir, locked_file, read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+TOKEN_URI = os.getenv("YOUTUBE_TOKEN_URI", "https://oauth2.googleapis.com/token")
+
+# Refresh this many seconds before the cached token expires
+REFRESH_MARGIN = int(os.getenv("YOUTUBE_TOKEN_REFRESH_MARGIN", "300"))
+
+class YouTubeTokenStore:
+    """File-backed access token cache shared by all workers on a node."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or (state_dir() / "youtube_token.json")
+
+    def _credentials(self, token: Optional[str] = None, expiry: Optional[datetime] = None) -> Credentials:
+        return Credentials(
+            token,
+            refresh_token=os.getenv('YOUTUBE_REFRESH_TOKEN'),
+            token_uri=TOKEN_URI,
+            client_id=os.getenv('YOUTUBE_CLIENT_ID'),
+            client_secret=os.getenv('YOUTUBE_CLIENT_SECRET'),
+            expiry=expiry
+        )
+
+    def _cache_key(self) -> str:
+        # Tie the cached token to the credentials it was issued for, so
+        # rotating the refresh token or client invalidates the cache
+        material = f"{os.getenv('YOUTUBE_CLIENT_ID')}:{os.getenv('YOUTUBE_REFRESH_TOKEN')}"
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _load_cached(self) -> Optional[Credentials]:
+        cached = read_json(self.path)
+        if not cached or cached.get("key") != self._cache_key():
+            return None
+        try:
+            expiry = datetime.fromisoformat(cached["expiry"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        # google-auth compares expiry as naive UTC
+        if expiry - timedelta(seconds=REFRESH_MARGIN) <= datetime.utcnow():
+            return None
+        return self._credentials(cached.get("token"), expiry)
+
+    def get_credentials(self) -> Credentials:
+        """
+        Get credentials with a valid access token.
+
+        Returns:
+            Credentials: Credentials carrying a cached or freshly refreshed token
+        """
+        with locked_file(self.path, shared=True):
+            credentials = self._load_cached()
+        if credentials:
+            return credentials
+
+        with locked_file(self.path):
+            # Another process may have refreshed while we waited for the lock
+            credentials = self._load_cached()
+            if credentials:
+                return credentials
+
+            logger.info("Refreshing YouTube access token")
+            credentials = self._credentials()
+            credentials.refresh(Request())
+            write_json_atomic(self.path, {
+                "key": self._cache_key(),
+                "token": credentials.token,
+                "expiry": credentials.expiry.isoformat() if credentials.expiry else None
+            })
+            return credentials
+
+    def invalidate(self) -> None:
+        """Drop the cached token, e.g. after the API rejected it."""
+        with locked_file(self.path):
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+_store: Optional[YouTubeTokenStore] = None
+
+def get_token_store() -> YouTubeTokenStore:
+    """Get the process-wide YouTube token store."""
+    global _store
+    if _store is None:
+        _store = YouTubeTokenStore()
+    return _store
@@ -2,19 +2,16 @@
 Supabase authentication utilities.
 """
 
-import os
-from .supabase_client import supabase
+from .client import get_supabase_config
 
 def authenticate_service():
     """
-    Authenticate with Supabase using service role credentials.
+    Check that service role credentials are configured.
+
+    Every request made through lib.supabase.client already authenticates
+    with the service role key.
+
+    Raises:
+        ValueError: If the credentials are missing
     """
-    service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    if not service_role_key:
-        raise ValueError(
-            "Missing SUPABASE_SERVICE_ROLE_KEY. "
-            "Please ensure it is set in .env file"
-        )
-    
-    # For service role auth, we need to use a special header
-    supabase.postgrest.auth(service_role_key)
+    get_supabase_config()
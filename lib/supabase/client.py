@@ -1,130 +1,512 @@
 """
-Supabase client configuration.
+Supabase data access.
+
+Every table query, RPC call and storage request goes through the one
+``supabase`` client defined here. It sends requests over a single pooled
+httpx connection pool, retries transient failures, and records request
+time, errors, retries and bytes per method and table/RPC in
+``lib.utils.metrics``.
+
+Credentials are read and httpx is imported on first request, so importing
+this module has no side effects.
 """
 
 import os
-import httpx
+import time
 import logging
-from typing import Dict, Any
+import threading
+from urllib.parse import quote
+from typing import Dict, Any, List, Optional, Tuple, BinaryIO
+
+from lib.utils.env import load_env
+from lib.utils.metrics import metrics
+from lib.utils.tracing import tracer
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Get environment variables
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+# Connection pool and retry settings
+POOL_MAX_CONNECTIONS = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "10"))
+REQUEST_TIMEOUT = float(os.getenv("SUPABASE_REQUEST_TIMEOUT", "30"))
+STORAGE_TIMEOUT = float(os.getenv("SUPABASE_STORAGE_TIMEOUT", "300"))
+MAX_RETRIES = int(os.getenv("SUPABASE_MAX_RETRIES", "2"))
+
+# Safe to retry for any request: the server did not process it
+RETRY_ANY_STATUS = {429}
+# Only retried for reads, which cannot apply twice
+RETRY_READ_STATUS = {502, 503, 504}
+READ_METHODS = {"GET", "HEAD"}
+
+def get_supabase_config() -> Tuple[str, str]:
+    """
+    Get the Supabase URL and service role key from the environment.
+
+    SUPABASE_SERVICE_KEY is accepted as an older name for the key.
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+    Raises:
+        ValueError: If SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY is not set
+    """
+    load_env()
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_SERVICE_KEY")
+    if not url or not key:
+        raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+    return url.rstrip("/"), key
 
 def get_supabase_headers(*, include_representation: bool = True) -> Dict[str, str]:
     """Get headers for Supabase requests with service role authentication."""
     headers = {
-        "apikey": SUPABASE_SERVICE_ROLE_KEY,
-        "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+        "apikey": supabase.key,
+        "Authorization": f"Bearer {supabase.key}",
         "Content-Type": "application/json"
     }
     if include_representation:
         headers["Prefer"] = "return=representation"
     return headers
 
+class SupabaseError(Exception):
+    """
+    Error response from PostgREST or Storage.
+
+    Attributes:
+        status_code: HTTP status
+        code: PostgREST/Postgres error code (e.g. "PGRST202", "23505"), if any
+        message: Error message from the response body
+    """
+
+    def __init__(self, status_code: int, message: str, code: Optional[str] = None, details: Any = None):
+        super().__init__(f"{status_code} {code + ' ' if code else ''}{message}")
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+        self.details = details
+
+    @classmethod
+    def from_response(cls, response) -> 'SupabaseError':
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            return cls(response.status_code, response.text[:500] or response.reason_phrase)
+        return cls(
+            response.status_code,
+            body.get("message") or body.get("error") or response.reason_phrase,
+            code=body.get("code"),
+            details=body.get("details")
+        )
+
+class Response:
+    """Result of an executed query."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Any):
+        self.data = data
+
+def _record_request(
+    operation: str,
+    seconds: float,
+    error: bool,
+    retries: int,
+    sent: int = 0,
+    received: int = 0,
+    status: Optional[int] = None
+) -> None:
+    """Record one request in the metrics, labelled e.g. method="get", target="video_schedule", and as a trace span."""
+    method, _, target = operation.partition(":")
+    tracer.record(
+        f"supabase {operation}", seconds,
+        http_status=status, retries=retries, bytes_sent=sent, bytes_received=received, error=error or None
+    )
+    metrics.observe("supabase_request_seconds", seconds, method=method, target=target)
+    if error:
+        metrics.inc("supabase_request_errors_total", method=method, target=target)
+    if retries:
+        metrics.inc("supabase_request_retries_total", retries, method=method, target=target)
+    if sent:
+        metrics.inc("supabase_bytes_total", sent, direction="sent", target=target)
+    if received:
+        metrics.inc("supabase_bytes_total", received, direction="received", target=target)
+
 class SupabaseClient:
-    """Simple Supabase client for database operations."""
-    
-    def __init__(self, url: str, key: str):
-        self.url = url
-        self.key = key
-        
+    """Supabase client for table queries, RPC calls and storage."""
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None):
+        # Missing values are read from the environment on first use
+        self._url = url
+        self._key = key
+        self._http = None
+        self._http_lock = threading.Lock()
+        self.storage = Storage(self)
+
+    def _configure(self) -> None:
+        env_url, env_key = get_supabase_config()
+        self._url = self._url or env_url
+        self._key = self._key or env_key
+
+    @property
+    def url(self) -> str:
+        if not self._url:
+            self._configure()
+        return self._url
+
+    @property
+    def key(self) -> str:
+        if not self._key:
+            self._configure()
+        return self._key
+
+    @property
+    def http(self):
+        """The shared httpx.Client, created on first request."""
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    import httpx
+                    self._http = httpx.Client(
+                        base_url=self.url,
+                        headers={"apikey": self.key, "Authorization": f"Bearer {self.key}"},
+                        limits=httpx.Limits(
+                            max_connections=POOL_MAX_CONNECTIONS,
+                            max_keepalive_connections=POOL_MAX_KEEPALIVE
+                        ),
+                        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0)
+                    )
+        return self._http
+
+    def close(self) -> None:
+        """Close pooled connections; the next request opens a new pool."""
+        with self._http_lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
     def table(self, name: str) -> 'TableQuery':
         """Create a query for the given table."""
         return TableQuery(self, name)
 
+    def rpc(self, name: str, params: Dict[str, Any] = None) -> 'RpcQuery':
+        """Create a call to the given Postgres function."""
+        return RpcQuery(self, name, params or {})
+
+    def request(self, method: str, path: str, operation: str, stream: bool = False, **kwargs):
+        """
+        Send a request through the shared pool, retrying transient failures.
+
+        Connection failures and 429 responses are retried for every method;
+        502/503/504 and read timeouts only for GET/HEAD.
+
+        Args:
+            method: HTTP method
+            path: Path under the project URL, e.g. "/rest/v1/video_schedule"
+            operation: "<method>:<table or RPC>" the request is recorded under
+            stream: Return an open streaming response (caller must close it)
+            **kwargs: Passed to httpx (params, json, content, headers, timeout)
+
+        Returns:
+            httpx.Response: Successful response
+
+        Raises:
+            SupabaseError: If the response is an error
+            httpx.HTTPError: If the request could not be completed
+        """
+        import httpx
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            response = None
+            try:
+                request = self.http.build_request(method, path, **kwargs)
+                response = self.http.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                error = e
+            except (httpx.ReadTimeout, httpx.RemoteProtocolError) as e:
+                if method not in READ_METHODS:
+                    _record_request(operation, time.perf_counter() - started, True, attempt)
+                    raise
+                error = e
+            else:
+                retryable = response.status_code in RETRY_ANY_STATUS or (
+                    method in READ_METHODS and response.status_code in RETRY_READ_STATUS
+                )
+                if response.is_success or not retryable:
+                    break
+                error = None
+
+            if attempt >= MAX_RETRIES:
+                if error is not None:
+                    _record_request(operation, time.perf_counter() - started, True, attempt)
+                    raise error
+                break
+            if response is not None:
+                response.close()
+            delay = 0.5 * 2 ** attempt
+            retry_after = response.headers.get("retry-after") if response is not None else None
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            logger.warning("Retrying %s in %.1fs (attempt %s)", operation, delay, attempt + 1)
+            time.sleep(delay)
+            attempt += 1
+
+        _record_request(
+            operation,
+            time.perf_counter() - started,
+            not response.is_success,
+            attempt,
+            sent=len(request.content),
+            received=0 if stream else response.num_bytes_downloaded,
+            status=response.status_code
+        )
+        if not response.is_success:
+            if stream:
+                response.read()
+                response.close()
+            error = SupabaseError.from_response(response)
+            logger.warning("%s failed: %s", operation, error)
+            raise error
+        return response
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+class RpcQuery:
+    """Call builder for Postgres functions exposed through PostgREST."""
+
+    def __init__(self, client: SupabaseClient, name: str, params: Dict[str, Any]):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self) -> Response:
+        """Execute the function call."""
+        response = self.client.request(
+            "POST",
+            f"/rest/v1/rpc/{self.name}",
+            f"rpc:{self.name}",
+            json=self.params
+        )
+        return Response(response.json() if response.content else None)
+
 class TableQuery:
     """Query builder for Supabase tables."""
-    
+
     def __init__(self, client: SupabaseClient, table: str):
         self.client = client
         self.table = table
         self.query_params: Dict[str, Any] = {}
         self.select_cols = "*"
-        self.filters = {}
-        
+        self.method = "GET"
+        self.body: Any = None
+        self.prefer: List[str] = []
+        self.returning = True
+
     def select(self, columns: str) -> 'TableQuery':
-        """Select specific columns."""
+        """Select specific columns (of the rows read or written)."""
         self.select_cols = columns
         return self
-        
+
     def eq(self, column: str, value: Any) -> 'TableQuery':
         """Add equals filter."""
-        self.filters[column] = value
-        self.query_params[column] = f"eq.{value}"
+        self.query_params[column] = f"eq.{_format_value(value)}"
         return self
-        
+
     def lte(self, column: str, value: Any) -> 'TableQuery':
         """Add less than or equal filter."""
-        self.query_params[column] = f"lte.{value}"
+        self.query_params[column] = f"lte.{_format_value(value)}"
         return self
-        
+
+    def in_(self, column: str, values: List[Any]) -> 'TableQuery':
+        """Add an IN filter."""
+        self.query_params[column] = f"in.({','.join(_format_value(v) for v in values)})"
+        return self
+
+    def or_(self, filters: str) -> 'TableQuery':
+        """Add a PostgREST OR filter, e.g. 'status.is.null,status.eq.processing'."""
+        self.query_params["or"] = f"({filters})"
+        return self
+
+    def limit(self, count: int) -> 'TableQuery':
+        """Limit the number of returned rows."""
+        self.query_params["limit"] = str(count)
+        return self
+
+    def offset(self, count: int) -> 'TableQuery':
+        """Skip the first rows, e.g. to page through results with limit()."""
+        self.query_params["offset"] = str(count)
+        return self
+
     def order(self, column: str, order: str = "asc") -> 'TableQuery':
         """Add order by clause."""
         self.query_params["order"] = f"{column}.{order}"
         return self
-        
+
     def update(self, data: Dict[str, Any]) -> 'TableQuery':
         """Set update data."""
-        self.update_data = data
+        self.method = "PATCH"
+        self.body = data
+        return self
+
+    def insert(self, data: Any, returning: bool = True) -> 'TableQuery':
+        """Set insert data (a row or a list of rows)."""
+        self.method = "POST"
+        self.body = data
+        self.returning = returning
+        return self
+
+    def upsert(self, data: Any, on_conflict: Optional[str] = None, returning: bool = True) -> 'TableQuery':
+        """Insert rows, updating existing rows that conflict on the given unique columns."""
+        self.insert(data, returning)
+        self.prefer.append("resolution=merge-duplicates")
+        if on_conflict:
+            self.query_params["on_conflict"] = on_conflict
+        return self
+
+    def delete(self) -> 'TableQuery':
+        """Delete the rows matching the filters."""
+        self.method = "DELETE"
         return self
-        
-    def execute(self) -> Any:
+
+    def execute(self) -> Response:
         """Execute the query."""
-        url = f"{self.client.url}/rest/v1/{self.table}"
-        
-        # Handle SELECT queries
-        if not hasattr(self, 'update_data'):
-            try:
-                response = httpx.get(
-                    url, 
-                    headers=get_supabase_headers(include_representation=False), 
-                    params=self.query_params
-                )
-                response.raise_for_status()
-                return type('Response', (), {'data': response.json()})
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to execute SELECT query: {str(e)}")
-                logger.error(f"Response text: {e.response.text if hasattr(e, 'response') else 'No response'}")
-                raise
-            
-        # Handle UPDATE queries
-        else:
-            # Convert query params to filter string
-            filter_params = {}
-            for column, value in self.filters.items():
-                filter_params[column] = f"eq.{value}"
-            
+        params = dict(self.query_params)
+        prefer = list(self.prefer)
+        if self.method == "GET" or self.returning:
+            params["select"] = self.select_cols
+        if self.method != "GET":
+            prefer.append("return=representation" if self.returning else "return=minimal")
+
+        response = self.client.request(
+            self.method,
+            f"/rest/v1/{self.table}",
+            f"{self.method.lower()}:{self.table}",
+            params=params,
+            json=self.body,
+            headers={"Prefer": ",".join(prefer)} if prefer else None
+        )
+        data = response.json() if response.content else []
+        if self.method == "PATCH" and not data and self.returning:
+            logger.error("Update of %s matched no rows. This may indicate a policy issue.", self.table)
+        return Response(data)
+
+class Storage:
+    """Supabase Storage buckets."""
+
+    def __init__(self, client: SupabaseClient):
+        self.client = client
+
+    def from_(self, bucket: str) -> 'StorageBucket':
+        """Get a bucket's files."""
+        return StorageBucket(self.client, bucket)
+
+    def list_buckets(self) -> List[Dict[str, Any]]:
+        """List all buckets."""
+        return self.client.request("GET", "/storage/v1/bucket", "storage:list_buckets").json()
+
+    def get_bucket(self, bucket: str) -> Optional[Dict[str, Any]]:
+        """Get a bucket, or None if it does not exist."""
+        try:
+            return self.client.request("GET", f"/storage/v1/bucket/{bucket}", "storage:get_bucket").json()
+        except SupabaseError as e:
+            # Storage reports a missing bucket as 400 or 404
+            if e.status_code in (400, 404):
+                return None
+            raise
+
+    def create_bucket(self, bucket: str, public: bool = False, file_size_limit: Optional[int] = None) -> None:
+        """Create a bucket."""
+        body = {"id": bucket, "name": bucket, "public": public}
+        if file_size_limit:
+            body["file_size_limit"] = file_size_limit
+        self.client.request("POST", "/storage/v1/bucket", "storage:create_bucket", json=body)
+
+class StorageBucket:
+    """Files in one storage bucket."""
+
+    def __init__(self, client: SupabaseClient, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def _object_path(self, path: str) -> str:
+        return f"/storage/v1/object/{self.bucket}/{quote(path.lstrip('/'))}"
+
+    def upload(self, path: str, content: bytes, content_type: str, upsert: bool = False) -> None:
+        """
+        Upload a file.
+
+        Args:
+            path: Path within the bucket
+            content: File content
+            content_type: MIME type
+            upsert: Replace an existing file instead of failing
+        """
+        self.client.request(
+            "POST",
+            self._object_path(path),
+            "storage:upload",
+            content=content,
+            headers={"Content-Type": content_type, "x-upsert": "true" if upsert else "false"},
+            timeout=STORAGE_TIMEOUT
+        )
+
+    def download(self, path: str, destination: Optional[BinaryIO] = None) -> Optional[bytes]:
+        """
+        Download a file.
+
+        Args:
+            path: Path within the bucket
+            destination: Binary file to stream the content into; if omitted
+                the content is returned
+
+        Returns:
+            Optional[bytes]: Content, or None when streamed to destination
+        """
+        if destination is None:
+            return self.client.request(
+                "GET", self._object_path(path), "storage:download", timeout=STORAGE_TIMEOUT
+            ).content
+        with tracer.span("download", bucket=self.bucket) as span:
+            response = self.client.request(
+                "GET", self._object_path(path), "storage:download", stream=True, timeout=STORAGE_TIMEOUT
+            )
             try:
-                # Use PATCH for update
-                response = httpx.patch(
-                    url,
-                    headers=get_supabase_headers(),
-                    params=filter_params,
-                    json=self.update_data
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                if not data:
-                    logger.error(f"Update succeeded but returned no data. This may indicate a policy issue.")
-                    logger.error(f"Update params: {filter_params}")
-                    logger.error(f"Update data: {self.update_data}")
-                
-                return type('Response', (), {'data': data})
-                
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to execute UPDATE query: {str(e)}")
-                logger.error(f"Response text: {e.response.text if hasattr(e, 'response') else 'No response'}")
-                logger.error(f"Update params: {filter_params}")
-                logger.error(f"Update data: {self.update_data}")
-                raise
-            
-# Create global client instance
-supabase = SupabaseClient(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+                for chunk in response.iter_bytes(1024 * 1024):
+                    destination.write(chunk)
+            finally:
+                response.close()
+                metrics.inc("supabase_bytes_total", response.num_bytes_downloaded, direction="received", target="download")
+                span.set(http_status=response.status_code, bytes_received=response.num_bytes_downloaded)
+        return None
+
+    def list(self, prefix: str = "", limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """List files under a prefix."""
+        return self.client.request(
+            "POST",
+            f"/storage/v1/object/list/{self.bucket}",
+            "storage:list",
+            json={
+                "prefix": prefix,
+                "limit": limit,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"}
+            }
+        ).json()
+
+    def remove(self, paths: List[str]) -> None:
+        """Delete files."""
+        self.client.request(
+            "DELETE",
+            f"/storage/v1/object/{self.bucket}",
+            "storage:remove",
+            json={"prefixes": paths}
+        )
+
+    def get_public_url(self, path: str) -> str:
+        """Public URL of a file in a public bucket."""
+        return f"{self.client.url}/storage/v1/object/public/{self.bucket}/{quote(path.lstrip('/'))}"
+
+# Create global client instance (configured on first request)
+supabase = SupabaseClient()
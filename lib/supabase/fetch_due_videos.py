@@ -3,24 +3,207 @@ Functions for fetching videos scheduled for publishing.
 """
 
 import os
+import socket
 import logging
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from .client import supabase
+from .client import supabase, SupabaseError
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columns the publisher needs from a due row; never select("*") so wide
+# columns added to video_schedule do not travel with every poll
+DUE_VIDEO_COLUMNS = (
+    "id,video_id,user_id,platform,video_type,title,description,tags,scheduled_at"
+)
+
+# Rows claimed per run and how long a claim holds before another worker may
+# take the row over (covers workers that die mid-run)
+CLAIM_BATCH_SIZE = int(os.getenv("CLAIM_BATCH_SIZE", "50"))
+CLAIM_LEASE_SECONDS = int(os.getenv("CLAIM_LEASE_SECONDS", "900"))
+
+# Share of each batch per user_id ("<user_id>=<weight>,..."; unlisted users
+# weigh 1) and the most rows of one user claimed at once across workers
+TENANT_WEIGHTS_ENV = "TENANT_WEIGHTS"
+TENANT_MAX_IN_FLIGHT_ENV = "TENANT_MAX_IN_FLIGHT"
+
+# None until the first call tells us whether claim_due_videos is installed
+_claim_rpc_available: Optional[bool] = None
+
+# False once the installed claim_due_videos turned out to predate the
+# tenant_weights/max_per_tenant parameters
+_tenant_params_supported = True
+
+def worker_id() -> str:
+    """Identify this publisher process in claimed_by."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def tenant_weights() -> Dict[str, float]:
+    """
+    Parse TENANT_WEIGHTS, e.g. ``"<user_id>=2,<user_id>=0.5"``.
+
+    Returns:
+        Dict[str, float]: Weight by user_id; malformed entries are skipped
+    """
+    weights = {}
+    for entry in os.getenv(TENANT_WEIGHTS_ENV, "").split(","):
+        if not entry.strip():
+            continue
+        user_id, _, weight = entry.partition("=")
+        try:
+            weights[user_id.strip()] = float(weight)
+        except ValueError:
+            logger.warning("Ignoring malformed %s entry: %s", TENANT_WEIGHTS_ENV, entry)
+    return weights
+
+def tenant_max_in_flight() -> Optional[int]:
+    """TENANT_MAX_IN_FLIGHT, or None when users are not capped."""
+    value = os.getenv(TENANT_MAX_IN_FLIGHT_ENV)
+    return int(value) if value else None
+
+def fair_order(videos: List[Dict[str, Any]], weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """
+    Order due rows by weighted round-robin across user_id.
+
+    Each user's rows keep their scheduled_at order; the n-th row of a user
+    with weight w takes its turn at n / w, ties going to the older row. This
+    is the order claim_due_videos picks rows in.
+
+    Args:
+        videos: Due rows
+        weights: Weight by user_id (default 1)
+
+    Returns:
+        List[Dict[str, Any]]: The rows in publishing order
+    """
+    weights = weights or {}
+    ranks: Dict[Any, int] = {}
+    keyed = []
+    for video in sorted(videos, key=lambda v: (v['scheduled_at'], str(v['id']))):
+        user_id = video.get('user_id')
+        ranks[user_id] = rank = ranks.get(user_id, 0) + 1
+        weight = max(weights.get(str(user_id), 1.0), 0.001)
+        keyed.append((rank / weight, video['scheduled_at'], str(video['id']), video))
+    keyed.sort(key=lambda item: item[:3])
+    return [item[3] for item in keyed]
+
+def cap_per_tenant(videos: List[Dict[str, Any]], cap: Optional[int]) -> List[Dict[str, Any]]:
+    """Keep at most ``cap`` rows of each user, in order."""
+    if cap is None:
+        return videos
+    counts: Dict[Any, int] = {}
+    kept = []
+    for video in videos:
+        user_id = video.get('user_id')
+        counts[user_id] = counts.get(user_id, 0) + 1
+        if counts[user_id] <= cap:
+            kept.append(video)
+    return kept
+
+def claim_due_videos(limit: int = CLAIM_BATCH_SIZE) -> Optional[List[Dict[str, Any]]]:
+    """
+    Claim due videos through the claim_due_videos RPC.
+    
+    Rows are shared between users by weighted round-robin (TENANT_WEIGHTS),
+    with at most TENANT_MAX_IN_FLIGHT of one user's rows claimed at once.
+    Claimed rows come back with bucket, object_path (the transcript's
+    file_path) and storage_path already resolved from transcript_files, and are hidden from other workers until
+    released or the lease expires.
+    
+    Args:
+        limit: Maximum number of rows to claim
+        
+    Returns:
+        Optional[List[Dict[str, Any]]]: Claimed rows, or None if the RPC is not installed
+    """
+    global _claim_rpc_available, _tenant_params_supported
+    if _claim_rpc_available is False:
+        return None
+        
+    params = {
+        "max_rows": limit,
+        "worker": worker_id(),
+        "lease_seconds": CLAIM_LEASE_SECONDS
+    }
+    # Only sent when configured so the function's defaults (equal weights,
+    # no cap) apply otherwise
+    tenant_params = {}
+    weights = tenant_weights()
+    if weights:
+        tenant_params["tenant_weights"] = weights
+    max_in_flight = tenant_max_in_flight()
+    if max_in_flight is not None:
+        tenant_params["max_per_tenant"] = max_in_flight
+
+    try:
+        try:
+            response = supabase.rpc(
+                "claim_due_videos",
+                {**params, **tenant_params} if _tenant_params_supported else params
+            ).execute()
+        except SupabaseError as e:
+            if e.status_code != 404 or not tenant_params or not _tenant_params_supported:
+                raise
+            # PostgREST finds no function with these parameters: the fair
+            # claim migration (20250415) is not applied. Keep claiming rows
+            # rather than dropping to unclaimed polling.
+            logger.warning(
+                "claim_due_videos does not accept %s; apply migration 20250415_fair_claim_due_videos. "
+                "Claiming oldest rows first without per-tenant weights or caps",
+                ", ".join(tenant_params)
+            )
+            _tenant_params_supported = False
+            response = supabase.rpc("claim_due_videos", params).execute()
+    except SupabaseError as e:
+        if e.status_code == 404:
+            logger.warning("claim_due_videos RPC not found, falling back to querying video_schedule")
+            _claim_rpc_available = False
+            return None
+        raise
+        
+    _claim_rpc_available = True
+    return response.data or []
+
+def release_claims(schedule_ids: List[str]) -> int:
+    """
+    Release claims on rows that were not published so the next run retries them.
+    
+    Args:
+        schedule_ids: video_schedule IDs claimed by this run
+        
+    Returns:
+        int: Number of claims released
+    """
+    if not schedule_ids or not _claim_rpc_available:
+        return 0
+    try:
+        response = supabase.rpc("release_video_claims", {"ids": schedule_ids}).execute()
+        return response.data or 0
+    except Exception as e:
+        # Unreleased claims expire after CLAIM_LEASE_SECONDS
+        logger.error("Error releasing video claims: %s", e)
+        return 0
+
 def fetch_due_videos() -> List[Dict[str, Any]]:
     """
     Fetch videos that are due for publishing.
     
+    Uses the claim_due_videos RPC when it is installed, otherwise queries
+    video_schedule directly (rows then lack bucket/object_path). Either way
+    the rows come back in fair_order, so one user's burst does not hold up
+    everyone else's videos.
+    
     Returns:
         List[Dict[str, Any]]: List of video dictionaries
     """
     try:
+        weights = tenant_weights()
+        videos = claim_due_videos()
+        if videos is not None:
+            logger.info("Claimed %s videos due for publishing", len(videos))
+            return fair_order(videos, weights)
+            
         # Get current time in UTC
         now = datetime.now(timezone.utc).isoformat()
         
@@ -28,16 +211,17 @@ def fetch_due_videos() -> List[Dict[str, Any]]:
         # 1. Not yet published
         # 2. Scheduled time is in the past
         response = supabase.table("video_schedule") \
-            .select("*") \
+            .select(DUE_VIDEO_COLUMNS) \
             .eq("published", False) \
             .lte("scheduled_at", now) \
             .execute()
             
-        videos = response.data
-        logger.info(f"Found {len(videos)} videos due for publishing")
+        # Without claims the cap applies per run rather than across workers
+        videos = cap_per_tenant(fair_order(response.data, weights), tenant_max_in_flight())
+        logger.info("Found %s videos due for publishing", len(videos))
         
         return videos
         
     except Exception as e:
-        logger.error(f"Error fetching due videos: {str(e)}")
+        logger.error("Error fetching due videos: %s", e)
         return []
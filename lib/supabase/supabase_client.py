@@ -1,23 +1,14 @@
 """
 Supabase client configuration and initialization.
-"""
-
-import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
 
-# Load environment variables
-load_dotenv()
+Kept for existing imports: the client is the shared data-access client from
+``lib.supabase.client``.
+"""
 
-# Initialize Supabase client with service role key for background jobs
-url: str = os.getenv("SUPABASE_URL")
-key: str = os.getenv("SUPABASE_SERVICE_KEY")  # Use service role key for background jobs
+from .client import SupabaseClient, supabase
 
-if not url or not key:
-    raise ValueError(
-        "Missing Supabase credentials. "
-        "Please ensure SUPABASE_URL and SUPABASE_SERVICE_KEY are set in .env file"
-    )
+def get_supabase() -> SupabaseClient:
+    """Get the process-wide Supabase client."""
+    return supabase
 
-# Create client with service role key - this allows us to bypass RLS
-supabase: Client = create_client(url, key)
+__all__ = ['get_supabase', 'supabase']
@@ -2,15 +2,9 @@
 Utility functions for working with Supabase storage.
 """
 
-import os
 from typing import Optional
-from urllib.parse import quote
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
+from .client import supabase
 
 def get_public_video_url(bucket: str, path: str) -> str:
     """
@@ -27,9 +21,8 @@ def get_public_video_url(bucket: str, path: str) -> str:
         >>> get_public_video_url('videos', 'user123/video1.mp4')
         'https://your-project.supabase.co/storage/v1/object/public/videos/user123/video1.mp4'
     """
-    # URL encode the path to handle special characters
-    encoded_path = quote(path)
-    return f"{SUPABASE_URL}/storage/v1/object/public/{bucket}/{encoded_path}"
+    # The path is URL encoded to handle special characters
+    return supabase.storage.from_(bucket).get_public_url(path)
 
 def get_video_embed_code(video_url: str, width: int = 640, height: int = 360) -> str:
     """
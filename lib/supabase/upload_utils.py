@@ -3,48 +3,55 @@ Utilities for uploading files to Supabase storage.
 """
 
 import os
-from pathlib import Path
 from typing import Optional, List
-from .supabase_client import supabase
+from .client import supabase
 
 def get_or_create_bucket(bucket: str) -> None:
     """
     Get a bucket if it exists, create if it doesn't.
-    Handles RLS policies gracefully.
     
     Args:
         bucket: Bucket name to check/create
     """
     try:
-        # Try to get bucket info first
-        buckets = supabase.storage.list_buckets()
-        bucket_exists = any(b['name'] == bucket for b in buckets)
-        
-        if not bucket_exists:
-            # If bucket doesn't exist, try to create it
-            try:
-                supabase.storage.create_bucket(
-                    bucket,
-                    options={'public': True}  # Make bucket public by default
-                )
-            except Exception as create_error:
-                # If creation fails due to permissions, try to use existing bucket
-                if 'Unauthorized' in str(create_error):
-                    # Just verify we can access the bucket
-                    supabase.storage.from_(bucket).list()
-                else:
-                    raise create_error
-                    
+        if supabase.storage.get_bucket(bucket) is None:
+            supabase.storage.create_bucket(bucket, public=True)  # Make bucket public by default
     except Exception as e:
-        if 'Unauthorized' in str(e):
-            # If we can't list buckets due to permissions, try to use the bucket directly
-            try:
-                # Verify we can access the bucket
-                supabase.storage.from_(bucket).list()
-            except Exception as access_error:
-                raise Exception(f"Cannot access bucket '{bucket}': {str(access_error)}")
-        else:
-            raise Exception(f"Failed to ensure bucket exists: {str(e)}")
+        raise Exception(f"Failed to ensure bucket exists: {str(e)}")
+
+def upload_bytes(
+    content: bytes,
+    bucket: str,
+    remote_path: str,
+    content_type: str,
+    make_public: bool = False
+) -> Optional[str]:
+    """
+    Upload in-memory content to Supabase storage, replacing any existing file.
+    
+    Args:
+        content: File content
+        bucket: Storage bucket name
+        remote_path: Path within bucket
+        content_type: MIME type of the content
+        make_public: Return the file's public URL (the bucket must be public)
+        
+    Returns:
+        str: Public URL if make_public=True, None otherwise
+        
+    Raises:
+        Exception: If upload fails
+    """
+    # Ensure remote path has no leading slash
+    remote_path = remote_path.lstrip('/')
+    
+    storage = supabase.storage.from_(bucket)
+    storage.upload(remote_path, content, content_type, upsert=True)
+    
+    if make_public:
+        return storage.get_public_url(remote_path)
+        
+    return None
 
 def upload_file(
     local_path: str,
@@ -74,9 +81,6 @@ def upload_file(
         if not os.path.exists(local_path):
             raise FileNotFoundError(f"Local file not found: {local_path}")
             
-        # Ensure remote path has no leading slash
-        remote_path = remote_path.lstrip('/')
-        
         # Read file content
         with open(local_path, 'rb') as f:
             file_content = f.read()
@@ -84,43 +88,7 @@ def upload_file(
         # Get content type
         content_type = "text/markdown" if file_type == "manifest" else "application/octet-stream"
             
-        # Upload to Supabase
-        try:
-            result = supabase.storage \
-                .from_(bucket) \
-                .upload(
-                    path=remote_path,
-                    file=file_content,
-                    file_options={"content-type": content_type}
-                )
-                
-        except Exception as upload_error:
-            # If file exists, try to update it
-            if "already exists" in str(upload_error):
-                result = supabase.storage \
-                    .from_(bucket) \
-                    .update(
-                        path=remote_path,
-                        file=file_content,
-                        file_options={"content-type": content_type}
-                    )
-            else:
-                raise upload_error
-            
-        # Make public if requested
-        if make_public:
-            try:
-                supabase.storage \
-                    .from_(bucket) \
-                    .update(remote_path, {"public": True})
-            except Exception as public_error:
-                # If we can't make it public, but it's in a public bucket, it might still work
-                pass
-                
-            # Generate public URL
-            return f"{os.getenv('SUPABASE_URL')}/storage/v1/object/public/{bucket}/{remote_path}"
-            
-        return None
+        return upload_bytes(file_content, bucket, remote_path, content_type, make_public)
         
     except Exception as e:
         raise Exception(f"Failed to upload {file_type}: {str(e)}")
@@ -2,9 +2,72 @@
 Module for scheduling videos for publishing.
 """
 
-from typing import Dict, Any
-from datetime import datetime
-from .supabase_client import supabase
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timezone
+from .client import supabase
+
+VALID_VIDEO_TYPES = ['shortform', 'longform']
+VALID_PLATFORMS = ['youtube', 'instagram', 'facebook', 'website']
+
+# Rows per multi-row insert request
+SCHEDULE_CHUNK_SIZE = 500
+
+# Unique key on video_schedule used as the upsert conflict target
+SCHEDULE_CONFLICT_COLUMNS = "video_id,platform,scheduled_at"
+
+def _slot_key(video_id: str, platform: str, scheduled_at: Any) -> Tuple[str, str, datetime]:
+    """Key a row by (video_id, platform, scheduled_at), comparing times in UTC."""
+    if isinstance(scheduled_at, str):
+        scheduled_at = datetime.fromisoformat(scheduled_at.replace("Z", "+00:00"))
+    if scheduled_at.tzinfo is None:
+        scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+    return str(video_id).lower(), platform, scheduled_at.astimezone(timezone.utc)
+
+def _validate_schedule_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate one schedule request and build its video_schedule row.
+
+    Args:
+        item (Dict[str, Any]): Keyword arguments of schedule_video
+
+    Returns:
+        Dict[str, Any]: Row ready to insert
+
+    Raises:
+        ValueError: If a field is missing or invalid
+    """
+    video_id = item.get('video_id')
+    try:
+        uuid.UUID(str(video_id))
+    except ValueError:
+        raise ValueError(f"Invalid video_id: {video_id!r}")
+
+    video_type = item.get('video_type')
+    if video_type not in VALID_VIDEO_TYPES:
+        raise ValueError(f"Invalid video_type. Must be one of: {VALID_VIDEO_TYPES}")
+
+    platform = item.get('platform')
+    if platform not in VALID_PLATFORMS:
+        raise ValueError(f"Invalid platform. Must be one of: {VALID_PLATFORMS}")
+
+    scheduled_at = item.get('scheduled_at')
+    if not isinstance(scheduled_at, datetime):
+        raise ValueError("scheduled_at must be a datetime")
+
+    tags = item.get('tags') or []
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError("tags must be a list of strings")
+
+    return {
+        "video_id": str(video_id),
+        "video_type": video_type,
+        "platform": platform,
+        "title": item.get('title'),
+        "description": item.get('description'),
+        "tags": tags,
+        "scheduled_at": scheduled_at.isoformat()
+    }
 
 def schedule_video(
     video_id: str,
@@ -34,32 +97,120 @@ def schedule_video(
         ValueError: If video_type or platform are invalid
         Exception: If the database operation fails
     """
-    # Validate video type
-    valid_video_types = ['shortform', 'longform']
-    if video_type not in valid_video_types:
-        raise ValueError(f"Invalid video_type. Must be one of: {valid_video_types}")
-
-    # Validate platform
-    valid_platforms = ['youtube', 'instagram', 'facebook', 'website']
-    if platform not in valid_platforms:
-        raise ValueError(f"Invalid platform. Must be one of: {valid_platforms}")
+    row = _validate_schedule_item({
+        "video_id": video_id,
+        "video_type": video_type,
+        "platform": platform,
+        "title": title,
+        "description": description,
+        "tags": tags,
+        "scheduled_at": scheduled_at
+    })
 
     try:
         # Create schedule entry
-        response = supabase.table("video_schedule").insert({
-            "video_id": video_id,
-            "video_type": video_type,
-            "platform": platform,
-            "title": title,
-            "description": description,
-            "tags": tags,
-            "scheduled_at": scheduled_at.isoformat()
-        }).execute()
+        response = supabase.table("video_schedule").insert(row).execute()
 
         if not response.data:
             raise Exception("No data returned from insert operation")
-        
+
         return response.data[0]
-    
+
     except Exception as e:
         raise Exception(f"Failed to schedule video: {str(e)}")
+
+def _write_rows(rows: List[Dict[str, Any]], upsert: bool) -> List[Dict[str, Any]]:
+    """Insert (or upsert) rows in one request and return the written rows."""
+    table = supabase.table("video_schedule")
+    if upsert:
+        response = table.upsert(rows, on_conflict=SCHEDULE_CONFLICT_COLUMNS).execute()
+    else:
+        response = table.insert(rows).execute()
+    return response.data or []
+
+def schedule_videos(
+    batch: List[Dict[str, Any]],
+    upsert: bool = False,
+    chunk_size: int = SCHEDULE_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Schedule many videos with multi-row inserts.
+
+    Every item is validated before anything is written, and only valid items
+    are sent. A chunk the database rejects is retried row by row so the error
+    is reported against the item that caused it.
+
+    Args:
+        batch (List[Dict[str, Any]]): Items with the same keys as the
+            schedule_video arguments
+        upsert (bool): Update the existing row for an item's
+            (video_id, platform, scheduled_at) instead of failing, so a retried
+            batch does not create duplicates
+        chunk_size (int): Rows per insert request
+
+    Returns:
+        Dict[str, Any]: {
+            'success': True if every item was scheduled,
+            'ids': schedule ID per input item, in input order (None if it failed),
+            'errors': [{'index': position in batch, 'error': message}, ...]
+        }
+    """
+    ids: List[Optional[str]] = [None] * len(batch)
+    errors: List[Dict[str, Any]] = []
+
+    # Validate the whole batch in one pass
+    valid: List[Tuple[int, Dict[str, Any]]] = []
+    seen = {}
+    for index, item in enumerate(batch):
+        try:
+            row = _validate_schedule_item(item)
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+
+        key = _slot_key(row["video_id"], row["platform"], item["scheduled_at"])
+        if key in seen:
+            errors.append({
+                "index": index,
+                "error": f"Duplicate of item {seen[key]} (same video_id, platform and scheduled_at)"
+            })
+            continue
+        seen[key] = index
+        valid.append((index, row))
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            written = _write_rows([row for _, row in chunk], upsert)
+        except Exception as e:
+            if len(chunk) == 1:
+                errors.append({"index": chunk[0][0], "error": f"Failed to schedule video: {str(e)}"})
+                continue
+            # Isolate the failing rows
+            for index, row in chunk:
+                try:
+                    written_row = _write_rows([row], upsert)
+                    ids[index] = written_row[0]["id"] if written_row else None
+                except Exception as row_error:
+                    errors.append({"index": index, "error": f"Failed to schedule video: {str(row_error)}"})
+            continue
+
+        # Map returned rows back to their items by slot rather than position
+        written_ids = {
+            _slot_key(r["video_id"], r["platform"], r["scheduled_at"]): r["id"]
+            for r in written
+        }
+        for index, row in chunk:
+            ids[index] = written_ids.get(_slot_key(row["video_id"], row["platform"], row["scheduled_at"]))
+
+    failed = {error["index"] for error in errors}
+    for index, _ in valid:
+        if ids[index] is None and index not in failed:
+            errors.append({"index": index, "error": "No data returned from insert operation"})
+
+    errors.sort(key=lambda error: error["index"])
+    return {
+        "success": not errors,
+        "ids": ids,
+        "errors": errors
+    }
@@ -7,49 +7,55 @@ import tempfile
 import logging
 from pathlib import Path
 from typing import Optional
-import httpx
 
-from .client import supabase, get_supabase_headers
+from .client import supabase
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_video_file(video_id: str) -> Optional[str]:
+def get_video_file(
+    video_id: str,
+    bucket: Optional[str] = None,
+    file_path: Optional[str] = None
+) -> Optional[str]:
     """
     Get a video file from Supabase storage and save it to a temporary file.
     
     Args:
         video_id: ID of the video in the transcript_files table
+        bucket: Storage bucket, if already known (skips the transcript lookup)
+        file_path: Path within the bucket, if already known
         
     Returns:
         Optional[str]: Path to the temporary file containing the video, or None if retrieval failed
     """
     try:
-        # Get file info from transcript_files table
-        response = supabase.table("transcript_files") \
-            .select("file_path,bucket") \
-            .eq("id", video_id) \
-            .execute()
-            
-        if not response.data:
-            raise Exception(f"No transcript found with ID: {video_id}")
-            
-        transcript = response.data[0]
-        
-        # Get signed URL for file
-        url = f"{supabase.url}/storage/v1/object/{transcript['bucket']}/{transcript['file_path']}"
-        response = httpx.get(url, headers=get_supabase_headers(include_representation=False))
-        response.raise_for_status()
+        if bucket and file_path:
+            transcript = {'bucket': bucket, 'file_path': file_path}
+        else:
+            # Get file info from transcript_files table
+            response = supabase.table("transcript_files") \
+                .select("file_path,bucket") \
+                .eq("id", video_id) \
+                .execute()
+                
+            if not response.data:
+                raise Exception(f"No transcript found with ID: {video_id}")
+                
+            transcript = response.data[0]
         
-        # Save to temporary file
+        # Stream the file into a temporary file
         suffix = Path(transcript['file_path']).suffix
         with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
-            f.write(response.content)
+            try:
+                supabase.storage.from_(transcript['bucket']).download(transcript['file_path'], f)
+            except Exception:
+                f.close()
+                os.unlink(f.name)
+                raise
             return f.name
             
     except Exception as e:
-        logger.error(f"Failed to get video file: {str(e)}")
+        logger.error("Failed to get video file: %s", e)
         return None
 
 def cleanup_video_file(file_path: str):
@@ -63,4 +69,4 @@ def cleanup_video_file(file_path: str):
         if file_path and os.path.exists(file_path):
             os.unlink(file_path)
     except Exception as e:
-        logger.error(f"Failed to clean up video file: {str(e)}")
+        logger.error("Failed to clean up video file: %s", e)
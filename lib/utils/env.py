@@ -0,0 +1,22 @@
+"""
+Environment loading.
+
+``.env`` is read once, the first time configuration is needed, rather than by
+every module at import time.
+"""
+
+import threading
+
+_loaded = False
+_load_lock = threading.Lock()
+
+def load_env() -> None:
+    """Load ``.env`` into the environment (variables already set win). Safe to call repeatedly."""
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
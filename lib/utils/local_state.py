@@ -0,0 +1,106 @@
+"""
+Helpers for small pieces of node-local state shared between worker processes.
+"""
+
+import os
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Serializes access between threads of the same process; the file lock
+# below only coordinates between processes.
+_thread_locks: dict = {}
+_thread_locks_guard = threading.Lock()
+
+def state_dir() -> Path:
+    """
+    Get the directory holding node-local publisher state.
+
+    Defaults to ``.publisher_state`` in the working directory and can be
+    moved with the ``PUBLISHER_STATE_DIR`` environment variable.
+    """
+    path = Path(os.getenv("PUBLISHER_STATE_DIR", ".publisher_state"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(path, threading.Lock())
+
+@contextmanager
+def locked_file(path: Path, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory lock for ``path`` across threads and processes.
+
+    The lock is taken on a sibling ``.lock`` file so ``path`` itself can be
+    replaced atomically while the lock is held.
+
+    Args:
+        path: File to guard
+        shared: Take a shared (read) lock instead of an exclusive one
+    """
+    lock_path = f"{path}.lock"
+    with _thread_lock(lock_path):
+        with open(lock_path, "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """
+    Read a JSON state file.
+
+    Args:
+        path: File to read
+        default: Value returned if the file is missing or unreadable
+
+    Returns:
+        Any: Decoded JSON content or ``default``
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """
+    Write a JSON state file atomically (write to temp file, then rename).
+
+    Args:
+        path: File to write
+        data: JSON-serializable content
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,204 @@
+"""
+Central logging setup.
+
+Entry points call ``configure_logging()`` once; library modules only use
+``logging.getLogger(__name__)`` and pass arguments lazily
+(``logger.info("Published %s", video_id)``), so nothing is formatted for
+records below the configured level.
+
+With ``LOG_FORMAT=json`` (the default) each record is one JSON line::
+
+    {"ts": "2025-04-10T09:00:00.123Z", "level": "INFO", "logger": "run_publisher",
+     "msg": "Published video", "run_id": "9f1c...", "correlation_id": "41ad...",
+     "video_id": "...", "platform": "youtube"}
+
+Fields set with ``log_context()`` (the publisher sets a run ID, and per video
+a correlation ID, video_id, schedule_id and platform) are added to every
+record logged inside the block, as are ``extra={...}`` fields. ``LOG_FORMAT=text``
+prints the same fields after a plain message.
+
+Messages and field values are truncated to ``LOG_MAX_FIELD_LENGTH``
+characters (default 2000). Payloads such as response bodies go through
+``log_payload()``: DEBUG only, truncated to ``LOG_MAX_PAYLOAD_LENGTH``
+(default 500) and logged for a ``LOG_PAYLOAD_SAMPLE_RATE`` fraction of calls
+(default 1.0).
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from .env import load_env
+
+LOG_FORMATS = ("json", "text")
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "taskName", "log_context"
+}
+
+# Third-party loggers that are noisy below WARNING
+_QUIET_LOGGERS = ("httpx", "httpcore", "urllib3", "googleapiclient.discovery_cache")
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+_configured = False
+_max_field_length = 2000
+_max_payload_length = 500
+_payload_sample_rate = 1.0
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Add fields to every record logged inside the block (by this thread or task)."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+def new_correlation_id() -> str:
+    """Short random ID tying together the records of one run or video."""
+    return uuid.uuid4().hex[:16]
+
+def truncate(text: str, limit: int) -> str:
+    """Cut text to limit characters, noting how much was dropped."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+def log_payload(logger: logging.Logger, message: str, payload: Any, level: int = logging.DEBUG) -> None:
+    """
+    Log a (possibly large) payload, truncated and sampled.
+
+    Args:
+        logger: Logger to log to
+        message: Short description, e.g. "Update response"
+        payload: String or JSON-serializable value
+        level: Level to log at (default DEBUG)
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if _payload_sample_rate < 1 and random.random() >= _payload_sample_rate:
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    logger.log(level, "%s: %s", message, truncate(text, _max_payload_length), extra={"payload_chars": len(text)})
+
+def _field(value: Any) -> Any:
+    if type(value) is not str:
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        value = str(value)
+    return value if len(value) <= _max_field_length else truncate(value, _max_field_length)
+
+def _record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    fields = dict(getattr(record, "log_context", None) or {})
+    for key, value in record.__dict__.items():
+        if key not in _RECORD_ATTRIBUTES:
+            fields[key] = value
+    return fields
+
+class ContextFilter(logging.Filter):
+    """Attach the current log_context() fields to each record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.log_context = _context.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def __init__(self):
+        super().__init__()
+        self._encoder = json.JSONEncoder(ensure_ascii=False)
+        # strftime is the slowest part of a record; reuse it within a second
+        self._second = -1
+        self._second_text = ""
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        if second != self._second:
+            self._second_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = second
+        return f"{self._second_text}.{int(created % 1 * 1000):03d}Z"
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self._timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": _field(record.getMessage())
+        }
+        for key, value in _record_fields(record).items():
+            entry[key] = _field(value)
+        if record.exc_info:
+            entry["exc"] = truncate(self.formatException(record.exc_info), _max_field_length * 4)
+        return self._encoder.encode(entry)
+
+class TextFormatter(logging.Formatter):
+    """Plain text with context fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message, _max_field_length)
+        line = super().formatMessage(record)
+        fields = _record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={_field(value)}" for key, value in fields.items())
+        return line
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    stream=None,
+    force: bool = False
+) -> None:
+    """
+    Configure the root logger once for the process.
+
+    Does nothing if the root logger already has handlers (e.g. the
+    application embedding the publisher set up logging), unless ``force``.
+
+    Args:
+        level: Log level name (default LOG_LEVEL or INFO)
+        log_format: 'json' or 'text' (default LOG_FORMAT or json)
+        stream: Output stream (default stderr)
+        force: Replace existing root handlers
+    """
+    global _configured, _max_field_length, _max_payload_length, _payload_sample_rate
+    if _configured and not force:
+        return
+    load_env()
+
+    _max_field_length = int(os.getenv("LOG_MAX_FIELD_LENGTH", "2000"))
+    _max_payload_length = int(os.getenv("LOG_MAX_PAYLOAD_LENGTH", "500"))
+    _payload_sample_rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+    _configured = True
+
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return
+
+    log_format = log_format or os.getenv("LOG_FORMAT", "json")
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Invalid log format. Must be one of: {LOG_FORMATS}")
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.addFilter(ContextFilter())
+    handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    for name in _QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
@@ -6,11 +6,12 @@ import os
 import json
 import logging
 from typing import Dict, Any, Tuple, Optional
-from datetime import datetime, timezone
-from pathlib import Path
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from .manifest_builder import PublishManifest
+from .manifest_log import get_manifest_log
+from .manifest_uploader import get_manifest_uploader
+from .publish_history import get_publish_history
+
 logger = logging.getLogger(__name__)
 
 def generate_publish_manifest(
@@ -32,22 +33,10 @@ def generate_publish_manifest(
         str: JSON string containing the manifest
     """
     try:
-        manifest = {
-            "video_id": video.get("video_id") or video.get("transcript_id"),
-            "platform": video["platform"],
-            "status": status,
-            "publish_url": publish_url,
-            "published_at": datetime.now(timezone.utc).isoformat(),
-            "storage_path": video.get("storage_path", "")
-        }
-        
-        if embed_code:
-            manifest["embed_code"] = embed_code
-            
-        return json.dumps(manifest, indent=2)
+        return PublishManifest.from_video(video, publish_url, embed_code, status).to_json()
         
     except Exception as e:
-        logger.error(f"Error generating manifest: {str(e)}")
+        logger.error("Error generating manifest: %s", e)
         return json.dumps({
             "status": "error",
             "error": str(e)
@@ -56,40 +45,54 @@ def generate_publish_manifest(
 def save_and_upload_manifest(
     video: Dict[str, Any],
     manifest_content: str,
-    status: str = "success"
+    status: str = "success",
+    markdown_content: Optional[str] = None
 ) -> Tuple[str, Optional[str]]:
     """
-    Save a manifest file locally and optionally upload to storage.
+    Save a manifest to the local manifest log and optionally upload to storage.
+    
+    The storage upload runs in the background; its URL is patched onto the
+    video_schedule row once it lands, so the URL returned here is always None.
     
     Args:
         video: Dictionary containing video information
         manifest_content: JSON string containing manifest content
         status: Publishing status, defaults to "success"
+        markdown_content: Optional Markdown manifest to upload to storage
         
     Returns:
-        Tuple[str, Optional[str]]: Local manifest path and optional URL
+        Tuple[str, Optional[str]]: Manifest log location and optional URL
     """
     try:
-        # Create manifests directory if it doesn't exist
-        manifest_dir = Path("manifests")
-        manifest_dir.mkdir(exist_ok=True)
-        
-        # Generate manifest filename
         video_id = video.get("video_id") or video.get("transcript_id")
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        filename = f"{video_id}_{timestamp}_{status}.json"
         
-        # Save manifest locally
-        manifest_path = manifest_dir / filename
-        with open(manifest_path, "w") as f:
-            f.write(manifest_content)
+        record = {
+            "video_id": video_id,
+            "schedule_id": video.get("id"),
+            "platform": video.get("platform"),
+            "status": status,
+            "format": "json",
+            "content": manifest_content
+        }
+        
+        # Append to the segmented manifest log instead of writing one file per publish
+        manifest_path = get_manifest_log().append(record)
             
-        logger.info(f"Saved manifest to {manifest_path}")
+        logger.info("Saved manifest to %s", manifest_path)
+        
+        # Index locally for history queries; the log stays the source of truth
+        # and the index can be rebuilt from it, so a failure here is not fatal
+        try:
+            get_publish_history().record({**record, "location": manifest_path})
+        except Exception as e:
+            logger.warning("Failed to index manifest in publish history: %s", e)
+        
+        # Upload to storage in the background so the publish path never waits on it
+        if markdown_content and video.get("id"):
+            get_manifest_uploader().submit(video, markdown_content)
         
-        # For now, just return the local path
-        # In the future, we can add storage upload functionality
-        return str(manifest_path), None
+        return manifest_path, None
         
     except Exception as e:
-        logger.error(f"Error saving manifest: {str(e)}")
+        logger.error("Error saving manifest: %s", e)
         return "", None
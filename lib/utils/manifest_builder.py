@@ -1,17 +1,53 @@
 """
 Utility functions for generating publishing manifests and summaries.
+
+A publish builds one ``PublishManifest`` record and serializes it to both
+JSON (stored in the manifest log and ``publish_manifests``) and Markdown
+(uploaded to storage) from the same data, so the two never disagree.
+"""
+
+import json
+from json.encoder import encode_basestring_ascii
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+# Templates are built once at import; rendering only fills them in
+MARKDOWN_TEMPLATE = """# Video Publishing Manifest
+
+## Video Details
+- Transcript ID: {video_id}
+- Platform: {platform}
+- Scheduled At: {scheduled_at}
+- Published At: {published_at}
+
+## Publishing Details
+- Status: {status}
+- Public URL: {publish_url}
+
+## Storage Details
+- Storage Path: {storage_path}
 """
 
-from datetime import datetime
-from typing import Optional, Dict, Any
+EMBED_TEMPLATE = "\n## Embed Code\n```html\n{embed_code}\n```"
+
+# Same output as json.dumps(..., indent=2), which falls back to the pure
+# Python encoder whenever indent is set; only the values are escaped per call
+JSON_FIELDS = ("video_id", "platform", "status", "publish_url", "published_at", "storage_path")
+JSON_TEMPLATE = "{\n" + ",\n".join(f'  "{field}": %s' for field in JSON_FIELDS)
+JSON_EMBED_TEMPLATE = ',\n  "embed_code": %s'
+
+def _json_value(value: Any) -> str:
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    return json.dumps(value)
 
 def format_datetime(dt_str: str) -> str:
     """
     Format a datetime string into a human-readable format.
-    
+
     Args:
         dt_str: ISO format datetime string
-        
+
     Returns:
         str: Formatted datetime string
     """
@@ -24,10 +60,10 @@ def format_datetime(dt_str: str) -> str:
 def get_platform_emoji(platform: str) -> str:
     """
     Get an appropriate emoji for the publishing platform.
-    
+
     Args:
         platform: Platform name (youtube, facebook, instagram, website)
-        
+
     Returns:
         str: Platform emoji
     """
@@ -40,6 +76,132 @@ def get_platform_emoji(platform: str) -> str:
     }
     return platform_emojis.get(platform.lower(), '📄')
 
+class PublishManifest:
+    """Everything a publishing manifest records, captured once per publish."""
+
+    __slots__ = (
+        'video_id',
+        'platform',
+        'status',
+        'publish_url',
+        'published_at',
+        'scheduled_at',
+        'storage_path',
+        'embed_code'
+    )
+
+    def __init__(
+        self,
+        video_id: str,
+        platform: str,
+        publish_url: str,
+        status: str = "success",
+        published_at: Optional[str] = None,
+        scheduled_at: Optional[str] = None,
+        storage_path: str = "",
+        embed_code: Optional[str] = None
+    ):
+        self.video_id = video_id
+        self.platform = platform
+        self.status = status
+        self.publish_url = publish_url
+        self.published_at = published_at or datetime.now(timezone.utc).isoformat()
+        self.scheduled_at = scheduled_at
+        self.storage_path = storage_path
+        self.embed_code = embed_code
+
+    @classmethod
+    def from_video(
+        cls,
+        video: Dict[str, Any],
+        publish_url: str,
+        embed_code: Optional[str] = None,
+        status: str = "success",
+        published_at: Optional[str] = None
+    ) -> 'PublishManifest':
+        """
+        Build a manifest from a video_schedule row (or the publisher's video dict).
+
+        Args:
+            video: Video data; needs platform and video_id or transcript_id
+            publish_url: URL where the video was published
+            embed_code: Optional HTML code to embed the video
+            status: Publishing status, defaults to "success"
+            published_at: ISO timestamp, defaults to now
+
+        Returns:
+            PublishManifest: The manifest record
+        """
+        return cls(
+            video_id=video.get('video_id') or video.get('transcript_id'),
+            platform=video['platform'],
+            publish_url=publish_url,
+            status=status,
+            published_at=published_at,
+            scheduled_at=video.get('scheduled_at'),
+            storage_path=video.get('storage_path') or "",
+            embed_code=embed_code
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the JSON manifest fields."""
+        data = {
+            "video_id": self.video_id,
+            "platform": self.platform,
+            "status": self.status,
+            "publish_url": self.publish_url,
+            "published_at": self.published_at,
+            "storage_path": self.storage_path
+        }
+        if self.embed_code:
+            data["embed_code"] = self.embed_code
+        return data
+
+    def to_json(self) -> str:
+        """Serialize to the JSON manifest."""
+        manifest = JSON_TEMPLATE % (
+            _json_value(self.video_id),
+            _json_value(self.platform),
+            _json_value(self.status),
+            _json_value(self.publish_url),
+            _json_value(self.published_at),
+            _json_value(self.storage_path)
+        )
+        if self.embed_code:
+            manifest += JSON_EMBED_TEMPLATE % _json_value(self.embed_code)
+        return manifest + "\n}"
+
+    def to_markdown(self) -> str:
+        """Serialize to the Markdown manifest."""
+        manifest = MARKDOWN_TEMPLATE.format(
+            video_id=self.video_id,
+            platform=self.platform,
+            scheduled_at=self.scheduled_at or "N/A",
+            published_at=self.published_at,
+            status=self.status.capitalize(),
+            publish_url=self.publish_url,
+            storage_path=self.storage_path or "N/A"
+        )
+        if self.embed_code:
+            manifest += EMBED_TEMPLATE.format(embed_code=self.embed_code)
+        return manifest
+
+    def render(self) -> Tuple[str, str]:
+        """Serialize to both formats in one call."""
+        return self.to_json(), self.to_markdown()
+
+def render_manifests(manifests: Iterable[PublishManifest]) -> List[Tuple[str, str]]:
+    """
+    Render many manifests to JSON and Markdown, e.g. for reconciliation jobs.
+
+    Args:
+        manifests: Manifest records
+
+    Returns:
+        List[Tuple[str, str]]: (JSON, Markdown) per manifest, in order
+    """
+    return [manifest.render() for manifest in manifests]
+
 def generate_publish_manifest(
     video: dict,
     publish_url: str,
@@ -48,33 +210,14 @@ def generate_publish_manifest(
 ) -> str:
     """
     Generate a markdown manifest for a published video.
-    
+
     Args:
         video: Video metadata dictionary
         publish_url: URL where video was published
         embed_code: Optional HTML embed code
         status: Status message to include
-        
+
     Returns:
         str: Markdown formatted manifest
     """
-    manifest = f"""# Video Publishing Manifest
-
-## Video Details
-- Transcript ID: {video['transcript_id']}
-- Platform: {video['platform']}
-- Scheduled At: {video['scheduled_at']}
-- Published At: {datetime.utcnow().isoformat()}
-
-## Publishing Details
-- Status: {status}
-- Public URL: {publish_url}
-
-## Storage Details
-- Storage Path: {video.get('storage_path', 'N/A')}
-"""
-
-    if embed_code:
-        manifest += f"\n## Embed Code\n```html\n{embed_code}\n```"
-        
-    return manifest
+    return PublishManifest.from_video(video, publish_url, embed_code, status).to_markdown()
@@ -0,0 +1,493 @@
+"""
+Append-only, segmented log of publishing manifests.
+
+Manifests are appended as JSON lines to segment files that rotate at a size
+limit, instead of one small file per publish. Each segment has a sidecar
+index (``.idx``) with one compact entry per record (timestamp, byte offset,
+length, video_id, platform, status, schedule_id), which gives point lookups by
+video_id and range scans by date without reading the segments themselves.
+
+A record's location, ``<video_id>/<platform>/<ts>``, is resolved through the
+index, so it stays valid when compaction moves the record to another segment.
+
+Layout under ``MANIFEST_LOG_DIR`` (default ``manifests/log``)::
+
+    segments.json            ordered list of live segments
+    segment-00000001.jsonl   manifest records
+    segment-00000001.idx     index entries for that segment
+
+Old segments can be compacted: superseded records (an older manifest for
+the same schedule row, video and platform) are dropped and the rest merged into fewer,
+larger segments. Compacted segments are kept until the next compaction so
+readers holding an index from the previous catalog version can still read
+them; a reader that finds a segment gone refreshes its index and retries.
+"""
+
+import os
+import json
+import bisect
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+
+from .local_state import locked_file, read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAX_BYTES = int(os.getenv("MANIFEST_SEGMENT_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Reads retried when a compaction removes segments under a reader
+READ_ATTEMPTS = 3
+
+# Index entry: (ts, segment_id, offset, length, video_id, platform, status, schedule_id)
+IndexEntry = Tuple[str, int, int, int, str, str, str, str]
+
+def _to_iso(value: Union[str, datetime, None]) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+class ManifestLog:
+    """Segmented append-only manifest log with an in-memory index."""
+
+    def __init__(self, root: Optional[Path] = None, segment_max_bytes: int = SEGMENT_MAX_BYTES):
+        self.root = Path(root or os.getenv("MANIFEST_LOG_DIR", "manifests/log"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._repaired = False
+        self._reset_index(None)
+
+    # Catalog and file layout
+
+    @property
+    def catalog_path(self) -> Path:
+        return self.root / "segments.json"
+
+    def _load_catalog(self) -> Dict[str, Any]:
+        return read_json(self.catalog_path, {"version": 0, "next_id": 1, "segments": [], "retired": []})
+
+    def segment_path(self, segment_id: int) -> Path:
+        return self.root / f"segment-{segment_id:08d}.jsonl"
+
+    def index_path(self, segment_id: int) -> Path:
+        return self.root / f"segment-{segment_id:08d}.idx"
+
+    # Writing
+
+    def append(self, record: Dict[str, Any]) -> str:
+        """
+        Append a manifest record.
+
+        Args:
+            record: Record with at least video_id, platform, status and content;
+                ``ts`` defaults to the current UTC time
+
+        Returns:
+            str: Location of the record (see ``location``), readable with ``get``
+        """
+        record = {"ts": datetime.now(timezone.utc).isoformat(), **record}
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+
+        with locked_file(self.catalog_path):
+            catalog = self._load_catalog()
+            if not self._repaired and catalog["segments"]:
+                self._repair_segment(catalog["segments"][-1])
+                self._repaired = True
+
+            active = catalog["segments"][-1] if catalog["segments"] else None
+            if active is None or self._needs_rotation(active, len(line)):
+                active = catalog["next_id"]
+                catalog["next_id"] += 1
+                catalog["segments"].append(active)
+                catalog["version"] += 1
+                write_json_atomic(self.catalog_path, catalog)
+
+            with open(self.segment_path(active), "ab") as f:
+                offset = f.tell()
+                f.write(line)
+            self._append_index(active, [self._entry_fields(record, offset, len(line))])
+
+        return self.location(record)
+
+    @staticmethod
+    def location(record: Dict[str, Any]) -> str:
+        """
+        Get the location of a record as ``<video_id>/<platform>/<ts>``.
+
+        Unlike a segment and byte offset, this survives compaction.
+        """
+        return f"{record.get('video_id') or ''}/{record.get('platform') or ''}/{record['ts']}"
+
+    def _needs_rotation(self, segment_id: int, incoming: int) -> bool:
+        try:
+            size = os.path.getsize(self.segment_path(segment_id))
+        except FileNotFoundError:
+            return False
+        return size > 0 and size + incoming > self.segment_max_bytes
+
+    @staticmethod
+    def _entry_fields(record: Dict[str, Any], offset: int, length: int) -> list:
+        return [
+            record["ts"],
+            offset,
+            length,
+            str(record.get("video_id") or ""),
+            str(record.get("platform") or ""),
+            str(record.get("status") or ""),
+            str(record.get("schedule_id") or "")
+        ]
+
+    def _append_index(self, segment_id: int, fields: List[list]) -> None:
+        with open(self.index_path(segment_id), "a") as f:
+            f.write("".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in fields))
+
+    def _repair_segment(self, segment_id: int) -> None:
+        """Index records written to a segment before a crash cut off their index entry."""
+        indexed_end = 0
+        for entry in self._read_index_file(segment_id):
+            indexed_end = max(indexed_end, entry[1] + entry[2])
+
+        path = self.segment_path(segment_id)
+        if not path.exists() or path.stat().st_size <= indexed_end:
+            return
+
+        missing = []
+        with open(path, "rb") as f:
+            f.seek(indexed_end)
+            offset = indexed_end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    missing.append(self._entry_fields(json.loads(line), offset, len(line)))
+                except ValueError:
+                    logger.warning("Skipping corrupt manifest record in %s at %s", path, offset)
+                offset += len(line)
+        if missing:
+            logger.warning("Recovered %s unindexed manifest records in %s", len(missing), path)
+            self._append_index(segment_id, missing)
+
+    # Index
+
+    def _reset_index(self, version: Optional[int]) -> None:
+        self._catalog_version = version
+        self._segments: List[int] = []
+        self._index_positions: Dict[int, int] = {}
+        self._entries: List[IndexEntry] = []
+        self._by_video: Dict[str, List[int]] = {}
+        self._ts_sorted = True
+
+    def _read_index_file(self, segment_id: int, position: int = 0) -> List[list]:
+        entries = []
+        try:
+            with open(self.index_path(segment_id), "r") as f:
+                f.seek(position)
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    entries.append(json.loads(line))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _refresh(self) -> None:
+        """Pick up segments and index entries written since the last call."""
+        catalog = self._load_catalog()
+        if catalog["version"] != self._catalog_version:
+            self._reset_index(catalog["version"])
+            self._segments = list(catalog["segments"])
+
+        for segment_id in self._segments:
+            position = self._index_positions.get(segment_id, 0)
+            try:
+                if os.path.getsize(self.index_path(segment_id)) <= position:
+                    continue
+            except FileNotFoundError:
+                continue
+
+            try:
+                with open(self.index_path(segment_id), "rb") as f:
+                    f.seek(position)
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            complete = data[:data.rfind(b"\n") + 1]
+            self._index_positions[segment_id] = position + len(complete)
+
+            for line in complete.splitlines():
+                # Entries written before schedule_id was indexed have six fields
+                ts, offset, length, video_id, platform, status, *rest = json.loads(line)
+                if self._entries and ts < self._entries[-1][0]:
+                    self._ts_sorted = False
+                self._by_video.setdefault(video_id, []).append(len(self._entries))
+                self._entries.append((ts, segment_id, offset, length, video_id, platform, status, rest[0] if rest else ""))
+
+    def _read(self, entry: IndexEntry) -> Dict[str, Any]:
+        with open(self.segment_path(entry[1]), "rb") as f:
+            f.seek(entry[2])
+            return json.loads(f.read(entry[3]))
+
+    def _select_range(
+        self,
+        start: Optional[str],
+        end: Optional[str],
+        platform: Optional[str],
+        status: Optional[str]
+    ) -> List[IndexEntry]:
+        with self._lock:
+            self._refresh()
+            if not self._ts_sorted:
+                self._entries.sort()
+                self._by_video = {}
+                for i, entry in enumerate(self._entries):
+                    self._by_video.setdefault(entry[4], []).append(i)
+                self._ts_sorted = True
+
+            low = 0 if start is None else bisect.bisect_left(self._entries, (start,))
+            high = len(self._entries) if end is None else bisect.bisect_left(self._entries, (end,))
+            return [
+                entry for entry in self._entries[low:high]
+                if (platform is None or entry[5] == platform)
+                and (status is None or entry[6] == status)
+            ]
+
+    # Queries
+
+    def find(self, video_id: str, platform: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get every manifest record for a video, oldest first.
+
+        Args:
+            video_id: Video ID to look up
+            platform: Optional platform filter
+
+        Returns:
+            List[Dict[str, Any]]: Matching records
+        """
+        for attempt in range(READ_ATTEMPTS):
+            with self._lock:
+                self._refresh()
+                entries = [self._entries[i] for i in self._by_video.get(video_id, [])]
+            try:
+                return [
+                    self._read(entry)
+                    for entry in sorted(entries)
+                    if platform is None or entry[5] == platform
+                ]
+            except FileNotFoundError:
+                # Compacted away since the index was read; the refresh picks
+                # up the new catalog
+                if attempt == READ_ATTEMPTS - 1:
+                    raise
+        return []
+
+    def get(self, location: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the record at a location returned by ``append``.
+
+        Args:
+            location: ``<video_id>/<platform>/<ts>``
+
+        Returns:
+            Optional[Dict[str, Any]]: The record, or None if it is not in the log
+                (e.g. compacted away as superseded)
+        """
+        video_id, platform, ts = location.split("/", 2)
+        matches = [record for record in self.find(video_id, platform) if record["ts"] == ts]
+        return matches[-1] if matches else None
+
+    def latest(self, video_id: str, platform: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get the most recent manifest record for a video (and platform)."""
+        records = self.find(video_id, platform)
+        return records[-1] if records else None
+
+    def scan(
+        self,
+        start: Union[str, datetime, None] = None,
+        end: Union[str, datetime, None] = None,
+        platform: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over manifest records in a time range, oldest first.
+
+        Args:
+            start: Inclusive lower bound on the record timestamp
+            end: Exclusive upper bound on the record timestamp
+            platform: Optional platform filter
+            status: Optional status filter
+
+        Yields:
+            Dict[str, Any]: Matching records
+        """
+        start, end = _to_iso(start), _to_iso(end)
+        entries = self._select_range(start, end, platform, status)
+        # Timestamp of the last record yielded and how many records with that
+        # timestamp were yielded, to resume after a compaction
+        last_ts, yielded_at_last_ts = None, 0
+        attempts = 0
+        position = 0
+        while position < len(entries):
+            entry = entries[position]
+            try:
+                record = self._read(entry)
+            except FileNotFoundError:
+                attempts += 1
+                if attempts >= READ_ATTEMPTS:
+                    raise
+                # Compacted away since the index was read: select the rest of
+                # the range again from the new catalog
+                entries = self._select_range(last_ts or start, end, platform, status)
+                position = 0
+                skip = yielded_at_last_ts
+                while position < len(entries) and skip and entries[position][0] == last_ts:
+                    position += 1
+                    skip -= 1
+                continue
+            if entry[0] == last_ts:
+                yielded_at_last_ts += 1
+            else:
+                last_ts, yielded_at_last_ts = entry[0], 1
+            position += 1
+            yield record
+
+    # Maintenance
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Compact all sealed segments (every segment but the active one).
+
+        Records superseded by a newer record for the same schedule row
+        (schedule_id, video and platform) are dropped; a video published to
+        a platform several times keeps one manifest per publish. The
+        remaining records are rewritten in order into new segments. The old
+        segment files are removed by the next compaction, so readers still
+        using the current catalog are not cut off.
+
+        Returns:
+            Dict[str, int]: Segments and records before and after compaction
+        """
+        with locked_file(self.catalog_path):
+            catalog = self._load_catalog()
+            sealed, active = catalog["segments"][:-1], catalog["segments"][-1:]
+            if not sealed:
+                return {"segments_before": len(active), "segments_after": len(active),
+                        "records_before": 0, "records_after": 0}
+
+            # The newest record per (video_id, platform, schedule_id) across
+            # the whole log wins; ties on timestamp go to the later position
+            latest: Dict[Tuple[str, str, str], Tuple[str, int, int]] = {}
+            sealed_ids = set(sealed)
+            sealed_entries = []
+            for position, segment_id in enumerate(catalog["segments"]):
+                for ts, offset, length, video_id, platform, status, *rest in self._read_index_file(segment_id):
+                    if rest:
+                        schedule_id = rest[0]
+                    else:
+                        # Older index entry without schedule_id: read it from the record
+                        record = self._read((ts, segment_id, offset, length))
+                        schedule_id = str(record.get("schedule_id") or "")
+                    key = (video_id, platform, schedule_id)
+                    if key not in latest or (ts, position, offset) >= latest[key]:
+                        latest[key] = (ts, position, offset)
+                    if segment_id in sealed_ids:
+                        sealed_entries.append((position, segment_id, offset, length, key))
+
+            new_segments: List[int] = []
+            current_id, current_file, current_size = None, None, 0
+            index_fields: List[list] = []
+            kept = 0
+            try:
+                for position, segment_id, offset, length, key in sealed_entries:
+                    if latest[key][1:] != (position, offset):
+                        continue
+                    with open(self.segment_path(segment_id), "rb") as f:
+                        f.seek(offset)
+                        line = f.read(length)
+
+                    if current_file is None or (current_size and current_size + length > self.segment_max_bytes):
+                        if current_file is not None:
+                            current_file.close()
+                            self._append_index(current_id, index_fields)
+                        current_id = catalog["next_id"]
+                        catalog["next_id"] += 1
+                        new_segments.append(current_id)
+                        current_file = open(self.segment_path(current_id), "wb")
+                        current_size, index_fields = 0, []
+
+                    current_file.write(line)
+                    index_fields.append(self._entry_fields(json.loads(line), current_size, length))
+                    current_size += length
+                    kept += 1
+            finally:
+                if current_file is not None:
+                    current_file.close()
+                    self._append_index(current_id, index_fields)
+
+            # Segments retired by the previous compaction have been out of
+            # the catalog for a whole version; these wait for the next one
+            expired = catalog.get("retired", [])
+            catalog["segments"] = new_segments + active
+            catalog["retired"] = sealed
+            catalog["version"] += 1
+            write_json_atomic(self.catalog_path, catalog)
+
+            for segment_id in expired:
+                for path in (self.segment_path(segment_id), self.index_path(segment_id)):
+                    if path.exists():
+                        path.unlink()
+
+        logger.info(
+            "Compacted %s manifest segments into %s (%s -> %s records)",
+            len(sealed), len(new_segments), len(sealed_entries), kept
+        )
+        return {
+            "segments_before": len(sealed) + len(active),
+            "segments_after": len(new_segments) + len(active),
+            "records_before": len(sealed_entries),
+            "records_after": kept
+        }
+
+_log: Optional[ManifestLog] = None
+
+def get_manifest_log() -> ManifestLog:
+    """Get the process-wide manifest log."""
+    global _log
+    if _log is None:
+        _log = ManifestLog()
+    return _log
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or compact the manifest log")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    get_parser = subparsers.add_parser("get", help="Show manifests for a video")
+    get_parser.add_argument("video_id")
+    get_parser.add_argument("--platform")
+    show_parser = subparsers.add_parser("show", help="Show the manifest at a location")
+    show_parser.add_argument("location", help="<video_id>/<platform>/<ts>, as stored in the publish history")
+    scan_parser = subparsers.add_parser("scan", help="List manifests in a time range")
+    scan_parser.add_argument("--start")
+    scan_parser.add_argument("--end")
+    scan_parser.add_argument("--platform")
+    scan_parser.add_argument("--status")
+    subparsers.add_parser("compact", help="Compact sealed segments")
+    args = parser.parse_args()
+
+    manifest_log = get_manifest_log()
+    if args.command == "get":
+        records = manifest_log.find(args.video_id, args.platform)
+    elif args.command == "show":
+        records = [record for record in [manifest_log.get(args.location)] if record]
+    elif args.command == "scan":
+        records = manifest_log.scan(args.start, args.end, args.platform, args.status)
+    else:
+        records = [manifest_log.compact()]
+    for record in records:
+        print(json.dumps(record))
@@ -0,0 +1,196 @@
+"""
+Background uploader for publishing manifests.
+
+Manifests are queued by the publish path and uploaded to Supabase storage
+(``documents/{user_id}/{transcript_id}/manifest_{schedule_id}.md``) by a
+background thread. Uploads run in batches with bounded concurrency and
+retries, and each batch's ``manifest_path``/``manifest_url`` values are
+patched onto video_schedule with one bulk RPC call. Queuing never blocks:
+if the queue is full the manifest stays in the local manifest log only.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_BUCKET = os.getenv("MANIFEST_BUCKET", "documents")
+
+@dataclass
+class ManifestUpload:
+    """One manifest waiting to be uploaded."""
+    schedule_id: str
+    remote_path: str
+    content: bytes
+    content_type: str = "text/markdown"
+
+def manifest_remote_path(video: Dict[str, Any]) -> str:
+    """
+    Get the storage path for a video's manifest.
+
+    Args:
+        video: video_schedule row
+
+    Returns:
+        str: Path within the manifest bucket
+    """
+    user_id = video.get('user_id') or "unassigned"
+    transcript_id = video.get('video_id') or video.get('transcript_id')
+    return f"{user_id}/{transcript_id}/manifest_{video['id']}.md"
+
+class ManifestUploader:
+    """Queue plus background thread that uploads manifests in batches."""
+
+    def __init__(
+        self,
+        max_workers: int = int(os.getenv("MANIFEST_UPLOAD_WORKERS", "4")),
+        batch_size: int = int(os.getenv("MANIFEST_UPLOAD_BATCH_SIZE", "50")),
+        batch_wait: float = float(os.getenv("MANIFEST_UPLOAD_BATCH_WAIT", "1.0")),
+        max_retries: int = int(os.getenv("MANIFEST_UPLOAD_RETRIES", "3")),
+        queue_size: int = int(os.getenv("MANIFEST_UPLOAD_QUEUE_SIZE", "1000"))
+    ):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_retries = max_retries
+        self._queue: "queue.Queue[ManifestUpload]" = queue.Queue(maxsize=queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="manifest-upload")
+        self._pending = 0
+        self._pending_lock = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="manifest-uploader", daemon=True)
+        self._thread.start()
+
+    def submit(self, video: Dict[str, Any], content: str) -> bool:
+        """
+        Queue a manifest for upload without blocking.
+
+        Args:
+            video: video_schedule row the manifest belongs to
+            content: Markdown manifest content
+
+        Returns:
+            bool: False if the queue was full and the upload was dropped
+        """
+        item = ManifestUpload(
+            schedule_id=video['id'],
+            remote_path=manifest_remote_path(video),
+            content=content.encode("utf-8")
+        )
+        with self._pending_lock:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                logger.warning("Manifest upload queue full, skipping upload for %s", item.schedule_id)
+                return False
+            self._pending += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued manifest has been uploaded and patched.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if the queue drained before the timeout
+        """
+        with self._pending_lock:
+            return self._pending_lock.wait_for(lambda: self._pending == 0, timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                logger.error("Manifest upload batch failed: %s", e)
+            finally:
+                with self._pending_lock:
+                    self._pending -= len(batch)
+                    self._pending_lock.notify_all()
+
+    def _process_batch(self, batch: List[ManifestUpload]) -> None:
+        results = list(self._executor.map(self._upload_with_retry, batch))
+        updates = [
+            {'id': item.schedule_id, 'manifest_path': f"{MANIFEST_BUCKET}/{item.remote_path}", 'manifest_url': url}
+            for item, url in zip(batch, results)
+            if url
+        ]
+        if not updates:
+            return
+
+        from lib.supabase.client import supabase
+        self._retry(
+            lambda: supabase.rpc("bulk_update_video_schedule", {"updates": updates}).execute(),
+            f"patching manifest URLs for {len(updates)} videos"
+        )
+        logger.info("Uploaded %s/%s manifests", len(updates), len(batch))
+
+    def _upload_with_retry(self, item: ManifestUpload) -> Optional[str]:
+        from lib.supabase.upload_utils import upload_bytes
+        try:
+            return self._retry(
+                lambda: upload_bytes(
+                    item.content,
+                    MANIFEST_BUCKET,
+                    item.remote_path,
+                    item.content_type,
+                    make_public=True
+                ),
+                f"uploading manifest {item.remote_path}"
+            )
+        except Exception as e:
+            logger.error("Giving up on manifest upload %s: %s", item.remote_path, e)
+            return None
+
+    def _retry(self, operation, description: str):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return operation()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 2 ** attempt
+                logger.warning("Failed %s (attempt %s), retrying in %ss: %s", description, attempt + 1, delay, e)
+                time.sleep(delay)
+
+_uploader: Optional[ManifestUploader] = None
+_uploader_lock = threading.Lock()
+
+def get_manifest_uploader() -> ManifestUploader:
+    """Get the process-wide manifest uploader, starting it on first use."""
+    global _uploader
+    with _uploader_lock:
+        if _uploader is None:
+            _uploader = ManifestUploader()
+    return _uploader
+
+def flush_manifest_uploads(timeout: Optional[float] = None) -> bool:
+    """
+    Wait for queued manifest uploads, if any were ever queued.
+
+    Args:
+        timeout: Maximum seconds to wait, or None to wait indefinitely
+
+    Returns:
+        bool: True if nothing is left in the queue
+    """
+    if _uploader is None:
+        return True
+    return _uploader.flush(timeout)
@@ -0,0 +1,375 @@
+"""
+Lightweight publisher metrics.
+
+Stage timers, Supabase request timings, bytes transferred and schedule lag
+are recorded into fixed-bucket histograms and counters in memory (a lock and
+a bisect per observation). They are exported in the Prometheus text format:
+
+- ``METRICS_TEXTFILE``: written at the end of each run. Totals accumulate
+  across runs in ``metrics.json`` under the publisher state directory, so
+  the file can be picked up by node_exporter's textfile collector.
+- ``METRICS_PORT``: served at ``http://127.0.0.1:<port>/metrics`` while the
+  process runs.
+
+Percentiles (p50/p95/p99) are interpolated from the buckets, the same way
+Prometheus' histogram_quantile does.
+
+Usage:
+    python -m lib.utils.metrics            # p50/p95/p99 from the accumulated totals
+    python -m lib.utils.metrics --format prometheus
+"""
+
+import os
+import time
+import bisect
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+from .local_state import state_dir, locked_file, read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600, 86400)
+
+# name -> (type, help, buckets)
+METRIC_DEFINITIONS: Dict[str, Tuple[str, str, Optional[Sequence[float]]]] = {
+    "publisher_stage_seconds": (
+        "histogram", "Time spent in each publishing stage", DURATION_BUCKETS
+    ),
+    "publisher_schedule_lag_seconds": (
+        "histogram", "Seconds between scheduled_at and the video being published", LAG_BUCKETS
+    ),
+    "publisher_tenant_lag_seconds": (
+        "histogram", "Seconds between scheduled_at and the video being published, by user", LAG_BUCKETS
+    ),
+    "publisher_videos_total": (
+        "counter", "Videos processed, by platform and outcome", None
+    ),
+    "publisher_journal_replays_total": (
+        "counter", "Uploads finished from the publish journal after a crash instead of re-uploading", None
+    ),
+    "publisher_bytes_total": (
+        "counter", "Video bytes downloaded from storage and uploaded to platforms", None
+    ),
+    "supabase_request_seconds": (
+        "histogram", "Supabase request time (including retries), by method and table/RPC", DURATION_BUCKETS
+    ),
+    "supabase_request_errors_total": (
+        "counter", "Supabase requests that failed", None
+    ),
+    "supabase_request_retries_total": (
+        "counter", "Supabase request retries", None
+    ),
+    "supabase_bytes_total": (
+        "counter", "Bytes sent to and received from Supabase", None
+    ),
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# metric -> (label, distinct values kept). Values past the limit are recorded
+# as OVERFLOW_LABEL, both in this process and in the accumulated totals, so
+# per-user series stay bounded however many users publish over time.
+LABEL_LIMITS: Dict[str, Tuple[str, int]] = {
+    "publisher_tenant_lag_seconds": ("tenant", int(os.getenv("TENANT_METRICS_LIMIT", "100"))),
+}
+OVERFLOW_LABEL = "other"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Fixed-bucket histogram (bucket i counts values <= buckets[i])."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"buckets": list(self.buckets), "counts": self.counts, "sum": self.sum, "count": self.count}
+
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        if tuple(state.get("buckets", ())) != self.buckets:
+            # Bucket layout changed between versions; drop the old totals
+            return
+        self.counts = [a + b for a, b in zip(self.counts, state["counts"])]
+        self.sum += state["sum"]
+        self.count += state["count"]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+def _bounded_key(name: str, key: LabelKey, series: Dict[LabelKey, Any]) -> LabelKey:
+    """The key a new series is stored under, after applying LABEL_LIMITS."""
+    limit = LABEL_LIMITS.get(name)
+    if limit is None or key in series:
+        return key
+    label, max_values = limit
+    labels = dict(key)
+    if label not in labels or labels[label] == OVERFLOW_LABEL:
+        return key
+    seen = {dict(existing).get(label) for existing in series} - {OVERFLOW_LABEL}
+    if labels[label] in seen or len(seen) < max_values:
+        return key
+    labels[label] = OVERFLOW_LABEL
+    return tuple(sorted(labels.items()))
+
+class Metrics:
+    """Process-wide histograms and counters keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record a value in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _bounded_key(name, key, series)
+            histogram = series.get(key)
+            if histogram is None:
+                definition = METRIC_DEFINITIONS.get(name)
+                histogram = series[key] = Histogram(definition[2] if definition else DURATION_BUCKETS)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _bounded_key(name, key, series)
+            series[key] = series.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block into a histogram.
+
+        Yields a dict of labels that the block may extend (e.g. with the
+        platform once it is known); the duration is recorded even if the
+        block raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_state(self) -> Dict[str, Any]:
+        """Get a JSON-serializable copy of every series."""
+        with self._lock:
+            return {
+                "histograms": {
+                    name: [[list(map(list, key)), histogram.to_state()] for key, histogram in series.items()]
+                    for name, series in self._histograms.items()
+                },
+                "counters": {
+                    name: [[list(map(list, key)), value] for key, value in series.items()]
+                    for name, series in self._counters.items()
+                }
+            }
+
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        """Add series from to_state() output to this registry."""
+        with self._lock:
+            for name, entries in state.get("histograms", {}).items():
+                series = self._histograms.setdefault(name, {})
+                for key, histogram_state in entries:
+                    key = _bounded_key(name, tuple(tuple(pair) for pair in key), series)
+                    if key not in series:
+                        series[key] = Histogram(histogram_state["buckets"])
+                    series[key].merge_state(histogram_state)
+            for name, entries in state.get("counters", {}).items():
+                series = self._counters.setdefault(name, {})
+                for key, value in entries:
+                    key = _bounded_key(name, tuple(tuple(pair) for pair in key), series)
+                    series[key] = series.get(key, 0) + value
+
+    def render_prometheus(self) -> str:
+        """Render every series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._histograms):
+                self._header(lines, name, "histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', _format_number(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+            for name in sorted(self._counters):
+                self._header(lines, name, "counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(lines: List[str], name: str, kind: str) -> None:
+        help_text = METRIC_DEFINITIONS.get(name, (kind, name, None))[1]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def summary(self) -> List[str]:
+        """One line per histogram series with count and p50/p95/p99, plus counters."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._histograms):
+                for key, histogram in sorted(self._histograms[name].items()):
+                    quantiles = " ".join(
+                        f"p{int(q * 100)}={histogram.quantile(q):.3f}" for q in QUANTILES
+                    )
+                    lines.append(f"{name}{_format_labels(key)} n={histogram.count} {quantiles}")
+            for name in sorted(self._counters):
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_number(value)}")
+        return lines
+
+    def export(self, textfile: Optional[str] = None) -> bool:
+        """
+        Fold this run's series into the accumulated totals and write the textfile.
+
+        Series are reset afterwards, so exporting twice never counts a value
+        twice.
+
+        Args:
+            textfile: Output path, defaults to METRICS_TEXTFILE
+
+        Returns:
+            bool: True if a textfile was written
+        """
+        textfile = textfile or os.getenv("METRICS_TEXTFILE")
+        if not textfile:
+            return False
+
+        state_path = state_dir() / "metrics.json"
+        totals = Metrics()
+        with locked_file(state_path):
+            totals.merge_state(read_json(state_path, {}))
+            totals.merge_state(self.to_state())
+            write_json_atomic(state_path, totals.to_state())
+            _write_text_atomic(Path(textfile), totals.render_prometheus())
+        self.reset()
+        return True
+
+def _write_text_atomic(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+metrics = Metrics()
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[int]:
+    """
+    Serve /metrics from a daemon thread (once per process).
+
+    Args:
+        port: Port to listen on, defaults to METRICS_PORT (0 picks a free port)
+
+    Returns:
+        Optional[int]: Port being served, or None if no port is configured
+    """
+    global _server
+    if port is None:
+        if not os.getenv("METRICS_PORT"):
+            return None
+        port = int(os.getenv("METRICS_PORT"))
+
+    with _server_lock:
+        if _server is None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = metrics.render_prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            host = os.getenv("METRICS_HOST", "127.0.0.1")
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info("Serving metrics on http://%s:%s/metrics", host, _server.server_port)
+    return _server.server_port
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show accumulated publisher metrics")
+    parser.add_argument("--format", choices=["summary", "prometheus"], default="summary")
+    args = parser.parse_args()
+
+    totals = Metrics()
+    totals.merge_state(read_json(state_dir() / "metrics.json", {}))
+    if args.format == "prometheus":
+        print(totals.render_prometheus(), end="")
+    else:
+        print("\n".join(totals.summary()) or "No metrics recorded yet")
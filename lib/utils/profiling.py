@@ -0,0 +1,336 @@
+"""
+Opt-in profiling for publisher runs.
+
+Nothing here runs unless ``profiler.configure()`` enables it (see the
+``--profile`` options of run_publisher.py). Available modes:
+
+- ``cprofile``: deterministic profile of the whole run, or only of selected
+  stages, written as ``.prof`` files (``python -m pstats``, snakeviz).
+- ``sampling``: a background thread samples the publisher thread's stack
+  every few milliseconds and writes folded stacks (``.folded``, for
+  flamegraph.pl or speedscope). Much lower overhead than cProfile, so it is
+  the one to use on a slow production run.
+- ``tracemalloc``: memory snapshots at the start and end of the run (and
+  every N videos), written as ``.tracemalloc`` files
+  (``tracemalloc.Snapshot.load``).
+
+Files go to ``PUBLISHER_PROFILE_DIR`` (default ``profiles``) and are named
+``<UTC timestamp>-<pid>-<what>.<ext>``. Summary mode prints the hottest
+functions and the duration and peak traced memory of each video when the
+run ends, and writes the same text to ``...-summary.txt``.
+"""
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Frames kept per allocation for snapshots; summary-only tracing keeps one
+TRACEMALLOC_FRAMES = 10
+
+SUMMARY_TOP = 20
+
+_NULL_CONTEXT = nullcontext()
+
+class StackSampler(threading.Thread):
+    """Samples one thread's stack at a fixed interval while ``active``."""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.active = False
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            if not self.active:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def top_functions(self, limit: int = SUMMARY_TOP) -> List[str]:
+        """Functions with the most samples on top of the stack (self) and anywhere in it (cumulative)."""
+        total = sum(self.stacks.values())
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                cumulative[frame] += count
+        lines = [f"{'self %':>7} {'cum %':>7} {'samples':>8}  function"]
+        for function, count in own.most_common(limit):
+            lines.append(
+                f"{count / total * 100:>7.1f} {cumulative[function] / total * 100:>7.1f} {count:>8}  {function}"
+            )
+        return lines
+
+class Profiler:
+    """Run-level profiling hooks; every hook is a no-op until configured."""
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self.stages: Optional[set] = None
+        self.trace_memory = False
+        self.snapshot_every = 0
+        self.summary = False
+        self.sample_interval = DEFAULT_SAMPLE_INTERVAL
+        self.output_dir = Path(os.getenv("PUBLISHER_PROFILE_DIR", "profiles"))
+        self._prefix = ""
+        self._run_profile: Optional[cProfile.Profile] = None
+        self._stage_profiles: Dict[str, cProfile.Profile] = {}
+        self._sampler: Optional[StackSampler] = None
+        self._videos: List[Dict[str, Any]] = []
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_tracemalloc = False
+        self._written: List[Path] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.mode or self.trace_memory or self.summary)
+
+    def configure(
+        self,
+        mode: Optional[str] = None,
+        stages: Optional[Sequence[str]] = None,
+        trace_memory: bool = False,
+        snapshot_every: int = 0,
+        summary: bool = False,
+        sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+        output_dir: Optional[str] = None
+    ) -> None:
+        """
+        Enable profiling for the next run.
+
+        Args:
+            mode: 'cprofile', 'sampling' or None; summary mode without a mode
+                uses sampling
+            stages: Profile only these stages (e.g. ['upload']); whole run if omitted
+            trace_memory: Write tracemalloc snapshots
+            snapshot_every: Also snapshot after every N videos (needs trace_memory)
+            summary: Print top functions and per-video peak memory at the end
+            sample_interval: Seconds between stack samples in sampling mode
+            output_dir: Directory for profile files
+        """
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Invalid profile mode. Must be one of: {PROFILE_MODES}")
+        self.mode = mode or ("sampling" if summary else None)
+        self.stages = set(stages) if stages else None
+        self.trace_memory = trace_memory
+        self.snapshot_every = snapshot_every
+        self.summary = summary
+        self.sample_interval = sample_interval
+        if output_dir:
+            self.output_dir = Path(output_dir)
+
+    def _path(self, name: str) -> Path:
+        path = self.output_dir / f"{self._prefix}-{name}"
+        self._written.append(path)
+        return path
+
+    # Run lifecycle
+
+    def start(self) -> None:
+        """Start profiling a run."""
+        if not self.enabled:
+            return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._prefix = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{os.getpid()}"
+        self._videos = []
+        self._written = []
+
+        # Per-video peaks need tracemalloc even when no snapshots are written
+        if (self.trace_memory or self.summary) and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES if self.trace_memory else 1)
+            self._started_tracemalloc = True
+        if self.trace_memory:
+            self._start_snapshot = self._snapshot("start")
+
+        if self.mode == "sampling":
+            self._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self._sampler.active = self.stages is None
+            self._sampler.start()
+        elif self.mode == "cprofile" and self.stages is None:
+            self._run_profile = cProfile.Profile()
+            self._run_profile.enable()
+
+        logger.info(
+            "Profiling run (%s, %s) into %s",
+            self.mode or "memory only",
+            f"stages {','.join(sorted(self.stages))}" if self.stages else "whole run",
+            self.output_dir
+        )
+
+    def finish(self) -> List[Path]:
+        """
+        Stop profiling and write the output files.
+
+        Returns:
+            List[Path]: Files written for this run
+        """
+        if not self.enabled or not self._prefix:
+            return []
+
+        if self._run_profile:
+            self._run_profile.disable()
+            self._run_profile.dump_stats(self._path("run.prof"))
+        for stage, profile in self._stage_profiles.items():
+            profile.dump_stats(self._path(f"stage-{stage}.prof"))
+
+        if self._sampler:
+            self._sampler.stop()
+            with open(self._path("samples.folded"), "w") as f:
+                for stack, count in self._sampler.stacks.items():
+                    f.write(f"{stack} {count}\n")
+
+        end_snapshot = self._snapshot("end") if self.trace_memory else None
+
+        if self.summary:
+            text = "\n".join(self._summary_lines(end_snapshot)) + "\n"
+            self._path("summary.txt").write_text(text)
+            print(text, end="")
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        written = list(self._written)
+        logger.info("Wrote %s profile file(s) to %s", len(written), self.output_dir)
+        self._run_profile = None
+        self._stage_profiles = {}
+        self._sampler = None
+        self._start_snapshot = None
+        self._prefix = ""
+        return written
+
+    # Hooks
+
+    def stage(self, name: str):
+        """Context manager around a publishing stage; profiles it if selected."""
+        if not self.stages or name not in self.stages or not self._prefix:
+            return _NULL_CONTEXT
+        return self._profile_stage(name)
+
+    @contextmanager
+    def _profile_stage(self, name: str) -> Iterator[None]:
+        if self._sampler:
+            self._sampler.active = True
+            try:
+                yield
+            finally:
+                self._sampler.active = False
+            return
+
+        profile = self._stage_profiles.setdefault(name, cProfile.Profile())
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def video(self, video_id: str, platform: str):
+        """Context manager around one video; records its duration and peak traced memory above the level at its start."""
+        if not self._prefix:
+            return _NULL_CONTEXT
+        return self._track_video(video_id, platform)
+
+    @contextmanager
+    def _track_video(self, video_id: str, platform: str) -> Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {
+                "video_id": video_id,
+                "platform": platform,
+                "seconds": time.perf_counter() - started,
+                "peak_bytes": tracemalloc.get_traced_memory()[1] - baseline if tracing else None
+            }
+            self._videos.append(record)
+            if self.trace_memory and self.snapshot_every and len(self._videos) % self.snapshot_every == 0:
+                self._snapshot(f"video-{len(self._videos):05d}")
+
+    # Output
+
+    def _snapshot(self, name: str) -> tracemalloc.Snapshot:
+        snapshot = tracemalloc.take_snapshot()
+        snapshot.dump(str(self._path(f"{name}.tracemalloc")))
+        return snapshot
+
+    def _hot_function_lines(self) -> List[str]:
+        if self._sampler:
+            if not self._sampler.stacks:
+                return ["(no samples)"]
+            return self._sampler.top_functions()
+
+        profiles = [self._run_profile] if self._run_profile else list(self._stage_profiles.values())
+        if not profiles:
+            return ["(nothing profiled)"]
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        lines = [f"{'self s':>9} {'cum s':>9} {'calls':>9}  function"]
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:SUMMARY_TOP]
+        for (filename, line, function), (_, calls, own, cumulative, _) in entries:
+            lines.append(f"{own:>9.4f} {cumulative:>9.4f} {calls:>9}  {function} ({filename}:{line})")
+        return lines
+
+    def _summary_lines(self, end_snapshot: Optional[tracemalloc.Snapshot]) -> List[str]:
+        scope = f"stages {','.join(sorted(self.stages))}" if self.stages else "whole run"
+        lines = [f"Top functions ({self.mode}, {scope}):"]
+        lines.extend(f"  {line}" for line in self._hot_function_lines())
+
+        lines.append("")
+        lines.append(f"Per video ({len(self._videos)}):")
+        lines.append(f"  {'seconds':>8} {'peak MB':>8}  {'platform':<10} video_id")
+        for record in self._videos:
+            peak = f"{record['peak_bytes'] / 1024 ** 2:>8.2f}" if record["peak_bytes"] is not None else f"{'-':>8}"
+            lines.append(f"  {record['seconds']:>8.3f} {peak}  {record['platform']:<10} {record['video_id']}")
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append("")
+            lines.append(f"Traced memory: {current / 1024 ** 2:.2f} MB now, {peak / 1024 ** 2:.2f} MB peak")
+
+        if self._start_snapshot and end_snapshot:
+            lines.append("")
+            lines.append("Memory growth since start (top 10):")
+            # Leave out the profiler's own allocations (e.g. sampled stacks)
+            exclude = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+            growth = end_snapshot.filter_traces(exclude).compare_to(self._start_snapshot.filter_traces(exclude), "lineno")
+            for stat in growth[:10]:
+                lines.append(f"  {stat}")
+        return lines
+
+profiler = Profiler()
@@ -0,0 +1,331 @@
+"""
+Local SQLite index of publishing history.
+
+Every manifest saved by the publisher is also recorded as one row in a small
+SQLite database (``PUBLISH_HISTORY_DB``, default
+``<state dir>/publish_history.db``), indexed on video_id, platform, status
+and published_at. History questions ("what went to Instagram last week and
+where is it?") can then be answered locally and offline without calling
+Supabase or reading the manifest log.
+
+Query or export the index, or rebuild it from the manifest log::
+
+    python -m lib.utils.publish_history query --platform instagram --since 7d
+    python -m lib.utils.publish_history export --format csv --output history.csv
+    python -m lib.utils.publish_history rebuild
+"""
+
+import os
+import re
+import csv
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, TextIO
+
+from .local_state import state_dir
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "video_id",
+    "schedule_id",
+    "platform",
+    "status",
+    "published_at",
+    "publish_url",
+    "storage_path",
+    "manifest_location"
+)
+
+SCHEMA = """
+create table if not exists publish_history (
+    id integer primary key,
+    video_id text not null,
+    schedule_id text,
+    platform text not null,
+    status text not null,
+    published_at text not null,
+    publish_url text,
+    storage_path text,
+    manifest_location text,
+    manifest text,
+    unique (video_id, platform, published_at)
+);
+create index if not exists idx_publish_history_video_id on publish_history(video_id);
+create index if not exists idx_publish_history_platform on publish_history(platform, published_at);
+create index if not exists idx_publish_history_status on publish_history(status, published_at);
+create index if not exists idx_publish_history_published_at on publish_history(published_at);
+"""
+
+def parse_time(value: Optional[str]) -> Optional[str]:
+    """
+    Parse a CLI time bound into an ISO 8601 UTC timestamp.
+
+    Accepts ISO dates/timestamps or relative ages such as ``90m``, ``12h``,
+    ``7d`` or ``2w`` (that long before now).
+    """
+    if not value:
+        return None
+    match = re.fullmatch(r"(\d+)([mhdw])", value.strip())
+    if match:
+        unit = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}[match.group(2)]
+        moment = datetime.now(timezone.utc) - timedelta(**{unit: int(match.group(1))})
+    else:
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat()
+
+class PublishHistory:
+    """SQLite-backed publish-history index."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("PUBLISH_HISTORY_DB") or state_dir() / "publish_history.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Several publisher processes may share the file; WAL keeps readers
+        # off the writer's lock and the busy timeout absorbs short contention
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=normal")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row(record: Dict[str, Any]) -> Optional[tuple]:
+        """Build an index row from a manifest log record, or None if it has no JSON manifest."""
+        if record.get("format", "json") != "json":
+            return None
+        try:
+            manifest = json.loads(record.get("content") or "{}")
+        except ValueError:
+            manifest = {}
+        video_id = record.get("video_id") or manifest.get("video_id")
+        platform = record.get("platform") or manifest.get("platform")
+        if not video_id or not platform:
+            return None
+        return (
+            str(video_id),
+            record.get("schedule_id"),
+            platform,
+            record.get("status") or manifest.get("status") or "success",
+            manifest.get("published_at") or record.get("ts") or datetime.now(timezone.utc).isoformat(),
+            manifest.get("publish_url"),
+            manifest.get("storage_path") or None,
+            record.get("location"),
+            record.get("content")
+        )
+
+    def record_many(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Index manifest records, replacing any earlier row for the same publish.
+
+        Args:
+            records: Manifest log records (video_id, schedule_id, platform,
+                status, content) plus an optional ``location``
+
+        Returns:
+            int: Number of rows written
+        """
+        rows = [row for row in map(self._row, records) if row]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"insert into publish_history ({', '.join(COLUMNS)}, manifest) "
+                f"values ({', '.join('?' * (len(COLUMNS) + 1))}) "
+                "on conflict (video_id, platform, published_at) do update set "
+                "schedule_id = excluded.schedule_id, status = excluded.status, "
+                "publish_url = excluded.publish_url, storage_path = excluded.storage_path, "
+                "manifest_location = coalesce(excluded.manifest_location, publish_history.manifest_location), "
+                "manifest = excluded.manifest",
+                rows
+            )
+        return len(rows)
+
+    def record(self, record: Dict[str, Any]) -> bool:
+        """Index a single manifest record. Returns False if it was not indexable."""
+        return self.record_many([record]) == 1
+
+    def query(
+        self,
+        video_id: Optional[str] = None,
+        platform: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+        include_manifest: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Look up publish history, newest first.
+
+        Args:
+            video_id: Optional video ID filter
+            platform: Optional platform filter
+            status: Optional status filter
+            since: Inclusive lower bound on published_at (ISO timestamp)
+            until: Exclusive upper bound on published_at (ISO timestamp)
+            limit: Maximum number of rows
+            include_manifest: Also return the full JSON manifest
+
+        Returns:
+            List[Dict[str, Any]]: Matching rows
+        """
+        return list(self.iter_rows(video_id, platform, status, since, until, limit, include_manifest))
+
+    def iter_rows(
+        self,
+        video_id: Optional[str] = None,
+        platform: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+        include_manifest: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over publish history rows; see ``query`` for the arguments."""
+        conditions, params = [], []
+        for column, value in (("video_id", video_id), ("platform", platform), ("status", status)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            conditions.append("published_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("published_at < ?")
+            params.append(until)
+
+        columns = list(COLUMNS) + (["manifest"] if include_manifest else [])
+        sql = f"select {', '.join(columns)} from publish_history"
+        if conditions:
+            sql += " where " + " and ".join(conditions)
+        sql += " order by published_at desc"
+        if limit:
+            sql += " limit ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        for row in rows:
+            yield dict(row)
+
+    def export(self, out: TextIO, fmt: str = "jsonl", **filters) -> int:
+        """
+        Write publish history to a file.
+
+        Args:
+            out: Text stream to write to
+            fmt: ``jsonl`` (one JSON object per line, with manifests) or ``csv``
+            **filters: Filters accepted by ``query``
+
+        Returns:
+            int: Number of rows written
+        """
+        count = 0
+        if fmt == "csv":
+            writer = csv.DictWriter(out, fieldnames=list(COLUMNS))
+            writer.writeheader()
+            for row in self.iter_rows(**filters):
+                writer.writerow(row)
+                count += 1
+        elif fmt == "jsonl":
+            for row in self.iter_rows(include_manifest=True, **filters):
+                out.write(json.dumps(row) + "\n")
+                count += 1
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        return count
+
+    def rebuild(self) -> int:
+        """
+        Re-index every JSON manifest in the manifest log, with its location.
+
+        Returns:
+            int: Number of rows written
+        """
+        from .manifest_log import get_manifest_log
+
+        manifest_log = get_manifest_log()
+        count, batch = 0, []
+        for record in manifest_log.scan():
+            # Also replaces segment:offset locations written before they were
+            # made stable across compaction
+            batch.append({**record, "location": manifest_log.location(record)})
+            if len(batch) >= 1000:
+                count += self.record_many(batch)
+                batch = []
+        count += self.record_many(batch)
+        logger.info("Rebuilt publish history from manifest log (%s rows)", count)
+        return count
+
+_history: Optional[PublishHistory] = None
+_history_lock = threading.Lock()
+
+def get_publish_history() -> PublishHistory:
+    """Get the process-wide publish history index."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = PublishHistory()
+    return _history
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query or export the local publish history")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("query", "List published videos"), ("export", "Export publish history")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--video-id")
+        sub.add_argument("--platform")
+        sub.add_argument("--status")
+        sub.add_argument("--since", help="ISO timestamp or age such as 7d")
+        sub.add_argument("--until", help="ISO timestamp or age such as 1d")
+        sub.add_argument("--limit", type=int)
+    subparsers.choices["query"].add_argument("--json", action="store_true", help="Print JSON lines")
+    subparsers.choices["export"].add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    subparsers.choices["export"].add_argument("--output", help="Output file (default stdout)")
+    subparsers.add_parser("rebuild", help="Re-index the manifest log")
+    args = parser.parse_args()
+
+    history = get_publish_history()
+    if args.command == "rebuild":
+        print(json.dumps({"rows": history.rebuild()}))
+        sys.exit(0)
+
+    filters = {
+        "video_id": args.video_id,
+        "platform": args.platform,
+        "status": args.status,
+        "since": parse_time(args.since),
+        "until": parse_time(args.until),
+        "limit": args.limit
+    }
+    if args.command == "export":
+        if args.output:
+            with open(args.output, "w", newline="") as f:
+                count = history.export(f, args.format, **filters)
+        else:
+            count = history.export(sys.stdout, args.format, **filters)
+        print(f"Exported {count} rows", file=sys.stderr)
+    elif args.json:
+        for row in history.iter_rows(**filters):
+            print(json.dumps(row))
+    else:
+        for row in history.iter_rows(**filters):
+            print(
+                f"{row['published_at'][:19]}  {row['platform']:<10} {row['status']:<8} "
+                f"{row['video_id']}  {row['publish_url'] or '-'}"
+            )
@@ -0,0 +1,261 @@
+"""
+Crash-safe local journal of in-flight publishes.
+
+Each video_schedule row the publisher works on gets a row in a SQLite
+database (``PUBLISH_JOURNAL_DB``, default ``<state dir>/publish_journal.db``)
+that moves through three states:
+
+- ``started``: about to upload
+- ``uploaded``: the platform accepted the video; its result (publish URL,
+  platform video ID) is recorded
+- ``completed``: the status write to video_schedule landed
+
+If the worker dies between the upload and the status write, the row is left
+``uploaded``. The next run on the node finishes it from the recorded result
+(manifest and status write) instead of uploading the video again. Every entry
+records the worker that owns it (``host:pid``, like ``claimed_by``); another
+worker only takes an entry over once its owner has exited or has held it
+longer than the claim lease, and the takeover is a compare-and-set on the
+owner, so exactly one process finishes it. Rows left
+``started`` died mid-upload: the platform may or may not have the video, so
+they are retried normally and reported.
+
+Commits use ``synchronous=full`` so a journal entry survives a power loss as
+well as a crash. Completed entries are pruned after
+``PUBLISH_JOURNAL_RETENTION_DAYS`` (default 7).
+
+    python -m lib.utils.publish_journal          # list unfinished entries
+"""
+
+import os
+import json
+import socket
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .local_state import state_dir
+
+logger = logging.getLogger(__name__)
+
+STATES = ("started", "uploaded", "completed")
+
+SCHEMA = """
+create table if not exists publish_journal (
+    schedule_id text primary key,
+    video_id text not null,
+    platform text not null,
+    state text not null,
+    video text not null,
+    result text,
+    attempts integer not null default 1,
+    owner text,
+    owner_at text,
+    started_at text not null,
+    uploaded_at text,
+    completed_at text
+);
+create index if not exists idx_publish_journal_state on publish_journal(state, started_at);
+"""
+
+# Per-run values that must not be replayed (the temporary download)
+_TRANSIENT_KEYS = ("file_path",)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def owner_id() -> str:
+    """Identify this process as the owner of journal entries (same format as claimed_by)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def owner_alive(owner: Optional[str]) -> bool:
+    """
+    Check whether the process that owns an entry is still running.
+
+    The journal is local to the node, so an owner on another host (e.g. the
+    state directory was copied) is treated as gone.
+    """
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    except OSError:
+        return False
+    return True
+
+class PublishJournal:
+    """SQLite write-ahead journal of publishes, keyed by schedule ID."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("PUBLISH_JOURNAL_DB") or state_dir() / "publish_journal.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Shared by the node's workers like the publish history; full sync
+        # because losing an "uploaded" entry means uploading the video twice
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=full")
+        self._conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("pragma table_info(publish_journal)")}
+        for column in ("owner", "owner_at"):
+            if column not in columns:
+                self._conn.execute(f"alter table publish_journal add column {column} text")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry["video"] = json.loads(entry["video"])
+        entry["result"] = json.loads(entry["result"]) if entry["result"] else None
+        return entry
+
+    def get(self, schedule_id: str) -> Optional[Dict[str, Any]]:
+        """The journal entry of a schedule row, with ``video`` and ``result`` decoded."""
+        with self._lock:
+            row = self._conn.execute(
+                "select * from publish_journal where schedule_id = ?", (schedule_id,)
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def start(self, video: Dict[str, Any]) -> None:
+        """
+        Record the intent to upload a schedule row, owned by this process.
+
+        Args:
+            video: The claimed row (must have ``id``, ``video_id`` and ``platform``)
+        """
+        stored = {k: v for k, v in video.items() if k not in _TRANSIENT_KEYS}
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert into publish_journal "
+                "(schedule_id, video_id, platform, state, video, owner, owner_at, started_at) "
+                "values (?, ?, ?, 'started', ?, ?, ?, ?) "
+                "on conflict (schedule_id) do update set state = 'started', video = excluded.video, "
+                "result = null, attempts = publish_journal.attempts + 1, owner = excluded.owner, "
+                "owner_at = excluded.owner_at, started_at = excluded.started_at, "
+                "uploaded_at = null, completed_at = null",
+                (video["id"], video["video_id"], video["platform"], json.dumps(stored, default=str),
+                 owner_id(), now, now)
+            )
+
+    def uploaded(self, schedule_id: str, result: Dict[str, Any]) -> None:
+        """Record that the platform accepted the upload, with its result."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "update publish_journal set state = 'uploaded', result = ?, uploaded_at = ? where schedule_id = ?",
+                (json.dumps(result, default=str), _now(), schedule_id)
+            )
+
+    def claim(self, entry: Dict[str, Any], stale_after: float) -> bool:
+        """
+        Take ownership of an ``uploaded`` entry before finishing it.
+
+        Succeeds if this process already owns the entry, or if its owner has
+        exited or has owned it for more than ``stale_after`` seconds. The
+        owner is swapped only if nobody took the entry over since it was
+        read, so concurrent workers never both finish it.
+
+        Args:
+            entry: Entry as returned by ``get`` or ``pending``
+            stale_after: Seconds after which a live owner's entry may be taken
+                over (the claim lease)
+
+        Returns:
+            bool: True if this process now owns the entry
+        """
+        me = owner_id()
+        if entry["owner"] == me:
+            return True
+        if owner_alive(entry["owner"]) and entry["owner_at"]:
+            owned_for = datetime.now(timezone.utc) - datetime.fromisoformat(entry["owner_at"])
+            if owned_for.total_seconds() < stale_after:
+                return False
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "update publish_journal set owner = ?, owner_at = ? "
+                "where schedule_id = ? and state = 'uploaded' and owner is ? and owner_at is ?",
+                (me, _now(), entry["schedule_id"], entry["owner"], entry["owner_at"])
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, schedule_id: str) -> None:
+        """Record that the status write landed."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "update publish_journal set state = 'completed', completed_at = ? where schedule_id = ?",
+                (_now(), schedule_id)
+            )
+
+    def discard(self, schedule_id: str) -> None:
+        """Forget an entry whose upload failed; nothing exists on the platform to protect."""
+        with self._lock, self._conn:
+            self._conn.execute("delete from publish_journal where schedule_id = ?", (schedule_id,))
+
+    def pending(self, state: str = "uploaded") -> List[Dict[str, Any]]:
+        """Unfinished entries in the given state, oldest first."""
+        if state not in STATES:
+            raise ValueError(f"Invalid journal state. Must be one of: {STATES}")
+        with self._lock:
+            rows = self._conn.execute(
+                "select * from publish_journal where state = ? order by started_at", (state,)
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def prune(self, retention_days: Optional[float] = None) -> int:
+        """
+        Delete completed entries older than the retention period.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        if retention_days is None:
+            retention_days = float(os.getenv("PUBLISH_JOURNAL_RETENTION_DAYS", "7"))
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).isoformat()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "delete from publish_journal where state = 'completed' and completed_at < ?", (cutoff,)
+            )
+        return cursor.rowcount
+
+_journal: Optional[PublishJournal] = None
+_journal_lock = threading.Lock()
+
+def get_publish_journal() -> PublishJournal:
+    """Get the process-wide publish journal."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = PublishJournal()
+    return _journal
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show unfinished publish journal entries")
+    parser.add_argument("--state", choices=STATES, help="Only entries in this state (default: started and uploaded)")
+    args = parser.parse_args()
+
+    journal = get_publish_journal()
+    for state in [args.state] if args.state else ["started", "uploaded"]:
+        for entry in journal.pending(state):
+            print(json.dumps({k: entry[k] for k in (
+                "schedule_id", "video_id", "platform", "state", "attempts", "owner", "started_at",
+                "uploaded_at", "result"
+            )}))
@@ -0,0 +1,203 @@
+"""
+Per-platform rate limiting and daily quota accounting.
+
+Each platform credential gets a token bucket (short-term request rate) and
+an optional daily quota budget (e.g. YouTube Data API units). Counters are
+persisted under the publisher state directory so restarts and concurrent
+worker processes on the same node share them.
+"""
+
+import os
+import time
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone, tzinfo
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .local_state import state_dir, locked_file, read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PlatformLimits:
+    """Rate and quota configuration for one platform."""
+    per_minute: float
+    burst: int
+    daily_quota: Optional[int]
+    cost: int
+    reset_tz: str = "UTC"
+    credential_env: Optional[str] = None
+
+# Defaults reflect the published platform limits:
+# - YouTube Data API: 10,000 units/day, videos.insert costs ~1600 units,
+#   quota resets at midnight Pacific time
+# - Instagram: 50 API-published posts per account per 24 hours
+# - Facebook: no fixed daily count, app usage is throttled via headers
+DEFAULT_LIMITS: Dict[str, PlatformLimits] = {
+    'youtube': PlatformLimits(
+        per_minute=2, burst=2, daily_quota=10000, cost=1600,
+        reset_tz="America/Los_Angeles", credential_env="YOUTUBE_CLIENT_ID"
+    ),
+    'instagram': PlatformLimits(
+        per_minute=4, burst=2, daily_quota=50, cost=1,
+        credential_env="INSTAGRAM_USER_ID"
+    ),
+    'facebook': PlatformLimits(
+        per_minute=10, burst=5, daily_quota=None, cost=1,
+        credential_env="FACEBOOK_PAGE_ID"
+    ),
+}
+
+def get_platform_limits(platform: str) -> Optional[PlatformLimits]:
+    """
+    Get limits for a platform, applying environment overrides.
+
+    Overrides use ``RATE_LIMIT_<PLATFORM>_PER_MINUTE``,
+    ``RATE_LIMIT_<PLATFORM>_BURST``, ``QUOTA_<PLATFORM>_DAILY`` (0 disables
+    the daily budget) and ``QUOTA_<PLATFORM>_COST``.
+
+    Args:
+        platform: Platform name
+
+    Returns:
+        Optional[PlatformLimits]: Limits, or None if the platform is unlimited
+    """
+    defaults = DEFAULT_LIMITS.get(platform)
+    if defaults is None:
+        return None
+
+    prefix = platform.upper()
+    daily = os.getenv(f"QUOTA_{prefix}_DAILY")
+    daily_quota = defaults.daily_quota if daily is None else (int(daily) or None)
+
+    return PlatformLimits(
+        per_minute=float(os.getenv(f"RATE_LIMIT_{prefix}_PER_MINUTE", defaults.per_minute)),
+        burst=int(os.getenv(f"RATE_LIMIT_{prefix}_BURST", defaults.burst)),
+        daily_quota=daily_quota,
+        cost=int(os.getenv(f"QUOTA_{prefix}_COST", defaults.cost)),
+        reset_tz=os.getenv(f"QUOTA_{prefix}_RESET_TZ", defaults.reset_tz),
+        credential_env=defaults.credential_env
+    )
+
+def _quota_day(tz_name: str) -> str:
+    """Get the current quota day in the platform's reset timezone."""
+    tz: tzinfo = timezone.utc
+    if tz_name != "UTC":
+        try:
+            from zoneinfo import ZoneInfo
+            tz = ZoneInfo(tz_name)
+        except Exception:
+            logger.warning("Unknown quota timezone %s, using UTC", tz_name)
+    return datetime.now(tz).date().isoformat()
+
+class QuotaLimiter:
+    """
+    Token bucket plus daily quota keyed by platform and credential.
+
+    State lives in a JSON file guarded by a cross-process lock, keyed as
+    ``<platform>:<credential>`` so two channels or pages never share a budget.
+    """
+
+    def __init__(self, state_path: Optional[Path] = None):
+        self.state_path = state_path or (state_dir() / "quota.json")
+
+    def _key(self, platform: str, limits: PlatformLimits) -> str:
+        credential = os.getenv(limits.credential_env, "") if limits.credential_env else ""
+        return f"{platform}:{credential or 'default'}"
+
+    def try_acquire(
+        self,
+        platform: str,
+        cost: Optional[int] = None,
+        use_token: bool = True
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Reserve one request and ``cost`` quota units for a platform.
+
+        Args:
+            platform: Platform name
+            cost: Quota units to reserve, defaults to the platform's upload cost
+            use_token: Whether the request counts against the upload rate;
+                cheap read calls only draw from the daily quota
+
+        Returns:
+            Tuple[bool, Optional[str]]: (allowed, reason the request was deferred)
+        """
+        limits = get_platform_limits(platform)
+        if limits is None:
+            return True, None
+        if cost is None:
+            cost = limits.cost
+
+        key = self._key(platform, limits)
+        day = _quota_day(limits.reset_tz)
+        now = time.time()
+
+        with locked_file(self.state_path):
+            state = read_json(self.state_path, {})
+            entry = state.get(key) or {}
+
+            # Refill the token bucket
+            tokens = entry.get("tokens", float(limits.burst))
+            elapsed = max(now - entry.get("updated", now), 0.0)
+            tokens = min(float(limits.burst), tokens + elapsed * limits.per_minute / 60.0)
+
+            # Reset quota usage at the start of a new quota day
+            used = entry.get("used", 0) if entry.get("day") == day else 0
+
+            if limits.daily_quota is not None and used + cost > limits.daily_quota:
+                return False, (
+                    f"daily quota for {key} exhausted "
+                    f"({used}/{limits.daily_quota} units used, request needs {cost})"
+                )
+            if use_token and tokens < 1.0:
+                wait = (1.0 - tokens) * 60.0 / max(limits.per_minute, 1e-9)
+                return False, f"rate limit for {key} reached, next slot in {wait:.0f}s"
+
+            state[key] = {
+                "tokens": tokens - 1.0 if use_token else tokens,
+                "updated": now,
+                "day": day,
+                "used": used + cost
+            }
+            write_json_atomic(self.state_path, state)
+
+        return True, None
+
+    def refund(self, platform: str, cost: Optional[int] = None) -> None:
+        """
+        Return quota units reserved for a request that never reached the platform.
+
+        Args:
+            platform: Platform name
+            cost: Quota units to return, defaults to the platform's upload cost
+        """
+        limits = get_platform_limits(platform)
+        if limits is None:
+            return
+        if cost is None:
+            cost = limits.cost
+
+        key = self._key(platform, limits)
+        with locked_file(self.state_path):
+            state = read_json(self.state_path, {})
+            entry = state.get(key)
+            if not entry or entry.get("day") != _quota_day(limits.reset_tz):
+                return
+            entry["used"] = max(entry.get("used", 0) - cost, 0)
+            write_json_atomic(self.state_path, state)
+
+    def usage(self) -> Dict[str, Dict]:
+        """Get the persisted counters for every platform credential."""
+        with locked_file(self.state_path, shared=True):
+            return read_json(self.state_path, {})
+
+_limiter: Optional[QuotaLimiter] = None
+
+def get_quota_limiter() -> QuotaLimiter:
+    """Get the process-wide quota limiter."""
+    global _limiter
+    if _limiter is None:
+        _limiter = QuotaLimiter()
+    return _limiter
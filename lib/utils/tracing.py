@@ -0,0 +1,284 @@
+"""
+Optional per-video trace spans.
+
+Nothing is recorded unless ``tracer.configure()`` is given a file (see the
+``--trace`` option of run_publisher.py, or ``PUBLISHER_TRACE_FILE``). The
+publisher then opens one root span per video_schedule row, with child spans
+for its stages (metadata, get_video_file, upload, manifest,
+update_video_status) and for each Supabase, Graph API and YouTube upload
+chunk request inside them. Spans carry byte counts, HTTP status codes and
+errors as attributes.
+
+Spans are appended to the file as Chrome trace events, one line each, so a
+killed run still leaves a readable file. Open it in https://ui.perfetto.dev
+or chrome://tracing to see each video as a waterfall on its own row, or
+print a text waterfall::
+
+    python -m lib.utils.tracing traces.json --slowest 5
+
+Several workers can append to the same file.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+class Span:
+    """One timed operation; attributes are set with ``set()``."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent", "lane", "start", "end", "attributes")
+
+    def __init__(self, name: str, parent: Optional['Span'], lane: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.lane = lane
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+    def set(self, **attributes: Any) -> None:
+        """Add or overwrite attributes."""
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        """Mark the span as failed, with the HTTP status if the error carries one."""
+        self.attributes["error"] = f"{type(error).__name__}: {error}"[:500]
+        status = _status_of(error)
+        if status is not None:
+            self.attributes.setdefault("http_status", status)
+
+class _NullSpan:
+    """Stand-in returned while tracing is off."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+NULL_SPAN = _NullSpan()
+
+_NULL_CONTEXT = nullcontext(NULL_SPAN)
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+def _status_of(error: BaseException) -> Optional[int]:
+    """HTTP status of a SupabaseError, googleapiclient HttpError or requests HTTPError."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return int(status) if status is not None else None
+
+class Tracer:
+    """Records spans to a Chrome trace event file; every hook is a no-op until configured."""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._lanes = 0
+        # Span times are perf_counter readings; this maps them to wall-clock
+        # microseconds so spans from several workers line up
+        self._epoch_offset = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def configure(self, path: Optional[str] = None) -> None:
+        """
+        Start writing spans to a file.
+
+        Args:
+            path: Trace file (default PUBLISHER_TRACE_FILE); tracing stays off if neither is set
+        """
+        path = path or os.getenv("PUBLISHER_TRACE_FILE")
+        if not path or self._file is not None:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The JSON array is opened by whichever worker creates the file; the
+        # closing bracket is optional in the trace event format
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            os.write(fd, b"[\n")
+            os.close(fd)
+        except FileExistsError:
+            pass
+        self._file = open(path, "a", buffering=1024 * 1024)
+        self._epoch_offset = time.time() - time.perf_counter()
+        self.path = path
+
+    def close(self) -> None:
+        """Flush and stop tracing."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def current(self):
+        """The innermost open span, or a no-op span."""
+        return _current.get() or NULL_SPAN
+
+    def span(self, name: str, **attributes: Any):
+        """Context manager opening a span (a new trace if none is open) and yielding it."""
+        if self._file is None:
+            return _NULL_CONTEXT
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name: str, attributes: Dict[str, Any]) -> Iterator[Span]:
+        parent = _current.get()
+        if parent is None:
+            with self._lock:
+                self._lanes += 1
+                lane = self._lanes
+        else:
+            lane = parent.lane
+        span = Span(name, parent, lane, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end = time.perf_counter()
+            self._write(span)
+
+    def record(self, name: str, seconds: float, **attributes: Any) -> None:
+        """Record a finished child span of the current span that took ``seconds`` up to now."""
+        parent = _current.get()
+        if self._file is None or parent is None:
+            return
+        span = Span(name, parent, parent.lane, attributes)
+        span.end = time.perf_counter()
+        span.start = span.end - seconds
+        self._write(span)
+
+    def _write(self, span: Span) -> None:
+        pid = os.getpid()
+        event = {
+            "name": span.name,
+            "cat": "publish" if span.parent is None else "span",
+            "ph": "X",
+            "ts": round((span.start + self._epoch_offset) * 1e6),
+            "dur": round((span.end - span.start) * 1e6),
+            "pid": pid,
+            "tid": span.lane,
+            "args": {
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+                "parent_id": span.parent.span_id if span.parent else None,
+                **span.attributes
+            }
+        }
+        lines = [json.dumps(event, default=str)]
+        if span.parent is None:
+            # Label the root's row in the trace viewer, e.g. "youtube 1f0c..."
+            label = " ".join(str(span.attributes[key]) for key in ("platform", "video_id") if key in span.attributes)
+            lines.append(json.dumps({
+                "name": "thread_name", "ph": "M", "pid": pid, "tid": span.lane,
+                "args": {"name": label or span.name}
+            }))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write("".join(f"{line},\n" for line in lines))
+            if span.parent is None:
+                self._file.flush()
+
+tracer = Tracer()
+
+def read_trace(path: str) -> List[Dict[str, Any]]:
+    """Read the complete ("X") events of a trace file."""
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if not line or line in ("[", "]"):
+                continue
+            event = json.loads(line)
+            if event.get("ph") == "X":
+                events.append(event)
+    return events
+
+def waterfall(events: List[Dict[str, Any]], width: int = 40) -> List[str]:
+    """Render the spans of one trace as text, children indented under their parent."""
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for event in events:
+        children.setdefault(event["args"].get("parent_id"), []).append(event)
+    roots = children.get(None) or [min(events, key=lambda e: e["ts"])]
+    start = min(e["ts"] for e in events)
+    total = max(max(e["ts"] + e["dur"] for e in events) - start, 1)
+
+    lines = []
+
+    def render(event: Dict[str, Any], depth: int) -> None:
+        offset = event["ts"] - start
+        left = int(offset / total * width)
+        length = max(1, round(event["dur"] / total * width))
+        bar = " " * left + "#" * min(length, width - left)
+        attributes = " ".join(
+            f"{key}={value}" for key, value in event["args"].items()
+            if key not in ("trace_id", "span_id", "parent_id") and value is not None
+        )
+        lines.append(
+            f"{offset / 1000:>9.1f} {event['dur'] / 1000:>9.1f}  |{bar:<{width}}|  "
+            f"{'  ' * depth}{event['name']} {attributes}".rstrip()
+        )
+        for child in sorted(children.get(event["args"]["span_id"], []), key=lambda e: e["ts"]):
+            render(child, depth + 1)
+
+    for root in roots:
+        render(root, 0)
+    return lines
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print traces as text waterfalls")
+    parser.add_argument("path", help="Trace file written by run_publisher.py --trace")
+    parser.add_argument("--video", help="Only traces of this video_id")
+    parser.add_argument("--slowest", type=int, help="Only the N slowest traces")
+    parser.add_argument("--all", action="store_true", help="Include traces that are not a video (e.g. claims)")
+    args = parser.parse_args()
+
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for event in read_trace(args.path):
+        traces.setdefault(event["args"]["trace_id"], []).append(event)
+
+    selected = []
+    for events in traces.values():
+        root = next((e for e in events if e["args"].get("parent_id") is None), None)
+        if root is None or not (args.all or "video_id" in root["args"]):
+            continue
+        if args.video and root["args"].get("video_id") != args.video:
+            continue
+        selected.append((root, events))
+    if args.slowest:
+        selected = sorted(selected, key=lambda item: item[0]["dur"], reverse=True)[:args.slowest]
+    else:
+        selected.sort(key=lambda item: item[0]["ts"])
+
+    if not selected:
+        print("No matching traces", file=sys.stderr)
+    for root, events in selected:
+        print(f"trace {root['args']['trace_id']} (pid {root['pid']}): {root['dur'] / 1000:.1f} ms")
+        print(f"{'start ms':>9} {'ms':>9}")
+        print("\n".join(waterfall(events)))
+        print()
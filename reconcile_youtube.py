@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+YouTube Reconciliation Job Script
+Checks published YouTube uploads in bulk and records their processing status.
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from lib.platforms.youtube_reconcile import reconcile_youtube_uploads
+from lib.utils.log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=500,
+        help="Maximum number of schedule rows to reconcile (default: 500)"
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+
+    try:
+        summary = reconcile_youtube_uploads(args.limit)
+        logger.info("Reconciliation summary: %s", summary)
+    except Exception as e:
+        logger.error("Reconciliation job failed: %s", e)
+        sys.exit(1)
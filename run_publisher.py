@@ -6,19 +6,32 @@ Checks for and processes videos that are scheduled for publishing.
 
 import os
 import sys
+import time
+import uuid
+import hashlib
 import logging
+import argparse
+from contextlib import contextmanager
 from pathlib import Path
+from datetime import datetime, timezone
 from typing import Dict, Any
 sys.path.append(str(Path(__file__).parent))
 
-from lib.supabase.fetch_due_videos import fetch_due_videos
+from lib.supabase.fetch_due_videos import CLAIM_LEASE_SECONDS, fetch_due_videos, release_claims
 from lib.supabase.video_storage import get_video_file
-from lib.utils import generate_publish_manifest, save_and_upload_manifest
-from lib.platforms import handle_website_publishing
+from lib.utils import save_and_upload_manifest
+from lib.utils.env import load_env
+from lib.utils.log import configure_logging, log_context, log_payload, new_correlation_id
+from lib.utils.metrics import metrics, start_metrics_server
+from lib.utils.profiling import PROFILE_MODES, DEFAULT_SAMPLE_INTERVAL, profiler
+from lib.utils.tracing import tracer
+from lib.utils.manifest_builder import PublishManifest
+from lib.utils.manifest_uploader import flush_manifest_uploads
+from lib.utils.publish_journal import get_publish_journal, owner_alive
+from lib.utils.rate_limiter import get_quota_limiter
+from lib.platforms import PLATFORM_HANDLERS, get_platform_handler
 from lib.supabase.client import supabase
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def cleanup_video_file(file_path: str) -> None:
@@ -27,7 +40,20 @@ def cleanup_video_file(file_path: str) -> None:
         if os.path.exists(file_path):
             os.unlink(file_path)
     except Exception as e:
-        logger.error(f"Error cleaning up video file: {str(e)}")
+        logger.error("Error cleaning up video file: %s", e)
+
+@contextmanager
+def stage(name: str, **labels):
+    """Time and trace a publishing stage, and profile it when profiling is limited to selected stages."""
+    with metrics.timer("publisher_stage_seconds", stage=name, **labels), profiler.stage(name), tracer.span(name):
+        yield
+
+def schedule_lag_seconds(scheduled_at: str) -> float:
+    """Seconds between a row's scheduled_at and now."""
+    scheduled = datetime.fromisoformat(scheduled_at)
+    if scheduled.tzinfo is None:
+        scheduled = scheduled.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - scheduled).total_seconds()
 
 def update_video_status(
     schedule_id: str,
@@ -37,14 +63,45 @@ def update_video_status(
     manifest: str = None,
     manifest_url: str = None,
     error: str = None,
-    user_id: str = None
-) -> None:
-    """Update video publishing status."""
+    user_id: str = None,
+    platform_video_id: str = None
+) -> bool:
+    """Update video publishing status. Returns True if the row was updated."""
+    with stage("update_video_status"):
+        return _update_video_status(schedule_id, video_id, success, platform_url, manifest, manifest_url, error, platform_video_id)
+
+def _update_video_status(
+    schedule_id: str,
+    video_id: str,
+    success: bool,
+    platform_url: str,
+    manifest: str,
+    manifest_url: str,
+    error: str,
+    platform_video_id: str
+) -> bool:
     try:
+        manifest_ref = None
+        manifest_hash = None
+        if manifest:
+            # Store the manifest body in its own table; video_schedule only
+            # keeps a reference and hash so due-video reads stay small
+            manifest_ref = str(uuid.uuid4())
+            manifest_hash = hashlib.sha256(manifest.encode("utf-8")).hexdigest()
+            supabase.table("publish_manifests").insert({
+                "id": manifest_ref,
+                "schedule_id": schedule_id,
+                "format": "json",
+                "content": manifest,
+                "content_hash": manifest_hash
+            }, returning=False).execute()
+        
         data = {
             "published": success,
             "publish_url": platform_url,
-            "publish_manifest": manifest,
+            "platform_video_id": platform_video_id,
+            "manifest_ref": manifest_ref,
+            "manifest_hash": manifest_hash,
             "manifest_url": manifest_url,
             "publish_error": error
         }
@@ -53,162 +110,355 @@ def update_video_status(
         data = {k: v for k, v in data.items() if v is not None}
         
         # Use ID to target the row
-        query = supabase.table("video_schedule").update(data).eq("id", schedule_id)
+        query = supabase.table("video_schedule") \
+            .update(data) \
+            .eq("id", schedule_id) \
+            .select("id,published")
         response = query.execute()
         
-        # Log response for debugging
-        logger.info(f"Update response: {response.data}")
+        log_payload(logger, "Update response", response.data)
         
         if not response.data:
-            logger.error(f"Failed to update video status: {video_id}")
-            return
+            logger.error("Failed to update video status: %s", video_id)
+            return False
             
         updated = response.data[0]
         if updated.get('published') != success:  
-            logger.error(f"Failed to update published status for video: {video_id}")
-            logger.error(f"Updated data: {updated}")
-            return
+            logger.error("Failed to update published status for video: %s", video_id)
+            log_payload(logger, "Updated data", updated, level=logging.ERROR)
+            return False
             
-        logger.info(f"Updated video status: {video_id} (success={success})")
+        logger.info("Updated video status: %s (success=%s)", video_id, success)
+        return True
         
     except Exception as e:
-        logger.error(f"Error updating video status: {str(e)}")
-        logger.error(f"Error details: {str(e.__dict__)}")
+        logger.error("Error updating video status: %s", e)
+        log_payload(logger, "Error details", e.__dict__)
+        return False
+
+def finish_publish(video: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    """
+    Save the manifest and write the published status for an accepted upload.
+
+    The publish journal entry is completed once the status write lands;
+    until then the next run finishes it from the journal.
+
+    Args:
+        video: The schedule row being published
+        result: The platform handler's successful result
+
+    Returns:
+        bool: True if the status write landed
+    """
+    platform = video['platform']
+    with stage("manifest", platform=platform):
+        # Build the manifest once and render both formats from it
+        manifest_content, manifest_markdown = PublishManifest.from_video(
+            video,
+            result['publish_url'],
+            result.get('embed_code')
+        ).render()
+
+        # Save manifest locally and queue the Markdown version for upload
+        manifest_path, manifest_url = save_and_upload_manifest(
+            video,
+            manifest_content,
+            markdown_content=manifest_markdown
+        )
+
+    if not update_video_status(
+        schedule_id=video['id'],
+        video_id=video['video_id'],
+        success=True,
+        platform_url=result['publish_url'],
+        manifest=manifest_content,
+        manifest_url=manifest_url,
+        user_id=video.get('user_id'),
+        platform_video_id=result.get('platform_video_id')
+    ):
+        return False
+    get_publish_journal().complete(video['id'])
+    return True
+
+def replay_publish_journal() -> int:
+    """
+    Finish publishes a previous run uploaded but did not record.
+
+    The journal is shared by the node's workers, so only entries whose owner
+    has exited (or held them past the claim lease) are taken over; entries
+    of a worker that is still between its upload and status write are left
+    to it.
+
+    Returns:
+        int: Number of rows finished
+    """
+    journal = get_publish_journal()
+    interrupted = [entry for entry in journal.pending("started") if not owner_alive(entry['owner'])]
+    if interrupted:
+        # Died mid-upload: the platform may have the video; these are retried normally
+        logger.warning(
+            "%s publish(es) were interrupted during upload and may be duplicated on retry: %s",
+            len(interrupted), ", ".join(entry['schedule_id'] for entry in interrupted)
+        )
+
+    finished = 0
+    for entry in journal.pending("uploaded"):
+        if not journal.claim(entry, CLAIM_LEASE_SECONDS):
+            logger.debug("Leaving journal entry %s to its running worker %s", entry['schedule_id'], entry['owner'])
+            continue
+        video = entry['video']
+        with log_context(
+            correlation_id=new_correlation_id(),
+            video_id=video['video_id'],
+            schedule_id=video['id'],
+            platform=video['platform']
+        ), tracer.span("replay", video_id=video['video_id'], schedule_id=video['id'], platform=video['platform']):
+            logger.info("Finishing video %s to %s from the publish journal", video['video_id'], video['platform'])
+            try:
+                if finish_publish(video, entry['result']):
+                    finished += 1
+                    metrics.inc("publisher_journal_replays_total", platform=video['platform'])
+            except Exception as e:
+                logger.error("Error finishing video from the publish journal: %s", e)
+
+    journal.prune()
+    return finished
 
 def run_video_publisher():
     """
     Main function to check and process videos scheduled for publishing.
     Fetches due videos and processes them through appropriate platforms.
     """
-    logger.info("Starting video publisher job")
+    configure_logging()
+    with log_context(run_id=new_correlation_id()):
+        logger.info("Starting video publisher job")
+        load_env()
+        start_metrics_server()
+        tracer.configure()
+        quota_limiter = get_quota_limiter()
+        journal = get_publish_journal()
+        run_started = time.perf_counter()
+        profiler.start()
     
-    try:
-        # Fetch videos due for publishing
-        due_videos = fetch_due_videos()
-        logger.info(f"Found {len(due_videos)} video(s) scheduled for publishing")
+        try:
+            with stage("replay_journal"):
+                replayed = replay_publish_journal()
+            if replayed:
+                logger.info("Finished %s video(s) from the publish journal", replayed)
+
+            # Fetch videos due for publishing
+            with stage("fetch_due_videos"):
+                due_videos = fetch_due_videos()
+            logger.info("Found %s video(s) scheduled for publishing", len(due_videos))
         
-        # Process each due video
-        for video in due_videos:
-            video_id = video['video_id']
-            schedule_id = video['id']  # Get schedule ID
-            platform = video['platform']
-            scheduled_at = video['scheduled_at']
-            user_id = video.get('user_id')
+            # Process each due video
+            for video in due_videos:
+                with log_context(
+                    correlation_id=new_correlation_id(),
+                    video_id=video['video_id'],
+                    schedule_id=video['id'],
+                    platform=video['platform'],
+                    user_id=video.get('user_id')
+                ):
+                    video_id = video['video_id']
+                    schedule_id = video['id']  # Get schedule ID
+                    platform = video['platform']
+                    scheduled_at = video['scheduled_at']
+                    user_id = video.get('user_id')
             
-            logger.info(
-                f"Processing video {video_id} "
-                f"to {platform} "
-                f"at {scheduled_at}"
-            )
+                    logger.info("Processing video %s to %s at %s", video_id, platform, scheduled_at)
             
-            try:
-                # Get transcript file info for storage path
-                response = supabase.table("transcript_files") \
-                    .select("file_path,bucket") \
-                    .eq("id", video['video_id']) \
-                    .execute()
+                    outcome = "failed"
+                    with profiler.video(video_id, platform), \
+                            tracer.span("publish", video_id=video_id, schedule_id=schedule_id,
+                                        platform=platform, user_id=user_id) as trace:
+                        try:
+                            # Uploaded by an earlier run that died before the status
+                            # write and could not be finished at startup; never re-upload
+                            entry = journal.get(schedule_id)
+                            if entry and entry['state'] == 'uploaded':
+                                if not journal.claim(entry, CLAIM_LEASE_SECONDS):
+                                    logger.info("Video %s is being finished by worker %s", video_id, entry['owner'])
+                                    outcome = "deferred"
+                                    continue
+                                logger.info("Finishing video %s to %s from the publish journal", video_id, platform)
+                                if finish_publish(video, entry['result']):
+                                    outcome = "published"
+                                    metrics.inc("publisher_journal_replays_total", platform=platform)
+                                continue
+            
+                            # Defer rows that would exceed the platform's rate limit or daily
+                            # quota; they stay unpublished and are picked up by a later run
+                            allowed, reason = quota_limiter.try_acquire(platform)
+                            if not allowed:
+                                logger.info("Deferring video %s to %s: %s", video_id, platform, reason)
+                                outcome = "deferred"
+                                continue
+            
+                            # Rows claimed through claim_due_videos already carry the
+                            # transcript's storage location; otherwise look it up
+                            if 'bucket' not in video:
+                                with stage("metadata", platform=platform):
+                                    response = supabase.table("transcript_files") \
+                                        .select("file_path,bucket") \
+                                        .eq("id", video['video_id']) \
+                                        .execute()
+                                transcript = response.data[0] if response.data else {}
+                                video['bucket'] = transcript.get('bucket')
+                                video['object_path'] = transcript.get('file_path')
                     
-                if not response.data:
-                    update_video_status(
-                        schedule_id=schedule_id,
-                        video_id=video_id,
-                        success=False,
-                        error="Video data not found",
-                        user_id=user_id
-                    )
-                    continue
+                            if not video['bucket'] or not video['object_path']:
+                                quota_limiter.refund(platform)
+                                update_video_status(
+                                    schedule_id=schedule_id,
+                                    video_id=video_id,
+                                    success=False,
+                                    error="Video data not found",
+                                    user_id=user_id
+                                )
+                                continue
                     
-                transcript = response.data[0]
-                video['storage_path'] = f"{transcript['bucket']}/{transcript['file_path']}"
+                            video['storage_path'] = f"{video['bucket']}/{video['object_path']}"
                 
-                # Get video file from Supabase
-                file_path = get_video_file(video['video_id'])
-                if not file_path:
-                    update_video_status(
-                        schedule_id=schedule_id,
-                        video_id=video_id,
-                        success=False,
-                        error="Video file not found",
-                        user_id=user_id
-                    )
-                    continue
+                            # Get video file from Supabase
+                            with stage("get_video_file", platform=platform):
+                                file_path = get_video_file(video['video_id'], video['bucket'], video['object_path'])
+                            if not file_path:
+                                quota_limiter.refund(platform)
+                                update_video_status(
+                                    schedule_id=schedule_id,
+                                    video_id=video_id,
+                                    success=False,
+                                    error="Video file not found",
+                                    user_id=user_id
+                                )
+                                continue
                 
-                # Add file path to video data
-                video['file_path'] = file_path
+                            # Add file path to video data
+                            video['file_path'] = file_path
+                            file_size = os.path.getsize(file_path)
+                            trace.set(bytes=file_size)
+                            metrics.inc("publisher_bytes_total", file_size, direction="downloaded", platform=platform)
                 
-                # Handle platform-specific uploads
-                result = None
-                if video['platform'] == 'youtube':
-                    result = upload_to_youtube(video)
-                elif video['platform'] == 'meta':
-                    result = upload_to_meta(video)
-                elif video['platform'] == 'website':
-                    result = handle_website_publishing(video)
-                else:
-                    update_video_status(
-                        schedule_id=schedule_id,
-                        video_id=video_id,
-                        success=False,
-                        error=f"Unsupported platform: {video['platform']}",
-                        user_id=user_id
-                    )
-                    continue
+                            # Handle platform-specific uploads; the platform's SDK is
+                            # imported the first time one of its rows is due
+                            if platform not in PLATFORM_HANDLERS:
+                                quota_limiter.refund(platform)
+                                update_video_status(
+                                    schedule_id=schedule_id,
+                                    video_id=video_id,
+                                    success=False,
+                                    error=f"Unsupported platform: {video['platform']}",
+                                    user_id=user_id
+                                )
+                                continue
                     
-                if not result['success']:
-                    update_video_status(
-                        schedule_id=schedule_id,
-                        video_id=video_id,
-                        success=False,
-                        error=result.get('error', 'Unknown error'),
-                        user_id=user_id
-                    )
-                    continue
+                            journal.start(video)
+                            with stage("upload", platform=platform):
+                                result = get_platform_handler(platform)(video)
                     
-                # Generate publish manifest
-                manifest_content = generate_publish_manifest(
-                    video,
-                    result['publish_url'],
-                    result.get('embed_code')
-                )
-                
-                # Save manifest locally
-                manifest_path, manifest_url = save_and_upload_manifest(
-                    video,
-                    manifest_content
-                )
+                            if result['success']:
+                                journal.uploaded(schedule_id, result)
+                            else:
+                                journal.discard(schedule_id)
+                                update_video_status(
+                                    schedule_id=schedule_id,
+                                    video_id=video_id,
+                                    success=False,
+                                    error=result.get('error', 'Unknown error'),
+                                    user_id=user_id
+                                )
+                                continue
+                    
+                            metrics.inc("publisher_bytes_total", file_size, direction="uploaded", platform=platform)
+                            lag = schedule_lag_seconds(scheduled_at)
+                            metrics.observe("publisher_schedule_lag_seconds", lag, platform=platform)
+                            metrics.observe("publisher_tenant_lag_seconds", lag, tenant=str(user_id or "unknown"))
                 
-                # Update video status
-                update_video_status(
-                    schedule_id=schedule_id,
-                    video_id=video_id,
-                    success=True,
-                    platform_url=result['publish_url'],
-                    manifest=manifest_content,
-                    manifest_url=manifest_url,
-                    user_id=user_id
-                )
+                            # Manifest and status write; the journal entry is
+                            # completed once the status lands, otherwise it stays
+                            # "uploaded" and the next run finishes it
+                            if finish_publish(video, result):
+                                outcome = "published"
                 
-            except Exception as e:
-                logger.error(f"Error processing video: {str(e)}")
-                update_video_status(
-                    schedule_id=schedule_id,
-                    video_id=video_id,
-                    success=False,
-                    error=str(e),
-                    user_id=user_id
-                )
-                continue
+                        except Exception as e:
+                            logger.error("Error processing video: %s", e)
+                            update_video_status(
+                                schedule_id=schedule_id,
+                                video_id=video_id,
+                                success=False,
+                                error=str(e),
+                                user_id=user_id
+                            )
+                            continue
                 
-            finally:
-                # Clean up temporary video file
-                if 'file_path' in video:
-                    cleanup_video_file(video['file_path'])
+                        finally:
+                            trace.set(outcome=outcome)
+                            metrics.inc("publisher_videos_total", platform=platform, outcome=outcome)
+                            # Clean up temporary video file
+                            if 'file_path' in video:
+                                cleanup_video_file(video['file_path'])
                     
-        return True
+            # Deferred and failed rows go back to the queue for the next run;
+            # if the job dies before this, their claims expire on their own
+            release_claims([video['id'] for video in due_videos])
         
-    except Exception as e:
-        logger.error(f"Publisher job failed: {str(e)}")
-        return False
+            # Give queued manifest uploads a chance to land before the job exits
+            if not flush_manifest_uploads(timeout=float(os.getenv("MANIFEST_UPLOAD_FLUSH_TIMEOUT", "60"))):
+                logger.warning("Timed out waiting for manifest uploads; remaining manifests stay in the local log")
+            
+            return True
+        
+        except Exception as e:
+            logger.error("Publisher job failed: %s", e)
+            return False
+        
+        finally:
+            metrics.observe("publisher_stage_seconds", time.perf_counter() - run_started, stage="run")
+            for line in metrics.summary():
+                logger.debug(line)
+            try:
+                metrics.export()
+            except Exception as e:
+                logger.warning("Failed to export metrics: %s", e)
+            try:
+                profiler.finish()
+            except Exception as e:
+                logger.warning("Failed to write profiles: %s", e)
+            tracer.close()
 
-if __name__ == "__main__":
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish videos that are due")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help="Profile with cProfile or the low-overhead stack sampler")
+    parser.add_argument("--profile-stages", metavar="STAGES",
+                        help="Comma-separated stages to profile (fetch_due_videos, get_video_file, "
+                             "upload, manifest, update_video_status); default: whole run")
+    parser.add_argument("--profile-interval", type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="Seconds between stack samples in sampling mode")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Write tracemalloc snapshots at the start and end of the run")
+    parser.add_argument("--tracemalloc-every", type=int, default=0, metavar="N",
+                        help="Also write a snapshot after every N videos")
+    parser.add_argument("--profile-summary", action="store_true",
+                        help="Print the hottest functions and per-video time and peak memory at the end")
+    parser.add_argument("--profile-dir", help="Directory for profile files (default: PUBLISHER_PROFILE_DIR or profiles)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Append per-video trace spans to FILE (default: PUBLISHER_TRACE_FILE; off if unset)")
+    args = parser.parse_args()
+
+    profiler.configure(
+        mode=args.profile,
+        stages=args.profile_stages.split(",") if args.profile_stages else None,
+        trace_memory=args.tracemalloc,
+        snapshot_every=args.tracemalloc_every,
+        summary=args.profile_summary,
+        sample_interval=args.profile_interval,
+        output_dir=args.profile_dir
+    )
+    tracer.configure(args.trace)
     run_video_publisher()
+
+if __name__ == "__main__":
+    main()
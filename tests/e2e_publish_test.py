@@ -9,46 +9,24 @@ import logging
 from datetime import datetime, timedelta, timezone
 import tempfile
 import uuid
-import httpx
 from pathlib import Path
 import time
 sys.path.append(str(Path(__file__).parent.parent))
 
+from lib.supabase.client import supabase
 from lib.supabase.storage_utils import upload_test_video
+from lib.utils.log import configure_logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Get Supabase config from environment
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
-
-def authenticate_service():
-    """Authenticate with Supabase using service role key."""
-    global api_headers
-    api_headers = {
-        "apikey": SUPABASE_SERVICE_ROLE_KEY,
-        "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=representation"
-    }
-
 def create_test_user():
     """Create a test user in Supabase."""
     try:
-        # Set up service role authentication first
-        authenticate_service()
-        
         # Generate a unique test user ID
         user_id = str(uuid.uuid4())
         email = f"test_{user_id}@example.com"
         
         # Create test user using auth API
-        url = f"{SUPABASE_URL}/auth/v1/admin/users"
         user_data = {
             "email": email,
             "password": "test_password123",
@@ -56,8 +34,7 @@ def create_test_user():
             "user_metadata": {"role": "authenticated"}
         }
         
-        response = httpx.post(url, headers=api_headers, json=user_data)
-        response.raise_for_status()
+        response = supabase.request("POST", "/auth/v1/admin/users", "auth:create_user", json=user_data)
         user_data = response.json()
         user_id = user_data['id']
         
@@ -95,9 +72,7 @@ def create_test_video_entry(user_id: str):
             'bucket': 'videos'
         }
         
-        url = f"{SUPABASE_URL}/rest/v1/transcript_files"
-        response = httpx.post(url, headers=api_headers, json=transcript_data)
-        response.raise_for_status()
+        supabase.table("transcript_files").insert(transcript_data).execute()
         
         # Create video schedule entry
         schedule_data = {
@@ -108,13 +83,7 @@ def create_test_video_entry(user_id: str):
         }
         
         logger.info(f"Creating video schedule with data: {schedule_data}")
-        url = f"{SUPABASE_URL}/rest/v1/video_schedule"
-        response = httpx.post(url, headers=api_headers, json=schedule_data)
-        
-        if response.status_code != 201:
-            logger.error(f"Failed to create video schedule. Status: {response.status_code}")
-            logger.error(f"Response: {response.text}")
-            response.raise_for_status()
+        supabase.table("video_schedule").insert(schedule_data).execute()
             
         return transcript_id  # Return transcript_id since it's used as video_id
         
@@ -136,11 +105,11 @@ def verify_publishing_result(video_id: str) -> bool:
         # Add delay to ensure update is reflected
         time.sleep(2)
         
-        url = f"{SUPABASE_URL}/rest/v1/video_schedule"
-        params = {"video_id": f"eq.{video_id}"}  # Query by video_id field
-        response = httpx.get(url, headers=api_headers, params=params)
-        response.raise_for_status()
-        data = response.json()
+        response = supabase.table("video_schedule") \
+            .select("id,video_id,platform,published,publish_url,publish_error") \
+            .eq("video_id", video_id) \
+            .execute()
+        data = response.data
         
         if not data:
             logger.error(f"No video found with ID {video_id}")
@@ -190,6 +159,7 @@ def run_e2e_test():
     return verify_publishing_result(video_id)
 
 if __name__ == "__main__":
+    configure_logging()
     success = run_e2e_test()
     if not success:
         logger.error("End-to-end test failed verification")
@@ -0,0 +1,145 @@
+"""
+Tests for fair ordering of due videos across users.
+
+fair_order and cap_per_tenant must pick rows the way claim_due_videos does
+(db/migrations/20250415 and 20250416); the fake Supabase RPC
+follows the SQL and is checked against them.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.fake_services import FakeSupabase
+from lib.supabase import fetch_due_videos as fetch_module
+from lib.supabase.client import SupabaseError
+from lib.supabase.fetch_due_videos import cap_per_tenant, fair_order, tenant_max_in_flight, tenant_weights
+
+def due_rows(spec):
+    """Rows from "<id>:<user>:<minute>" strings."""
+    rows = []
+    for item in spec.split():
+        row_id, user_id, minute = item.split(":")
+        rows.append({
+            "id": row_id,
+            "user_id": user_id,
+            "scheduled_at": f"2025-04-01T09:{int(minute):02d}:00+00:00"
+        })
+    return rows
+
+@pytest.mark.parametrize("spec,weights,expected", [
+    # One user's burst no longer holds up the others
+    ("a1:a:0 a2:a:0 a3:a:0 a4:a:0 b1:b:1 c1:c:2", {}, "a1 b1 c1 a2 a3 a4"),
+    # Each user's rows keep their scheduled_at order; equal turns go to the older row
+    ("a2:a:5 a1:a:1 b1:b:2 b2:b:3", {}, "a1 b1 b2 a2"),
+    # Equal turns and equal timestamps fall back to the row ID
+    ("b1:b:0 a1:a:0 c1:c:0", {}, "a1 b1 c1"),
+    # Equal turns go to the older row
+    ("a1:a:3 b1:b:1", {}, "b1 a1"),
+    # Weight 2 gets two rows per round
+    ("a1:a:0 a2:a:0 a3:a:0 a4:a:0 b1:b:0 b2:b:0", {"a": 2}, "a1 a2 b1 a3 a4 b2"),
+    # Weight 0.5 gets a row every other round
+    ("a1:a:0 a2:a:0 b1:b:0 b2:b:0 b3:b:0", {"a": 0.5}, "b1 a1 b2 b3 a2"),
+    # Zero weight goes last rather than dividing by zero
+    ("a1:a:0 b1:b:5 b2:b:6", {"a": 0}, "b1 b2 a1"),
+    ("", {}, ""),
+])
+def test_fair_order(spec, weights, expected):
+    assert [row["id"] for row in fair_order(due_rows(spec), weights)] == expected.split()
+
+@pytest.mark.parametrize("spec,cap,expected", [
+    ("a1:a:0 a2:a:0 a3:a:0 b1:b:0", None, "a1 a2 a3 b1"),
+    ("a1:a:0 a2:a:0 a3:a:0 b1:b:0", 2, "a1 a2 b1"),
+    ("a1:a:0 a2:a:0 b1:b:0 b2:b:0", 1, "a1 b1"),
+    ("a1:a:0 b1:b:0", 0, ""),
+])
+def test_cap_per_tenant(spec, cap, expected):
+    assert [row["id"] for row in cap_per_tenant(due_rows(spec), cap)] == expected.split()
+
+@pytest.mark.parametrize("value,expected", [
+    ("", {}),
+    ("a=2,b=0.5", {"a": 2.0, "b": 0.5}),
+    (" a = 2 , ,b=x", {"a": 2.0}),
+])
+def test_tenant_weights(monkeypatch, value, expected):
+    monkeypatch.setenv("TENANT_WEIGHTS", value)
+    assert tenant_weights() == expected
+
+def test_tenant_max_in_flight(monkeypatch):
+    monkeypatch.delenv("TENANT_MAX_IN_FLIGHT", raising=False)
+    assert tenant_max_in_flight() is None
+    monkeypatch.setenv("TENANT_MAX_IN_FLIGHT", "5")
+    assert tenant_max_in_flight() == 5
+
+def fake_db(rows):
+    db = FakeSupabase()
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.insert("video_schedule", [
+        {
+            **row,
+            "video_id": row["id"],
+            "platform": "youtube",
+            "scheduled_at": (start + timedelta(minutes=int(row["scheduled_at"][14:16]))).isoformat()
+        }
+        for row in rows
+    ])
+    return db
+
+@pytest.mark.parametrize("weights,cap,max_rows", [
+    ({}, None, 50),
+    ({}, None, 4),
+    ({"a": 3}, None, 5),
+    ({"b": 0.5}, 2, 50),
+])
+def test_fake_claim_matches_fair_order(weights, cap, max_rows):
+    rows = due_rows("a1:a:0 a2:a:0 a3:a:1 a4:a:2 a5:a:2 b1:b:1 b2:b:3 c1:c:0 c2:c:9")
+    db = fake_db(rows)
+
+    claimed = db._rpc_claim_due_videos(max_rows, "worker", 900, weights, cap)
+
+    expected = cap_per_tenant(fair_order(rows, weights), cap)[:max_rows]
+    assert [row["id"] for row in claimed] == [row["id"] for row in expected]
+
+def test_fake_claim_counts_rows_in_flight_against_the_cap():
+    db = fake_db(due_rows("a1:a:0 a2:a:1 a3:a:2 b1:b:0"))
+
+    first = db._rpc_claim_due_videos(1, "worker-1", 900, {}, 2)
+    second = db._rpc_claim_due_videos(50, "worker-2", 900, {}, 2)
+
+    assert [row["id"] for row in first] == ["a1"]
+    # a already has one row in flight, so only one more of its rows fits
+    assert [row["id"] for row in second] == ["b1", "a2"]
+
+class FakeRpc:
+    """supabase stand-in whose claim_due_videos predates the tenant parameters."""
+
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append(params)
+        return self
+
+    def execute(self):
+        if "tenant_weights" in self.calls[-1] or "max_per_tenant" in self.calls[-1]:
+            raise SupabaseError(404, "Could not find the function public.claim_due_videos", "PGRST202")
+        return type("Response", (), {"data": [{"id": "s1"}]})()
+
+def test_claim_retries_without_tenant_params_on_an_old_function(monkeypatch):
+    fake = FakeRpc()
+    monkeypatch.setattr(fetch_module, "supabase", fake)
+    monkeypatch.setattr(fetch_module, "_claim_rpc_available", None)
+    monkeypatch.setattr(fetch_module, "_tenant_params_supported", True)
+    monkeypatch.setenv("TENANT_WEIGHTS", "a=2")
+    monkeypatch.setenv("TENANT_MAX_IN_FLIGHT", "3")
+
+    assert fetch_module.claim_due_videos(10) == [{"id": "s1"}]
+    assert fetch_module._claim_rpc_available is True
+    assert [sorted(call) for call in fake.calls] == [
+        ["lease_seconds", "max_per_tenant", "max_rows", "tenant_weights", "worker"],
+        ["lease_seconds", "max_rows", "worker"]
+    ]
+
+    # Later calls go straight to the old signature
+    assert fetch_module.claim_due_videos(10) == [{"id": "s1"}]
+    assert len(fake.calls) == 3
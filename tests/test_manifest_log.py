@@ -0,0 +1,190 @@
+"""
+Tests for the segmented manifest log.
+"""
+
+import json
+
+import pytest
+
+from lib.utils.manifest_log import ManifestLog
+
+def make_record(video_id, ts, platform="youtube", status="success", schedule_id=None, content="{}"):
+    return {
+        "ts": ts,
+        "video_id": video_id,
+        "schedule_id": schedule_id,
+        "platform": platform,
+        "status": status,
+        "format": "json",
+        "content": content
+    }
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("MANIFEST_LOG_DIR", str(tmp_path / "log"))
+    return tmp_path / "log"
+
+def test_append_and_find(log_dir):
+    log = ManifestLog()
+    log.append(make_record("v1", "2025-04-01T00:00:00+00:00", content="first"))
+    log.append(make_record("v2", "2025-04-01T00:01:00+00:00"))
+    log.append(make_record("v1", "2025-04-01T00:02:00+00:00", platform="instagram", content="second"))
+
+    assert [r["content"] for r in log.find("v1")] == ["first", "second"]
+    assert [r["content"] for r in log.find("v1", "instagram")] == ["second"]
+    assert log.latest("v1")["content"] == "second"
+    assert log.find("missing") == []
+
+    # A second instance (another process) sees the same records
+    assert [r["content"] for r in ManifestLog().find("v1")] == ["first", "second"]
+
+def test_segments_rotate_at_size_limit(log_dir):
+    log = ManifestLog(segment_max_bytes=300)
+    for i in range(10):
+        log.append(make_record(f"v{i}", f"2025-04-01T00:00:{i:02d}+00:00", content="x" * 100))
+
+    catalog = json.loads((log_dir / "segments.json").read_text())
+    assert len(catalog["segments"]) > 1
+    for segment_id in catalog["segments"]:
+        assert log.segment_path(segment_id).stat().st_size <= 300
+    assert [r["video_id"] for r in log.scan()] == [f"v{i}" for i in range(10)]
+
+@pytest.mark.parametrize("start,end,platform,status,expected", [
+    (None, None, None, None, ["a", "b", "c", "d"]),
+    ("2025-04-02", None, None, None, ["b", "c", "d"]),
+    (None, "2025-04-03T00:00:00+00:00", None, None, ["a", "b"]),
+    ("2025-04-02", "2025-04-04", None, None, ["b", "c"]),
+    (None, None, "instagram", None, ["b", "d"]),
+    (None, None, None, "failed", ["c"]),
+])
+def test_scan_ranges_and_filters(log_dir, start, end, platform, status, expected):
+    log = ManifestLog()
+    log.append(make_record("a", "2025-04-01T00:00:00+00:00"))
+    log.append(make_record("b", "2025-04-02T00:00:00+00:00", platform="instagram"))
+    log.append(make_record("c", "2025-04-03T00:00:00+00:00", status="failed"))
+    log.append(make_record("d", "2025-04-04T00:00:00+00:00", platform="instagram"))
+
+    assert [r["video_id"] for r in log.scan(start, end, platform, status)] == expected
+
+def test_scan_sorts_out_of_order_appends(log_dir):
+    log = ManifestLog()
+    log.append(make_record("late", "2025-04-02T00:00:00+00:00"))
+    log.append(make_record("early", "2025-04-01T00:00:00+00:00"))
+
+    assert [r["video_id"] for r in log.scan()] == ["early", "late"]
+    assert [r["video_id"] for r in log.find("late")] == ["late"]
+
+def test_repair_indexes_records_after_a_crash(log_dir):
+    log = ManifestLog()
+    log.append(make_record("v1", "2025-04-01T00:00:00+00:00"))
+    segment = log.segment_path(1)
+
+    # Crash after a record reached the segment but before its index entry,
+    # followed by a torn write
+    with open(segment, "ab") as f:
+        f.write(json.dumps(make_record("v2", "2025-04-01T00:01:00+00:00")).encode() + b"\n")
+        f.write(b'{"ts": "2025-04-01T00:02:00+00:00", "video_id": "v3"')
+
+    restarted = ManifestLog()
+    restarted.append(make_record("v4", "2025-04-01T00:03:00+00:00"))
+
+    assert [r["video_id"] for r in restarted.scan()] == ["v1", "v2", "v4"]
+    assert restarted.find("v3") == []
+
+def test_compact_drops_superseded_records(log_dir):
+    log = ManifestLog(segment_max_bytes=200)
+    log.append(make_record("v1", "2025-04-01T00:00:00+00:00", content="old" * 20))
+    log.append(make_record("v2", "2025-04-01T00:01:00+00:00", content="keep" * 20))
+    log.append(make_record("v1", "2025-04-01T00:02:00+00:00", content="new" * 20))
+    log.append(make_record("v3", "2025-04-01T00:03:00+00:00", content="active" * 20))
+
+    result = log.compact()
+
+    assert result["records_before"] == 3
+    assert result["records_after"] == 2
+    assert [r["content"][:3] for r in log.find("v1")] == ["new"]
+    assert [r["video_id"] for r in log.scan()] == ["v2", "v1", "v3"]
+
+def test_compact_keeps_replaced_segments_for_one_version(log_dir):
+    log = ManifestLog(segment_max_bytes=150)
+    for i in range(4):
+        log.append(make_record(f"v{i}", f"2025-04-01T00:00:{i:02d}+00:00", content="x" * 80))
+    first_segments = json.loads((log_dir / "segments.json").read_text())["segments"][:-1]
+
+    log.compact()
+    assert all(log.segment_path(segment_id).exists() for segment_id in first_segments)
+
+    log.append(make_record("v9", "2025-04-01T00:00:09+00:00", content="x" * 80))
+    log.compact()
+    assert not any(log.segment_path(segment_id).exists() for segment_id in first_segments)
+
+def test_readers_retry_after_segments_are_compacted_away(log_dir, monkeypatch):
+    reader = ManifestLog(segment_max_bytes=150)
+    for i in range(4):
+        reader.append(make_record(f"v{i}", f"2025-04-01T00:00:{i:02d}+00:00", content="x" * 80))
+    compactor = ManifestLog(segment_max_bytes=150)
+
+    def compact_twice():
+        # The second compaction deletes the segments the reader indexed
+        compactor.compact()
+        compactor.compact()
+
+    # Compaction lands between the index lookup and the segment read
+    read = reader._read
+    calls = []
+
+    def racing_read(entry):
+        if not calls:
+            compact_twice()
+        calls.append(entry)
+        return read(entry)
+
+    monkeypatch.setattr(reader, "_read", racing_read)
+    assert [r["video_id"] for r in reader.find("v0")] == ["v0"]
+    assert len(calls) == 2
+
+    monkeypatch.setattr(reader, "_read", read)
+    scanned = reader.scan()
+    assert next(scanned)["video_id"] == "v0"
+    compact_twice()
+    assert [r["video_id"] for r in scanned] == ["v1", "v2", "v3"]
+
+def test_location_survives_compaction(log_dir):
+    log = ManifestLog(segment_max_bytes=150)
+    location = log.append(make_record("v0", "2025-04-01T00:00:00+00:00", content="x" * 80))
+    for i in range(1, 4):
+        log.append(make_record(f"v{i}", f"2025-04-01T00:00:{i:02d}+00:00", content="x" * 80))
+    assert location == "v0/youtube/2025-04-01T00:00:00+00:00"
+
+    log.compact()
+    log.compact()
+
+    assert log.get(location)["video_id"] == "v0"
+    assert log.get("v0/instagram/2025-04-01T00:00:00+00:00") is None
+
+def test_compact_keeps_each_publish_of_a_video(log_dir):
+    log = ManifestLog(segment_max_bytes=250)
+    log.append(make_record("v1", "2025-04-01T00:00:00+00:00", schedule_id="s1", status="failed", content="a" * 60))
+    log.append(make_record("v1", "2025-04-01T00:01:00+00:00", schedule_id="s1", content="b" * 60))
+    log.append(make_record("v1", "2025-04-02T00:00:00+00:00", schedule_id="s2", content="c" * 60))
+    log.append(make_record("v2", "2025-04-03T00:00:00+00:00", schedule_id="s3", content="d" * 60))
+
+    log.compact()
+
+    assert [(r["schedule_id"], r["content"][0]) for r in log.find("v1")] == [("s1", "b"), ("s2", "c")]
+
+def test_compact_reads_schedule_id_of_older_index_entries(log_dir):
+    log = ManifestLog(segment_max_bytes=250)
+    log.append(make_record("v1", "2025-04-01T00:00:00+00:00", schedule_id="s1", content="a" * 60))
+    log.append(make_record("v1", "2025-04-02T00:00:00+00:00", schedule_id="s2", content="b" * 60))
+    log.append(make_record("v2", "2025-04-03T00:00:00+00:00", schedule_id="s3", content="c" * 60))
+
+    # Rewrite the index in the six-field format used before schedule_id was indexed
+    for index in log_dir.glob("*.idx"):
+        entries = [json.loads(line)[:6] for line in index.read_text().splitlines()]
+        index.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+
+    legacy = ManifestLog(segment_max_bytes=250)
+    assert len(legacy.find("v1")) == 2
+    legacy.compact()
+    assert [r["schedule_id"] for r in legacy.find("v1")] == ["s1", "s2"]
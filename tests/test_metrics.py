@@ -0,0 +1,39 @@
+"""
+Tests for the publisher metrics registry.
+"""
+
+import pytest
+
+from lib.utils import metrics as metrics_module
+from lib.utils.metrics import Metrics
+
+@pytest.fixture(autouse=True)
+def state(tmp_path, monkeypatch):
+    monkeypatch.setenv("PUBLISHER_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setitem(metrics_module.LABEL_LIMITS, "publisher_tenant_lag_seconds", ("tenant", 2))
+
+def tenants(registry):
+    return sorted(dict(key)["tenant"] for key in registry._histograms["publisher_tenant_lag_seconds"])
+
+def test_tenant_series_are_capped_in_a_run():
+    registry = Metrics()
+    for tenant in ("a", "b", "c", "d", "a"):
+        registry.observe("publisher_tenant_lag_seconds", 1, tenant=tenant)
+
+    assert tenants(registry) == ["a", "b", "other"]
+    other = registry._histograms["publisher_tenant_lag_seconds"][(("tenant", "other"),)]
+    assert other.count == 2
+
+def test_tenant_series_are_capped_across_exported_runs(tmp_path):
+    textfile = tmp_path / "publisher.prom"
+    for run_tenants in (("a", "b"), ("c", "d"), ("e", "a")):
+        registry = Metrics()
+        for tenant in run_tenants:
+            registry.observe("publisher_tenant_lag_seconds", 1, tenant=tenant)
+        registry.export(str(textfile))
+
+    totals = Metrics()
+    totals.merge_state(metrics_module.read_json(metrics_module.state_dir() / "metrics.json", {}))
+    assert tenants(totals) == ["a", "b", "other"]
+    assert 'tenant="c"' not in textfile.read_text()
+    assert 'publisher_tenant_lag_seconds_count{tenant="other"} 3' in textfile.read_text()
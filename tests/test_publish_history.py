@@ -0,0 +1,45 @@
+"""
+Tests for the local publish history index.
+"""
+
+import json
+
+import pytest
+
+from lib.utils import manifest_log
+from lib.utils.manifest_log import ManifestLog
+from lib.utils.publish_history import PublishHistory
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    log = ManifestLog(tmp_path / "log", segment_max_bytes=200)
+    monkeypatch.setattr(manifest_log, "_log", log)
+    return log
+
+def manifest_record(video_id, published_at):
+    return {
+        "ts": published_at,
+        "video_id": video_id,
+        "schedule_id": f"schedule-{video_id}",
+        "platform": "youtube",
+        "status": "success",
+        "format": "json",
+        "content": json.dumps({"published_at": published_at, "publish_url": f"https://youtu.be/{video_id}"})
+    }
+
+def test_rebuild_stores_locations_that_survive_compaction(tmp_path, log):
+    history = PublishHistory(tmp_path / "history.db")
+    for i in range(4):
+        record = manifest_record(f"v{i}", f"2025-04-01T00:00:{i:02d}+00:00")
+        history.record({**record, "location": log.append(record)})
+    # A row indexed before locations were stable
+    history._conn.execute("update publish_history set manifest_location = 'segment-00000001.jsonl:0'")
+
+    log.compact()
+    log.compact()
+    assert history.rebuild() == 4
+
+    rows = history.query()
+    assert len(rows) == 4
+    for row in rows:
+        assert log.get(row["manifest_location"])["video_id"] == row["video_id"]
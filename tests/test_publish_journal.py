@@ -0,0 +1,274 @@
+"""
+Tests for the publish journal and how run_publisher replays it.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import run_publisher
+from lib.utils.metrics import metrics
+from lib.utils.publish_journal import PublishJournal, owner_alive, owner_id
+
+def make_video(schedule_id, video_id=None, platform="youtube"):
+    return {
+        "id": schedule_id,
+        "video_id": video_id or f"video-{schedule_id}",
+        "user_id": "user-1",
+        "platform": platform,
+        "title": "Title",
+        "scheduled_at": "2025-04-01T00:00:00+00:00",
+        "bucket": "videos",
+        "object_path": f"{schedule_id}.mp4"
+    }
+
+def dead_owner() -> str:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return f"{socket.gethostname()}:{process.pid}"
+
+def live_owner() -> str:
+    # The parent of the test process: running, but not this process
+    return f"{socket.gethostname()}:{os.getppid()}"
+
+def set_owner(journal, schedule_id, owner, owned_for=0):
+    owner_at = (datetime.now(timezone.utc) - timedelta(seconds=owned_for)).isoformat()
+    with journal._conn:
+        journal._conn.execute(
+            "update publish_journal set owner = ?, owner_at = ? where schedule_id = ?",
+            (owner, owner_at, schedule_id)
+        )
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    monkeypatch.setenv("PUBLISH_JOURNAL_DB", str(tmp_path / "journal.db"))
+    journal = PublishJournal()
+    yield journal
+    journal.close()
+
+def test_entry_moves_through_states(journal):
+    video = {**make_video("s1"), "file_path": "/tmp/s1.mp4"}
+    journal.start(video)
+
+    entry = journal.get("s1")
+    assert entry["state"] == "started"
+    assert entry["owner"] == owner_id()
+    assert "file_path" not in entry["video"]
+    assert entry["result"] is None
+
+    journal.uploaded("s1", {"success": True, "publish_url": "https://youtu.be/x"})
+    entry = journal.get("s1")
+    assert entry["state"] == "uploaded"
+    assert entry["result"]["publish_url"] == "https://youtu.be/x"
+
+    journal.complete("s1")
+    assert journal.get("s1")["state"] == "completed"
+
+    # A retry of the same row starts over and counts the attempt
+    journal.start(video)
+    entry = journal.get("s1")
+    assert (entry["state"], entry["attempts"], entry["result"]) == ("started", 2, None)
+
+    journal.discard("s1")
+    assert journal.get("s1") is None
+
+def test_pending_and_prune(journal):
+    for schedule_id in ("s1", "s2", "s3"):
+        journal.start(make_video(schedule_id))
+    journal.uploaded("s2", {"success": True})
+    journal.uploaded("s3", {"success": True})
+    journal.complete("s3")
+
+    assert [e["schedule_id"] for e in journal.pending("started")] == ["s1"]
+    assert [e["schedule_id"] for e in journal.pending()] == ["s2"]
+    with pytest.raises(ValueError):
+        journal.pending("replaying")
+
+    assert journal.prune(retention_days=1) == 0
+    assert journal.prune(retention_days=0) == 1
+    assert journal.get("s3") is None
+    assert journal.get("s1") is not None
+
+def test_owner_alive():
+    assert owner_alive(owner_id())
+    assert owner_alive(live_owner())
+    assert not owner_alive(dead_owner())
+    assert not owner_alive("another-host:1")
+    assert not owner_alive(None)
+
+@pytest.mark.parametrize("owner,owned_for,claimed", [
+    ("self", 0, True),
+    ("live", 0, False),
+    ("live", 3600, True),
+    ("dead", 0, True),
+    (None, 0, True),
+])
+def test_claim(journal, owner, owned_for, claimed):
+    journal.start(make_video("s1"))
+    journal.uploaded("s1", {"success": True})
+    owner = {"self": owner_id(), "live": live_owner(), "dead": dead_owner()}.get(owner)
+    set_owner(journal, "s1", owner, owned_for)
+
+    assert journal.claim(journal.get("s1"), stale_after=900) is claimed
+    assert journal.get("s1")["owner"] == (owner_id() if claimed else owner)
+
+def test_claim_is_won_by_one_process(journal):
+    journal.start(make_video("s1"))
+    journal.uploaded("s1", {"success": True})
+    set_owner(journal, "s1", dead_owner())
+    entry = journal.get("s1")
+
+    # Another worker took the entry over after we read it
+    set_owner(journal, "s1", live_owner())
+    assert not journal.claim(entry, stale_after=900)
+
+class Publisher:
+    """Stubs the services run_video_publisher talks to and records what it did."""
+
+    def __init__(self, monkeypatch, tmp_path, journal, due):
+        self.uploads = []
+        self.status_writes = []
+        self.status_ok = True
+        self.released = None
+
+        monkeypatch.setenv("PUBLISHER_STATE_DIR", str(tmp_path / "state"))
+        monkeypatch.delenv("METRICS_TEXTFILE", raising=False)
+        monkeypatch.delenv("PUBLISHER_TRACE_FILE", raising=False)
+        monkeypatch.setattr(run_publisher, "configure_logging", lambda: None)
+        monkeypatch.setattr(run_publisher, "load_env", lambda: None)
+        monkeypatch.setattr(run_publisher, "get_publish_journal", lambda: journal)
+        monkeypatch.setattr(run_publisher, "fetch_due_videos", lambda: [dict(video) for video in due])
+        monkeypatch.setattr(run_publisher, "release_claims", self.release_claims)
+        monkeypatch.setattr(run_publisher, "flush_manifest_uploads", lambda timeout: True)
+        monkeypatch.setattr(run_publisher, "get_quota_limiter", lambda: QuotaLimiter())
+        monkeypatch.setattr(run_publisher, "get_video_file", self.get_video_file)
+        monkeypatch.setattr(run_publisher, "PLATFORM_HANDLERS", {"youtube": None})
+        monkeypatch.setattr(run_publisher, "get_platform_handler", lambda platform: self.upload)
+        monkeypatch.setattr(run_publisher, "save_and_upload_manifest", lambda *args, **kwargs: ("location", None))
+        monkeypatch.setattr(run_publisher, "update_video_status", self.update_video_status)
+        self.tmp_path = tmp_path
+        metrics.reset()
+
+    def get_video_file(self, video_id, bucket, object_path):
+        path = self.tmp_path / object_path
+        path.write_bytes(b"video")
+        return str(path)
+
+    def upload(self, video):
+        self.uploads.append(video["id"])
+        return {"success": True, "publish_url": f"https://youtu.be/{video['id']}", "platform_video_id": video["id"]}
+
+    def update_video_status(self, schedule_id, success, **kwargs):
+        self.status_writes.append((schedule_id, success))
+        return self.status_ok
+
+    def release_claims(self, schedule_ids):
+        self.released = schedule_ids
+
+    def counter(self, name, **labels):
+        return metrics._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+class QuotaLimiter:
+    def try_acquire(self, platform):
+        return True, ""
+
+    def refund(self, platform):
+        pass
+
+def journal_uploaded(journal, schedule_id, owner, owned_for=0):
+    journal.start(make_video(schedule_id))
+    journal.uploaded(schedule_id, {"success": True, "publish_url": f"https://youtu.be/{schedule_id}"})
+    set_owner(journal, schedule_id, owner, owned_for)
+
+def test_publishes_and_completes_journal_entries(tmp_path, monkeypatch, journal):
+    publisher = Publisher(monkeypatch, tmp_path, journal, [make_video("s1")])
+
+    assert run_publisher.run_video_publisher()
+
+    assert publisher.uploads == ["s1"]
+    assert publisher.status_writes == [("s1", True)]
+    assert journal.get("s1")["state"] == "completed"
+
+def test_replays_uploads_of_a_dead_worker_without_uploading(tmp_path, monkeypatch, journal):
+    journal_uploaded(journal, "s1", dead_owner())
+    publisher = Publisher(monkeypatch, tmp_path, journal, [make_video("s2")])
+
+    assert run_publisher.run_video_publisher()
+
+    assert publisher.uploads == ["s2"]
+    assert publisher.status_writes == [("s1", True), ("s2", True)]
+    assert journal.get("s1")["state"] == "completed"
+    assert publisher.counter("publisher_journal_replays_total", platform="youtube") == 1
+
+def test_leaves_uploads_of_a_running_worker_alone(tmp_path, monkeypatch, journal):
+    journal_uploaded(journal, "s1", live_owner())
+    publisher = Publisher(monkeypatch, tmp_path, journal, [make_video("s1"), make_video("s2")])
+
+    assert run_publisher.run_video_publisher()
+
+    # Neither replayed at startup nor re-uploaded when claimed again
+    assert publisher.uploads == ["s2"]
+    assert publisher.status_writes == [("s2", True)]
+    assert journal.get("s1")["state"] == "uploaded"
+    assert journal.get("s1")["owner"] == live_owner()
+    assert publisher.counter("publisher_videos_total", platform="youtube", outcome="deferred") == 1
+
+def test_finishes_claimed_row_from_journal_without_uploading(tmp_path, monkeypatch, journal):
+    journal_uploaded(journal, "s1", live_owner(), owned_for=3600)
+    publisher = Publisher(monkeypatch, tmp_path, journal, [make_video("s1")])
+    # Startup replay runs before this row is claimed; finish it in the loop
+    monkeypatch.setattr(run_publisher, "replay_publish_journal", lambda: 0)
+
+    assert run_publisher.run_video_publisher()
+
+    assert publisher.uploads == []
+    assert publisher.status_writes == [("s1", True)]
+    assert journal.get("s1")["state"] == "completed"
+    assert publisher.counter("publisher_videos_total", platform="youtube", outcome="published") == 1
+    assert publisher.counter("publisher_journal_replays_total", platform="youtube") == 1
+
+def test_failed_status_write_is_not_counted_as_published(tmp_path, monkeypatch, journal):
+    journal_uploaded(journal, "s1", dead_owner())
+    publisher = Publisher(monkeypatch, tmp_path, journal, [make_video("s1")])
+    monkeypatch.setattr(run_publisher, "replay_publish_journal", lambda: 0)
+    publisher.status_ok = False
+
+    assert run_publisher.run_video_publisher()
+
+    assert publisher.uploads == []
+    assert journal.get("s1")["state"] == "uploaded"
+    assert publisher.counter("publisher_videos_total", platform="youtube", outcome="failed") == 1
+    assert publisher.counter("publisher_videos_total", platform="youtube", outcome="published") == 0
+    assert publisher.counter("publisher_journal_replays_total", platform="youtube") == 0
+
+def test_failed_status_write_after_upload_is_not_counted_as_published(tmp_path, monkeypatch, journal):
+    publisher = Publisher(monkeypatch, tmp_path, journal, [make_video("s1")])
+    publisher.status_ok = False
+
+    assert run_publisher.run_video_publisher()
+
+    assert publisher.uploads == ["s1"]
+    # Left for the next run to finish from the journal
+    assert journal.get("s1")["state"] == "uploaded"
+    assert publisher.counter("publisher_videos_total", platform="youtube", outcome="failed") == 1
+    assert publisher.counter("publisher_videos_total", platform="youtube", outcome="published") == 0
+
+def test_journal_error_does_not_abort_the_run(tmp_path, monkeypatch, journal):
+    journal_uploaded(journal, "s1", dead_owner())
+    publisher = Publisher(monkeypatch, tmp_path, journal, [make_video("s1"), make_video("s2")])
+    monkeypatch.setattr(run_publisher, "replay_publish_journal", lambda: 0)
+
+    def broken_finish(video, result):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(run_publisher, "finish_publish", broken_finish)
+
+    assert run_publisher.run_video_publisher()
+
+    assert publisher.uploads == ["s2"]
+    assert publisher.released == ["s1", "s2"]
+    assert publisher.counter("publisher_videos_total", platform="youtube", outcome="failed") == 2
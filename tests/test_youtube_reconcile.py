@@ -0,0 +1,37 @@
+"""
+Tests for mapping videos.list results to platform statuses.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from lib.platforms.youtube_reconcile import PENDING_STATUSES, classify_video
+
+NOW = datetime(2025, 4, 10, 12, 0, tzinfo=timezone.utc)
+
+def item(privacy="public", publish_at=None, upload_status="processed", **status):
+    return {
+        "status": {"uploadStatus": upload_status, "privacyStatus": privacy, "publishAt": publish_at, **status},
+        "processingDetails": {"processingStatus": "succeeded"}
+    }
+
+@pytest.mark.parametrize("video,expected", [
+    (None, ("missing", "Video not returned by videos.list")),
+    (item(), ("live", None)),
+    (item("unlisted"), ("live", None)),
+    (item("private"), ("private", "publishAt not set")),
+    (item(upload_status="rejected", rejectionReason="copyright"), ("rejected", "copyright")),
+    (item(upload_status="uploaded"), ("processing", None)),
+    # publishAt still ahead: YouTube will publish it
+    (item("private", "2025-04-10T12:30:00Z"), ("scheduled", "2025-04-10T12:30:00Z")),
+    # Still private after publishAt: the scheduled publish did not take effect
+    (item("private", "2025-04-10T11:00:00Z"), ("publish_missed", "2025-04-10T11:00:00Z")),
+    (item("private", "2025-04-10T12:00:00.000Z"), ("publish_missed", "2025-04-10T12:00:00.000Z")),
+])
+def test_classify_video(video, expected):
+    result = classify_video(video, now=NOW)
+    assert (result["platform_status"], result["platform_status_detail"]) == expected
+
+def test_missed_publish_is_not_re_polled():
+    assert "publish_missed" not in PENDING_STATUSES